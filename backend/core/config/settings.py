@@ -1,4 +1,4 @@
-from typing import List, Union
+from typing import Any, Dict, List, Optional, Union
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 class Settings(BaseSettings):
@@ -17,10 +17,18 @@ class Settings(BaseSettings):
     POSTGRES_DB: str
     POSTGRES_HOST: str
     POSTGRES_PORT: Union[int, str] = 5432
+    # Overrides the Postgres settings, e.g. "sqlite+aiosqlite:///./students.db" for a local stand-in
+    DATABASE_URL: Optional[str] = None
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 20
+    # Student ids loaded per query by the student repository
+    STUDENT_LOAD_BATCH_SIZE: int = 500
     
     # Database URL
     @property
     def SQLALCHEMY_DATABASE_URI(self) -> str:
+        if self.DATABASE_URL:
+            return self.DATABASE_URL
         return f"postgresql://{self.POSTGRES_USER}:{self.POSTGRES_PASSWORD}@{self.POSTGRES_HOST}:{self.POSTGRES_PORT}/{self.POSTGRES_DB}"
     
     # Neo4j
@@ -31,15 +39,126 @@ class Settings(BaseSettings):
     # Redis
     REDIS_HOST: str
     REDIS_PORT: Union[int, str] = 6379
+    REDIS_SOCKET_TIMEOUT_SECONDS: float = 0.5
+    REDIS_FAILURE_COOLDOWN_SECONDS: float = 10.0
     
     # LLM
     LLM_PROVIDER: str
     LLM_MODEL: str
     GOOGLE_API_KEY: str
+    OLLAMA_BASE_URL: str = "http://localhost:11434"
+    # Extra providers by name, e.g. {"local": {"kind": "vllm", "model": "...", "base_url": "..."}}
+    LLM_PROVIDERS: Dict[str, Dict[str, Any]] = {}
+
+    # LLM HTTP connection pool, shared by the HTTP based providers
+    LLM_HTTP_MAX_CONNECTIONS: int = 100
+    LLM_HTTP_MAX_KEEPALIVE_CONNECTIONS: int = 20
+    LLM_HTTP_KEEPALIVE_EXPIRY_SECONDS: float = 60.0
+    LLM_HTTP_TIMEOUT_SECONDS: float = 60.0
+    LLM_HTTP_CONNECT_TIMEOUT_SECONDS: float = 5.0
+    
+    # LLM scheduling (concurrency caps are per provider)
+    LLM_MAX_CONCURRENCY: int = 8
+    LLM_PROVIDER_CONCURRENCY: Dict[str, int] = {}
+    LLM_QUEUE_MAX_DEPTH: int = 64
+    LLM_QUEUE_MAX_PER_STUDENT: int = 4
+
+    # LLM deadlines and hedging (a second provider is started once the first is slower than usual)
+    LLM_REQUEST_DEADLINE_SECONDS: float = 60.0
+    LLM_HEDGE_ENABLED: bool = False
+    LLM_HEDGE_PROVIDER: Optional[str] = None
+    LLM_HEDGE_PERCENTILE: float = 0.95
+    LLM_HEDGE_DEFAULT_DELAY_MS: float = 2000.0
+    LLM_HEDGE_MIN_DELAY_MS: float = 200.0
+    LLM_HEDGE_MAX_DELAY_MS: float = 10000.0
+    LLM_HEDGE_MIN_SAMPLES: int = 20
+    LLM_LATENCY_WINDOW: int = 500
+
+    # Model cascade (a small model drafts general replies, the main model takes the rest)
+    LLM_CASCADE_ENABLED: bool = False
+    LLM_CASCADE_PROVIDER: Optional[str] = None
+    LLM_CASCADE_MIN_CONFIDENCE: float = 0.7
+    LLM_CASCADE_MIN_CONFIDENCE_BY_PATTERN: Dict[str, float] = {}
+    LLM_CASCADE_MAX_MESSAGE_CHARS: int = 400
+    LLM_CASCADE_DRAFT_MAX_TOKENS: int = 300
+    LLM_CASCADE_DRAFT_TIMEOUT_SECONDS: float = 5.0
+    
+    # LLM sampling cache
+    SAMPLE_CACHE_ENABLED: bool = True
+    SAMPLE_CACHE_USE_REDIS: bool = True
+    SAMPLE_CACHE_TTL_SECONDS: int = 21600
+    SAMPLE_CACHE_LOCAL_SIZE: int = 1024
+    SAMPLE_CACHE_DISABLED_TOOLS: List[str] = []
+    
+    # Structured tool output (native JSON/schema mode where the provider has one)
+    LLM_NATIVE_STRUCTURED_OUTPUT: bool = True
+    STRUCTURED_OUTPUT_MAX_TOKENS: int = 2048
+    # Per-step timeouts of multi-step patterns
+    PATTERN_LLM_STEP_TIMEOUT_SECONDS: float = 45.0
+    PATTERN_RESOURCE_STEP_TIMEOUT_SECONDS: float = 10.0
+    
+    # Prompt context (token budgets per prompt, overrides keyed by profile name)
+    PROMPT_CONTEXT_TOKEN_BUDGET: int = 1500
+    PROMPT_CONTEXT_BUDGETS: Dict[str, int] = {}
+    
+    # Request coalescing (single-flight)
+    SINGLEFLIGHT_ENABLED: bool = True
+    SINGLEFLIGHT_USE_REDIS: bool = True
+    SINGLEFLIGHT_LOCK_TTL_SECONDS: int = 120
+    SINGLEFLIGHT_RESULT_TTL_SECONDS: int = 30
+    SINGLEFLIGHT_WAIT_TIMEOUT_SECONDS: float = 120.0
+    CHAT_IDEMPOTENCY_TTL_SECONDS: int = 600
     
     # FastMCP settings
     MCP_SERVER_NAME: str
     MCP_SERVER_PORT: int
+    MCP_DISPATCH_MODE: str = "direct"  # "direct" (in-process), "client" (MCP session) or "remote" (worker pool)
+    # MCP worker pool, used in "remote" mode (SSE endpoints, e.g. http://mcp-1:8100/sse)
+    MCP_WORKER_URLS: List[str] = []
+    MCP_POOL_HEALTH_INTERVAL_SECONDS: float = 10.0
+    MCP_POOL_RETRIES: int = 2
+    MCP_POOL_CALL_TIMEOUT_SECONDS: float = 60.0
+    MCP_POOL_CONNECT_TIMEOUT_SECONDS: float = 5.0
+    MCP_WORKER_HOST: str = "0.0.0.0"
+    MCP_WORKER_COUNT: int = 1
+    MCP_MEMO_ENABLED: bool = True  # Serve memoized tool and resource results from cache
+    
+    # Chat
+    WS_CONTEXT_MAX_AGE_SECONDS: float = 300.0
+    CONTEXT_RESOURCE_TIMEOUT_SECONDS: float = 2.0
+    CONTEXT_INTENT_TIMEOUT_SECONDS: float = 0.5
+    CHAT_POLISH_TOOL_RESULTS: bool = False
+
+    # Warm-up at startup (the /ready endpoint reports ready once it has finished)
+    WARMUP_ENABLED: bool = True
+    WARMUP_TIMEOUT_SECONDS: float = 30.0
+    WARMUP_PRIME_LLM: bool = True
+    WARMUP_LLM_TIMEOUT_SECONDS: float = 10.0
+
+    # Batch advising
+    BATCH_MAX_STUDENTS: int = 5000
+    BATCH_CONCURRENCY: int = 8
+    BATCH_MAX_CONCURRENCY: int = 32
+    BATCH_MAX_RETRIES: int = 2
+    
+    # Intent classification
+    INTENT_CLASSIFIER: str = "embedding"  # "embedding" (with keyword fallback) or "keyword"
+    INTENT_EMBEDDING_PROVIDER: str = "hashing"  # "hashing" (local, deterministic) or "ollama"
+    INTENT_EMBEDDING_MODEL: str = "nomic-embed-text"
+    INTENT_MIN_SIMILARITY: float = 0.3
+    
+    # Course catalog
+    COURSE_CATALOG_SOURCE: str = "file"  # "file" (JSON) or "database" (the courses table)
+    COURSE_CATALOG_PATH: Optional[str] = None  # JSON catalog file; the bundled catalog by default
+    COURSE_CATALOG_RELOAD_INTERVAL_SECONDS: float = 60.0  # How often to check for a new version; 0 disables
+    COURSE_CATALOG_PAGE_SIZE: int = 100
+    COURSE_CATALOG_MAX_PAGE_SIZE: int = 500
+    # Course search index file, read at startup and rewritten when the catalog changes, so a restart only
+    # re-indexes changed courses; kept in memory only by default. Use an absolute path, e.g. under VECTOR_DB_DIR.
+    COURSE_SEARCH_INDEX_PATH: Optional[str] = None
+    COURSE_SEARCH_LIMIT: int = 10
+    COURSE_SEARCH_MAX_LIMIT: int = 50
+    CHAT_COURSE_SEARCH_LIMIT: int = 5  # Matching courses added to general chat prompts; 0 disables
     
     # Vector DB
     VECTOR_DB_DIR: str = "./data/vector_db"
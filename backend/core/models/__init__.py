@@ -0,0 +1,5 @@
+from core.models.database import Base
+from core.models.student import Student, Enrollment, Grade
+from core.models.course import Course
+
+__all__ = ["Base", "Student", "Enrollment", "Grade", "Course"]
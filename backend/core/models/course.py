@@ -0,0 +1,48 @@
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+from sqlalchemy import DateTime, Index, SmallInteger, String, Text, func
+from sqlalchemy.orm import Mapped, mapped_column
+
+from core.models.database import Base
+from core.models.student import JSONList
+
+class Course(Base):
+    """A course of the catalog"""
+    __tablename__ = "courses"
+
+    id: Mapped[str] = mapped_column(String(32), primary_key=True)
+    name: Mapped[str] = mapped_column(String(200))
+    department: Mapped[str] = mapped_column(String(100))
+    credits: Mapped[int] = mapped_column(SmallInteger, default=3)
+    description: Mapped[str] = mapped_column(Text, default="")
+    prerequisites: Mapped[List[str]] = mapped_column(JSONList, default=list)
+    offered_semesters: Mapped[List[str]] = mapped_column(JSONList, default=list)
+    topics: Mapped[List[str]] = mapped_column(JSONList, default=list)
+    textbooks: Mapped[List[Dict[str, Any]]] = mapped_column(JSONList, default=list)
+    syllabus_url: Mapped[Optional[str]] = mapped_column(String(500), nullable=True)
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now(), onupdate=func.now()
+    )
+
+    __table_args__ = (
+        # The catalog version is derived from the latest change
+        Index("ix_courses_updated_at", "updated_at"),
+    )
+
+    def to_dict(self) -> Dict[str, Any]:
+        """The courses://{id} representation"""
+        course = {
+            "id": self.id,
+            "name": self.name,
+            "department": self.department,
+            "credits": self.credits,
+            "description": self.description,
+            "prerequisites": list(self.prerequisites or []),
+            "offered_semesters": list(self.offered_semesters or []),
+            "topics": list(self.topics or []),
+        }
+        if self.syllabus_url:
+            course["syllabus_url"] = self.syllabus_url
+        if self.textbooks:
+            course["textbooks"] = list(self.textbooks)
+        return course
@@ -1,31 +1,73 @@
+from typing import Any, Dict, Optional
 from sqlalchemy import create_engine
-from sqlalchemy.ext.declarative import declarative_base
+from sqlalchemy.engine import Engine
 from sqlalchemy.orm import sessionmaker
-from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, create_async_engine
 from sqlalchemy.orm import DeclarativeBase
 
 from core.config import settings
 
-# Create async engine
-async_engine = create_async_engine(
-    settings.SQLALCHEMY_DATABASE_URI.replace("postgresql://", "postgresql+asyncpg://"),
-    echo=settings.DEBUG,
-    future=True,
-)
-
-# Create sync engine (for migrations and utilities)
-sync_engine = create_engine(
-    settings.SQLALCHEMY_DATABASE_URI,
-    echo=settings.DEBUG,
-    future=True,
-)
-
-# Create async session
-async_session = sessionmaker(
-    bind=async_engine,
-    class_=AsyncSession,
-    expire_on_commit=False,
-)
+# Engines are created on first use, so importing models doesn't open pools
+_async_engine: Optional[AsyncEngine] = None
+_sync_engine: Optional[Engine] = None
+_async_session: Optional[sessionmaker] = None
+
+def engine_options(url: str) -> Dict[str, Any]:
+    """Pool settings for a database URL; SQLite stand-ins keep SQLAlchemy's defaults."""
+    if url.startswith("sqlite"):
+        return {}
+    return {
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_pre_ping": True,
+    }
+
+def get_async_engine() -> AsyncEngine:
+    """Returns the async engine, creating it on first use."""
+    global _async_engine
+    if _async_engine is None:
+        url = settings.SQLALCHEMY_DATABASE_URI.replace("postgresql://", "postgresql+asyncpg://")
+        _async_engine = create_async_engine(
+            url,
+            echo=settings.DEBUG,
+            future=True,
+            **engine_options(url),
+        )
+    return _async_engine
+
+def get_sync_engine() -> Engine:
+    """Returns the sync engine (for migrations and utilities), creating it on first use."""
+    global _sync_engine
+    if _sync_engine is None:
+        # Sync drivers for URLs that name an async one (e.g. a sqlite+aiosqlite stand-in)
+        url = settings.SQLALCHEMY_DATABASE_URI.replace("+aiosqlite", "").replace("+asyncpg", "")
+        _sync_engine = create_engine(
+            url,
+            echo=settings.DEBUG,
+            future=True,
+            **engine_options(url),
+        )
+    return _sync_engine
+
+def get_async_session() -> sessionmaker:
+    """Returns the async session factory bound to the async engine."""
+    global _async_session
+    if _async_session is None:
+        _async_session = sessionmaker(
+            bind=get_async_engine(),
+            class_=AsyncSession,
+            expire_on_commit=False,
+        )
+    return _async_session
+
+async def dispose_engines() -> None:
+    """Close the connection pools of the engines that were created."""
+    global _async_engine, _sync_engine, _async_session
+    if _async_engine is not None:
+        await _async_engine.dispose()
+    if _sync_engine is not None:
+        _sync_engine.dispose()
+    _async_engine = _sync_engine = _async_session = None
 
 # Base class for all models
 class Base(DeclarativeBase):
@@ -33,7 +75,7 @@ class Base(DeclarativeBase):
 
 # Get async DB session
 async def get_db():
-    db = async_session()
+    db = get_async_session()()
     try:
         yield db
     finally:
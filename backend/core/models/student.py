@@ -0,0 +1,93 @@
+from typing import Any, Dict, List, Optional
+from sqlalchemy import BigInteger, Float, ForeignKey, Index, Integer, JSON, SmallInteger, String, UniqueConstraint
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.orm import Mapped, mapped_column, relationship
+
+from core.models.database import Base
+
+# JSONB on Postgres, plain JSON on the SQLite stand-in
+JSONList = JSON().with_variant(JSONB(), "postgresql")
+# SQLite only auto-increments INTEGER primary keys
+BigId = BigInteger().with_variant(Integer(), "sqlite")
+
+class Student(Base):
+    """A student and the profile the advising tools work from"""
+    __tablename__ = "students"
+
+    id: Mapped[str] = mapped_column(String(64), primary_key=True)
+    name: Mapped[str] = mapped_column(String(200))
+    major: Mapped[str] = mapped_column(String(100), default="Undeclared")
+    year: Mapped[int] = mapped_column(SmallInteger, default=1)
+    gpa: Mapped[float] = mapped_column(Float, default=0.0)
+    interests: Mapped[List[str]] = mapped_column(JSONList, default=list)
+    career_goals: Mapped[List[str]] = mapped_column(JSONList, default=list)
+
+    # Loaded explicitly by the repository, never lazily
+    enrollments: Mapped[List["Enrollment"]] = relationship(
+        back_populates="student", cascade="all, delete-orphan", lazy="raise", order_by="Enrollment.id"
+    )
+
+    __table_args__ = (
+        # Cohort lookups (students of a major and year)
+        Index("ix_students_major_year", "major", "year"),
+    )
+
+    def to_profile(self) -> Dict[str, Any]:
+        """The student://{id}/profile representation"""
+        return {
+            "id": self.id,
+            "name": self.name,
+            "major": self.major,
+            "year": self.year,
+            "gpa": self.gpa,
+            "interests": list(self.interests or []),
+            "career_goals": list(self.career_goals or []),
+        }
+
+class Enrollment(Base):
+    """A student taking a course in a semester"""
+    __tablename__ = "enrollments"
+
+    id: Mapped[int] = mapped_column(BigId, primary_key=True, autoincrement=True)
+    student_id: Mapped[str] = mapped_column(ForeignKey("students.id", ondelete="CASCADE"))
+    course_id: Mapped[str] = mapped_column(String(32))
+    course_name: Mapped[str] = mapped_column(String(200))
+    credits: Mapped[int] = mapped_column(SmallInteger)
+    semester: Mapped[str] = mapped_column(String(32))
+
+    student: Mapped[Student] = relationship(back_populates="enrollments", lazy="raise")
+    grade: Mapped[Optional["Grade"]] = relationship(
+        back_populates="enrollment", cascade="all, delete-orphan", uselist=False, lazy="raise"
+    )
+
+    __table_args__ = (
+        # A student's courses, optionally by semester (the student://{id}/courses reads)
+        Index("ix_enrollments_student_semester", "student_id", "semester"),
+        # Who took a course (course planning and prerequisites)
+        Index("ix_enrollments_course", "course_id"),
+        UniqueConstraint("student_id", "course_id", "semester", name="uq_enrollments_student_course_semester"),
+    )
+
+    def to_course(self) -> Dict[str, Any]:
+        """One entry of the student://{id}/courses representation; the grade must be loaded"""
+        return {
+            "id": self.course_id,
+            "name": self.course_name,
+            "credits": self.credits,
+            "grade": self.grade.grade if self.grade else None,
+            "grade_points": self.grade.grade_points if self.grade else None,
+            "semester": self.semester,
+        }
+
+class Grade(Base):
+    """Final grade of an enrollment"""
+    __tablename__ = "grades"
+
+    # One grade per enrollment, so the key doubles as the join index
+    enrollment_id: Mapped[int] = mapped_column(
+        BigId, ForeignKey("enrollments.id", ondelete="CASCADE"), primary_key=True
+    )
+    grade: Mapped[str] = mapped_column(String(4))
+    grade_points: Mapped[float] = mapped_column(Float)
+
+    enrollment: Mapped[Enrollment] = relationship(back_populates="grade", lazy="raise")
@@ -0,0 +1,28 @@
+from typing import Any, Callable, Dict
+import logging
+
+logger = logging.getLogger(__name__)
+
+class MetricsRegistry:
+    """Registry of named callables that report component statistics."""
+
+    def __init__(self):
+        self.sources: Dict[str, Callable[[], Dict[str, Any]]] = {}
+
+    def register(self, name: str, source: Callable[[], Dict[str, Any]]) -> None:
+        """Register a callable that returns the current statistics of a component."""
+        self.sources[name] = source
+
+    def collect(self) -> Dict[str, Any]:
+        """Collect the statistics of every registered component."""
+        snapshot = {}
+        for name, source in self.sources.items():
+            try:
+                snapshot[name] = source()
+            except Exception as e:
+                logger.error(f"Error collecting metrics for {name}: {str(e)}")
+                snapshot[name] = {"error": str(e)}
+        return snapshot
+
+# Global registry instance
+metrics_registry = MetricsRegistry()
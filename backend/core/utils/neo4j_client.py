@@ -1,9 +1,11 @@
-from neo4j import GraphDatabase
 from typing import Dict, Any, List, Optional
 from core.config import settings
 
 class Neo4jClient:
     def __init__(self, uri: str, user: str, password: str):
+        # Imported here so the driver package is only loaded when Neo4j is used
+        from neo4j import GraphDatabase
+
         self.driver = GraphDatabase.driver(uri, auth=(user, password))
         
     def close(self):
@@ -21,9 +23,23 @@ class Neo4jClient:
             result = await session.run(query, parameters or {})
             return [record.data() async for record in result]
 
-# Singleton instance
-neo4j_client = Neo4jClient(
-    settings.NEO4J_URI,
-    settings.NEO4J_USER,
-    settings.NEO4J_PASSWORD
-)
+# Singleton instance, connected on first use
+_neo4j_client: Optional[Neo4jClient] = None
+
+def get_neo4j_client() -> Neo4jClient:
+    """Returns the Neo4j client, creating the driver on first use."""
+    global _neo4j_client
+    if _neo4j_client is None:
+        _neo4j_client = Neo4jClient(
+            settings.NEO4J_URI,
+            settings.NEO4J_USER,
+            settings.NEO4J_PASSWORD
+        )
+    return _neo4j_client
+
+def close_neo4j_client() -> None:
+    """Close the driver if it was created."""
+    global _neo4j_client
+    if _neo4j_client is not None:
+        _neo4j_client.close()
+        _neo4j_client = None
@@ -1,13 +1,58 @@
+import time
 import redis
+import redis.asyncio
+from redis.asyncio.retry import Retry
+from redis.backoff import NoBackoff
 from core.config import settings
 
-# Create Redis client
-redis_client = redis.Redis(
-    host=settings.REDIS_HOST,
-    port=settings.REDIS_PORT,
-    decode_responses=True
-)
+# Clients are created on first use
+redis_client = None
+async_redis_client = None
+
+# Monotonic time until which the async client is considered unavailable
+_async_unavailable_until = 0.0
 
 def get_redis_client():
     """Returns the Redis client instance."""
+    global redis_client
+    if redis_client is None:
+        redis_client = redis.Redis(
+            host=settings.REDIS_HOST,
+            port=settings.REDIS_PORT,
+            decode_responses=True
+        )
     return redis_client
+
+def get_async_redis_client():
+    """Returns the async Redis client instance."""
+    global async_redis_client
+    if async_redis_client is None:
+        # Callers treat Redis as an optimization, so it fails fast instead of
+        # retrying with backoff.
+        async_redis_client = redis.asyncio.Redis(
+            host=settings.REDIS_HOST,
+            port=settings.REDIS_PORT,
+            decode_responses=True,
+            socket_connect_timeout=settings.REDIS_SOCKET_TIMEOUT_SECONDS,
+            socket_timeout=settings.REDIS_SOCKET_TIMEOUT_SECONDS,
+            retry=Retry(NoBackoff(), 0),
+        )
+    return async_redis_client
+
+async def close_redis_clients() -> None:
+    """Close the clients that were created."""
+    global redis_client, async_redis_client
+    if async_redis_client is not None:
+        await async_redis_client.aclose()
+    if redis_client is not None:
+        redis_client.close()
+    redis_client = async_redis_client = None
+
+def async_redis_available() -> bool:
+    """False for a short cooldown after the async client failed to reach Redis."""
+    return time.monotonic() >= _async_unavailable_until
+
+def mark_async_redis_failure() -> None:
+    """Skip Redis for `REDIS_FAILURE_COOLDOWN_SECONDS` after a connection failure."""
+    global _async_unavailable_until
+    _async_unavailable_until = time.monotonic() + settings.REDIS_FAILURE_COOLDOWN_SECONDS
@@ -0,0 +1,145 @@
+from typing import Any, Awaitable, Callable, Dict, Optional
+import asyncio
+import json
+import time
+import uuid
+import logging
+
+from core.config import settings
+from core.utils.redis_client import get_async_redis_client, async_redis_available, mark_async_redis_failure
+
+logger = logging.getLogger(__name__)
+
+# Delete the lock only if this worker still owns it
+_RELEASE_LOCK_SCRIPT = """
+if redis.call("get", KEYS[1]) == ARGV[1] then
+    return redis.call("del", KEYS[1])
+end
+return 0
+"""
+
+class SingleFlight:
+    """
+    Coalesces concurrent executions of identical work.
+
+    Inside a worker, callers that ask for a key whose computation is already
+    running await that computation instead of starting their own. Across
+    workers, the first caller takes a Redis lock for the key and publishes its
+    result under a result key; callers on other workers wait for that result.
+    The result key outlives the computation by `result_ttl` seconds, so a
+    retry that arrives shortly after completion gets the same result.
+
+    Results shared through Redis must be JSON serializable. If Redis is
+    unavailable, or the owner of a lock fails without publishing a result,
+    the waiting caller runs the work itself.
+    """
+
+    def __init__(self, namespace: str, use_redis: bool = True,
+                 lock_ttl: int = 120, result_ttl: int = 30,
+                 wait_timeout: float = 120.0, poll_interval: float = 0.05):
+        self.namespace = namespace
+        self.use_redis = use_redis
+        self.lock_ttl = lock_ttl
+        self.result_ttl = result_ttl
+        self.wait_timeout = wait_timeout
+        self.poll_interval = poll_interval
+        self.inflight: Dict[str, asyncio.Task] = {}
+        self.counters = {"executions": 0, "local_joins": 0, "remote_joins": 0, "redis_errors": 0}
+
+    def _lock_key(self, key: str) -> str:
+        return f"{self.namespace}:lock:{key}"
+
+    def _result_key(self, key: str) -> str:
+        return f"{self.namespace}:result:{key}"
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[Any]],
+                 shared: Optional[bool] = None, result_ttl: Optional[int] = None) -> Any:
+        """
+        Run `fn` once for all concurrent callers of `key` and return its result.
+
+        Args:
+            key: Identity of the work, e.g. a hash of the prompt or tool arguments
+            fn: Coroutine function that performs the work
+            shared: Coalesce across workers through Redis; defaults to `use_redis`
+            result_ttl: Seconds the result stays available to late callers
+
+        Returns:
+            The result of the single execution
+        """
+        task = self.inflight.get(key)
+        if task is not None:
+            self.counters["local_joins"] += 1
+        else:
+            shared = self.use_redis if shared is None else shared
+            shared = shared and async_redis_available()
+            runner = self._run_shared(key, fn, result_ttl) if shared else self._execute(fn)
+            task = asyncio.create_task(runner)
+            self.inflight[key] = task
+            task.add_done_callback(lambda _: self.inflight.pop(key, None))
+
+        # A caller that goes away must not cancel the work other callers wait for
+        return await asyncio.shield(task)
+
+    async def _execute(self, fn: Callable[[], Awaitable[Any]]) -> Any:
+        self.counters["executions"] += 1
+        return await fn()
+
+    async def _run_shared(self, key: str, fn: Callable[[], Awaitable[Any]], result_ttl: Optional[int]) -> Any:
+        """Run the work under a Redis lock, or wait for the worker that holds it"""
+        token = uuid.uuid4().hex
+        lock_key = self._lock_key(key)
+        result_key = self._result_key(key)
+        deadline = time.monotonic() + self.wait_timeout
+
+        try:
+            redis = get_async_redis_client()
+            while True:
+                stored = await redis.get(result_key)
+                if stored is not None:
+                    self.counters["remote_joins"] += 1
+                    return json.loads(stored)["value"]
+
+                if await redis.set(lock_key, token, nx=True, ex=self.lock_ttl):
+                    break
+
+                if time.monotonic() > deadline:
+                    logger.warning(f"Timed out waiting for {lock_key}, running the work locally")
+                    return await self._execute(fn)
+                await asyncio.sleep(self.poll_interval)
+        except Exception as e:
+            self.counters["redis_errors"] += 1
+            mark_async_redis_failure()
+            logger.warning(f"Single-flight coordination through Redis failed: {str(e)}")
+            return await self._execute(fn)
+
+        try:
+            value = await self._execute(fn)
+            try:
+                await redis.set(result_key, json.dumps({"value": value}), ex=result_ttl or self.result_ttl)
+            except (TypeError, ValueError) as e:
+                logger.debug(f"Result for {result_key} is not shareable: {str(e)}")
+            except Exception as e:
+                self.counters["redis_errors"] += 1
+                logger.warning(f"Could not publish {result_key}: {str(e)}")
+            return value
+        finally:
+            try:
+                await redis.eval(_RELEASE_LOCK_SCRIPT, 1, lock_key, token)
+            except Exception as e:
+                self.counters["redis_errors"] += 1
+                logger.warning(f"Could not release {lock_key}: {str(e)}")
+
+    def stats(self) -> Dict[str, Any]:
+        """Execution and join counts, plus the number of keys in flight"""
+        return {**self.counters, "inflight": len(self.inflight)}
+
+def create_single_flight(namespace: str, **overrides: Any) -> SingleFlight:
+    """Create a SingleFlight configured from the SINGLEFLIGHT_* settings"""
+    options = {
+        "use_redis": settings.SINGLEFLIGHT_USE_REDIS,
+        "lock_ttl": settings.SINGLEFLIGHT_LOCK_TTL_SECONDS,
+        "result_ttl": settings.SINGLEFLIGHT_RESULT_TTL_SECONDS,
+        "wait_timeout": settings.SINGLEFLIGHT_WAIT_TIMEOUT_SECONDS,
+    }
+    options.update(overrides)
+    return SingleFlight(namespace, **options)
@@ -0,0 +1,85 @@
+"""
+Benchmark intent routing on long messages.
+
+Compares the keyword scans that `determine_pattern` and
+`AgentCoordinator.classify_intent` used to run (one `any(keyword in
+message_lower ...)` pass per intent, first match wins) with the compiled
+single-pass `IntentRouter`.
+
+Usage (from the backend directory):
+    python -m scripts.benchmark_intent_router --iterations 2000
+"""
+import argparse
+import statistics
+import time
+
+from services.intent import intent_router
+
+LEGACY_PATTERN_KEYWORDS = [
+    ("academic_progress", ["grade", "gpa", "performance", "academic", "study plan"]),
+    ("career_guidance", ["career", "job", "profession", "future", "industry"]),
+    ("planning", ["schedule", "plan", "semester", "degree"]),
+]
+
+LEGACY_AGENT_KEYWORDS = [
+    ("AcademicAdvisor", ["grade", "course", "class", "study", "academic"]),
+    ("CareerCounselor", ["career", "job", "profession", "employment"]),
+    ("EmotionalSupport", ["sad", "happy", "anxious", "stressed", "emotion", "feel"]),
+    ("ProjectMentor", ["project", "assignment", "thesis", "research"]),
+]
+
+def legacy_route(message: str):
+    """Both of the old keyword scans, as a chat turn through each path ran them"""
+    message_lower = message.lower()
+    pattern = next((name for name, keywords in LEGACY_PATTERN_KEYWORDS
+                    if any(keyword in message_lower for keyword in keywords)), "general")
+    agent = next((name for name, keywords in LEGACY_AGENT_KEYWORDS
+                  if any(keyword in message_lower for keyword in keywords)), "AcademicAdvisor")
+    return pattern, agent
+
+def compiled_route(message: str):
+    match = intent_router.route(message)
+    return match.pattern, match.agent
+
+FILLER = (
+    "I have been thinking a lot about how things are going this term and wanted to "
+    "write down everything in one place before our meeting so nothing gets lost. "
+)
+
+def make_message(length: int, tail: str) -> str:
+    """A long message whose routing keywords only appear at the end"""
+    body = FILLER * (length // len(FILLER) + 1)
+    return body[:length] + " " + tail
+
+def measure(route, message: str, iterations: int):
+    samples = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        route(message)
+        samples.append((time.perf_counter() - started) * 1_000_000)
+    samples.sort()
+    return statistics.fmean(samples), samples[int(len(samples) * 0.95) - 1]
+
+def main(iterations: int):
+    tails = {
+        "career": "What jobs could I get in the games industry?",
+        "planning": "Can you help me schedule next semester?",
+        "none": "Thanks for listening.",
+    }
+
+    print(f"{'length':>8} {'tail':<10}{'legacy mean/p95 (us)':>24}{'compiled mean/p95 (us)':>26}  routes")
+    for length in (200, 2_000, 20_000):
+        for name, tail in tails.items():
+            message = make_message(length, tail)
+            legacy = measure(legacy_route, message, iterations)
+            compiled = measure(compiled_route, message, iterations)
+            print(
+                f"{length:>8} {name:<10}{legacy[0]:>14.1f} / {legacy[1]:<7.1f}{compiled[0]:>16.1f} / {compiled[1]:<7.1f}"
+                f"  {legacy_route(message)} -> {compiled_route(message)}"
+            )
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=2000)
+    args = parser.parse_args()
+    main(args.iterations)
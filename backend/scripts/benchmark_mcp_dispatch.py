@@ -0,0 +1,81 @@
+"""
+Benchmark MCP tool and resource dispatch paths.
+
+Compares the per-request `Client(mcp_server)` session the chat routes used to
+open, one long-lived client session, and direct in-process dispatch. Each
+iteration reads a student's profile and courses and calls `calculate_gpa`,
+the non-LLM part of a chat turn. The results of every path are checked
+against each other before timing.
+
+Usage (from the backend directory):
+    python -m scripts.benchmark_mcp_dispatch --iterations 500
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+from fastmcp import Client
+
+from services.mcp.dispatch import MCPDispatcher, unwrap_mcp_contents
+from services.mcp.server import mcp_server, sub_servers, setup_mcp_server
+
+async def turn_per_request_client(student_id: str):
+    async with Client(mcp_server) as client:
+        profile = unwrap_mcp_contents(await client.read_resource(f"sd+student://{student_id}/profile"))
+        courses = unwrap_mcp_contents(await client.read_resource(f"sd+student://{student_id}/courses"))
+        gpa = unwrap_mcp_contents(await client.call_tool("at_calculate_gpa", {"courses": courses}))
+    return profile, courses, gpa
+
+def make_dispatcher_turn(dispatcher: MCPDispatcher):
+    async def turn(student_id: str):
+        profile = await dispatcher.read_resource(f"student://{student_id}/profile")
+        courses = await dispatcher.read_resource(f"student://{student_id}/courses")
+        gpa = await dispatcher.call_tool("calculate_gpa", {"courses": courses})
+        return profile, courses, gpa
+    return turn
+
+async def measure(turn, iterations: int):
+    samples = []
+    for i in range(iterations):
+        started = time.perf_counter()
+        await turn(str(i % 2 + 1))
+        samples.append((time.perf_counter() - started) * 1_000_000)
+    samples.sort()
+    return {
+        "mean_us": statistics.fmean(samples),
+        "p50_us": samples[len(samples) // 2],
+        "p95_us": samples[int(len(samples) * 0.95) - 1],
+    }
+
+async def main(iterations: int):
+    await setup_mcp_server()
+    client_dispatcher = MCPDispatcher(mcp_server, sub_servers, mode="client")
+    direct_dispatcher = MCPDispatcher(mcp_server, sub_servers, mode="direct")
+
+    paths = {
+        "per-request client": turn_per_request_client,
+        "long-lived client": make_dispatcher_turn(client_dispatcher),
+        "direct dispatch": make_dispatcher_turn(direct_dispatcher),
+    }
+
+    # Every path has to produce the same data before its timings mean anything
+    for student_id in ("1", "2", "unknown"):
+        results = {name: await turn(student_id) for name, turn in paths.items()}
+        reference = results["per-request client"]
+        for name, result in results.items():
+            assert result == reference, f"{name} diverges from the MCP client for student {student_id}"
+
+    print(f"{'path':<20}{'mean (us)':>12}{'p50 (us)':>12}{'p95 (us)':>12}")
+    for name, turn in paths.items():
+        await measure(turn, min(iterations, 20))  # warm up
+        stats = await measure(turn, iterations)
+        print(f"{name:<20}{stats['mean_us']:>12.0f}{stats['p50_us']:>12.0f}{stats['p95_us']:>12.0f}")
+
+    await client_dispatcher.aclose()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=500)
+    args = parser.parse_args()
+    asyncio.run(main(args.iterations))
@@ -0,0 +1,96 @@
+"""
+Check API cold start against a time budget.
+
+Each run starts a fresh interpreter that imports `services.api.main`, runs
+the application lifespan and serves its first request in-process, timing
+each step. The median over all runs is compared with the budgets, and the
+script exits with status 1 when one is exceeded, so it can gate CI or a
+deploy.
+
+Usage (from the backend directory, with the application environment set):
+    python -m scripts.check_startup_budget --runs 5 --import-budget-ms 1500 --first-request-budget-ms 2000
+
+`tests/test_startup.py` runs the same check with the default budgets.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+# Default budgets in ms. Most of the import is FastAPI and FastMCP themselves
+# (about 1.2s here); the database, Neo4j and Gemini client packages must not
+# be part of it.
+IMPORT_BUDGET_MS = 1500.0
+FIRST_REQUEST_BUDGET_MS = 2000.0
+
+# Runs in the child interpreter; prints one JSON line with the timings in ms
+MEASURE = """
+import json, time
+started = time.perf_counter()
+import services.api.main as main
+imported = time.perf_counter()
+from fastapi.testclient import TestClient
+with TestClient(main.app) as client:
+    ready = time.perf_counter()
+    response = client.get(PATH)
+    answered = time.perf_counter()
+print(json.dumps({
+    "import_ms": (imported - started) * 1000,
+    "lifespan_ms": (ready - imported) * 1000,
+    "first_request_ms": (answered - started) * 1000,
+    "status": response.status_code,
+}))
+"""
+
+def measure_once(path: str) -> dict:
+    env = {**os.environ, "PYTHONPATH": os.pathsep.join(filter(None, [os.getcwd(), os.environ.get("PYTHONPATH")]))}
+    completed = subprocess.run(
+        [sys.executable, "-c", f"PATH = {path!r}\n{MEASURE}"],
+        capture_output=True, text=True, env=env,
+    )
+    if completed.returncode != 0:
+        raise RuntimeError(f"Startup measurement failed:\n{completed.stderr}")
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+def measure(runs: int, path: str = "/health") -> dict:
+    """
+    Median timings over `runs` fresh interpreters.
+
+    Returns:
+        Dict of `import_ms`, `lifespan_ms` and `first_request_ms`, plus the
+        worst `status` of the first request
+    """
+    samples = [measure_once(path) for _ in range(runs)]
+    results = {key: statistics.median(sample[key] for sample in samples)
+               for key in ("import_ms", "lifespan_ms", "first_request_ms")}
+    results["status"] = max(sample["status"] for sample in samples)
+    return results
+
+def main(runs: int, path: str, import_budget_ms: float, first_request_budget_ms: float) -> int:
+    results = measure(runs, path)
+    status = results.pop("status")
+    if status >= 400:
+        print(f"First request to {path} failed with status {status}")
+        return 1
+
+    budgets = {"import_ms": import_budget_ms, "first_request_ms": first_request_budget_ms}
+
+    failed = False
+    for key, value in results.items():
+        budget = budgets.get(key)
+        verdict = "" if budget is None else ("ok" if value <= budget else "OVER BUDGET")
+        limit = "" if budget is None else f" (budget {budget:.0f}ms)"
+        print(f"{key:<18}{value:>8.0f}ms{limit} {verdict}")
+        failed = failed or (budget is not None and value > budget)
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--path", default="/health", help="Path of the first request")
+    parser.add_argument("--import-budget-ms", type=float, default=IMPORT_BUDGET_MS)
+    parser.add_argument("--first-request-budget-ms", type=float, default=FIRST_REQUEST_BUDGET_MS)
+    args = parser.parse_args()
+    sys.exit(main(args.runs, args.path, args.import_budget_ms, args.first_request_budget_ms))
@@ -0,0 +1,80 @@
+"""
+Local stand-in for an OpenAI compatible LLM server (vLLM, Ollama `/v1`).
+
+Answers `POST /v1/chat/completions`, streamed or not, with a deterministic
+reply after a configurable delay, so the chat pipeline can be run and load
+tested without a real model. Point a provider at it with:
+
+    LLM_PROVIDERS='{"local": {"kind": "vllm", "model": "stub", "base_url": "http://localhost:8001/v1"}}'
+
+and select it with `LLM_PROVIDER=local` or per request with `"provider": "local"`.
+
+Usage (from the backend directory):
+    python -m scripts.local_llm_stub --port 8001 --latency-ms 200 --token-ms 10
+"""
+import argparse
+import asyncio
+import json
+import time
+from typing import Any, Dict
+
+import uvicorn
+from fastapi import FastAPI
+from fastapi.responses import StreamingResponse
+
+def create_app(latency_ms: float, token_ms: float) -> FastAPI:
+    app = FastAPI(title="Local LLM stub")
+
+    def reply_for(payload: Dict[str, Any]) -> str:
+        prompt = payload["messages"][-1]["content"] if payload.get("messages") else ""
+        words = " ".join(prompt.split()[:12])
+        return f"This is a local stand-in reply to: {words}"
+
+    def chunk(payload: Dict[str, Any], delta: Dict[str, Any], finish_reason=None) -> str:
+        body = {
+            "object": "chat.completion.chunk",
+            "created": int(time.time()),
+            "model": payload.get("model", "stub"),
+            "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+        }
+        return f"data: {json.dumps(body)}\n\n"
+
+    @app.post("/v1/chat/completions")
+    async def chat_completions(payload: Dict[str, Any]):
+        await asyncio.sleep(latency_ms / 1000)
+        reply = reply_for(payload)
+
+        if not payload.get("stream"):
+            await asyncio.sleep(token_ms * len(reply.split()) / 1000)
+            return {
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": payload.get("model", "stub"),
+                "choices": [{"index": 0, "message": {"role": "assistant", "content": reply},
+                             "finish_reason": "stop"}],
+            }
+
+        async def events():
+            yield chunk(payload, {"role": "assistant", "content": ""})
+            for index, word in enumerate(reply.split()):
+                await asyncio.sleep(token_ms / 1000)
+                yield chunk(payload, {"content": word if index == 0 else f" {word}"})
+            yield chunk(payload, {}, finish_reason="stop")
+            yield "data: [DONE]\n\n"
+
+        return StreamingResponse(events(), media_type="text/event-stream")
+
+    @app.get("/v1/models")
+    async def models():
+        return {"object": "list", "data": [{"id": "stub", "object": "model"}]}
+
+    return app
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8001)
+    parser.add_argument("--latency-ms", type=float, default=200.0, help="Delay before the first token")
+    parser.add_argument("--token-ms", type=float, default=10.0, help="Delay between streamed tokens")
+    args = parser.parse_args()
+    uvicorn.run(create_app(args.latency_ms, args.token_ms), host=args.host, port=args.port, log_level="warning")
@@ -0,0 +1,109 @@
+"""
+Write a course catalog to the courses table or to a JSON catalog file.
+
+The bundled catalog (or `--file`) is written as is, followed by `--synthetic`
+generated courses, so the catalog store can be tried at the size of a large
+university. Generated courses get departments, prerequisites within their
+department, offered semesters and topics, deterministically from `--seed`.
+
+Usage (from the backend directory):
+    python -m scripts.seed_courses --synthetic 10000 --replace
+    python -m scripts.seed_courses --synthetic 10000 --output /tmp/catalog.json
+
+The first form writes the configured database (set COURSE_CATALOG_SOURCE=database
+to serve from it); the second writes a file for COURSE_CATALOG_PATH.
+"""
+from typing import Any, Dict, List
+import argparse
+import asyncio
+import json
+import random
+
+from sqlalchemy import delete
+
+from core.models.course import Course
+from core.models.database import Base, dispose_engines, get_async_engine, get_async_session
+from services.courses.store import BUNDLED_CATALOG_PATH
+
+DEPARTMENTS = {
+    "Computer Science": ("CS", ["Algorithms", "Graphs", "Databases", "Operating systems", "Compilers",
+                                "Machine learning", "Computer networks", "Security", "Distributed systems",
+                                "Computer graphics", "Programming languages", "Software testing"]),
+    "Mathematics": ("MATH", ["Calculus", "Linear algebra", "Probability", "Number theory", "Topology",
+                             "Differential equations", "Combinatorics", "Graph theory", "Optimization"]),
+    "Biology": ("BIO", ["Genetics", "Ecology", "Microbiology", "Cell biology", "Evolution",
+                        "Neuroscience", "Bioinformatics", "Immunology"]),
+    "Chemistry": ("CHEM", ["Organic chemistry", "Thermodynamics", "Spectroscopy", "Kinetics",
+                           "Biochemistry", "Electrochemistry"]),
+    "Physics": ("PHYS", ["Mechanics", "Electromagnetism", "Quantum mechanics", "Optics",
+                         "Statistical mechanics", "Relativity"]),
+    "Economics": ("ECON", ["Microeconomics", "Macroeconomics", "Econometrics", "Game theory",
+                           "Public finance", "Labor economics"]),
+    "Psychology": ("PSY", ["Cognition", "Development", "Social psychology", "Research methods",
+                           "Perception", "Clinical psychology"]),
+    "History": ("HIST", ["Ancient history", "Modern Europe", "American history", "Historiography",
+                         "Colonialism", "History of science"]),
+}
+LEVEL_NAMES = {1: "Introduction to", 2: "Foundations of", 3: "Topics in", 4: "Advanced"}
+SEMESTER_CHOICES = [["Fall"], ["Spring"], ["Fall", "Spring"], ["Fall", "Spring", "Summer"]]
+
+def synthetic_courses(count: int, seed: int) -> List[Dict[str, Any]]:
+    rng = random.Random(seed)
+    courses: List[Dict[str, Any]] = []
+    by_department: Dict[str, List[str]] = {department: [] for department in DEPARTMENTS}
+    for number in range(count):
+        department = rng.choice(list(DEPARTMENTS))
+        code, subjects = DEPARTMENTS[department]
+        level = rng.randint(1, 4)
+        subject = rng.choice(subjects)
+        course_id = f"{code}{level}{number:04d}"
+        earlier = by_department[department]
+        prerequisites = rng.sample(earlier, k=min(len(earlier), rng.randint(0, 2))) if level > 1 else []
+        topics = rng.sample(subjects, k=min(len(subjects), 3))
+        courses.append({
+            "id": course_id,
+            "name": f"{LEVEL_NAMES[level]} {subject}",
+            "department": department,
+            "credits": rng.choice([3, 3, 4]),
+            "description": f"{LEVEL_NAMES[level]} {subject.lower()}, covering {', '.join(topic.lower() for topic in topics)}.",
+            "prerequisites": prerequisites,
+            "offered_semesters": rng.choice(SEMESTER_CHOICES),
+            "topics": topics,
+        })
+        earlier.append(course_id)
+    return courses
+
+async def write_database(courses: List[Dict[str, Any]], replace: bool, chunk_size: int = 2000) -> None:
+    engine = get_async_engine()
+    async with engine.begin() as connection:
+        await connection.run_sync(Base.metadata.create_all, tables=[Course.__table__])
+        if replace:
+            await connection.execute(delete(Course))
+    for start in range(0, len(courses), chunk_size):
+        async with get_async_session()() as session:
+            for course in courses[start:start + chunk_size]:
+                await session.merge(Course(**course))
+            await session.commit()
+    await dispose_engines()
+
+def main(source: str, synthetic: int, seed: int, output: str, replace: bool) -> None:
+    with open(source) as f:
+        data = json.load(f)
+    courses = (data["courses"] if isinstance(data, dict) else data) + synthetic_courses(synthetic, seed)
+    if output:
+        with open(output, "w") as f:
+            json.dump({"courses": courses}, f)
+        print(f"Wrote {len(courses)} courses to {output}")
+        return
+    asyncio.run(write_database(courses, replace))
+    print(f"Wrote {len(courses)} courses to the courses table")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Write a course catalog to the database or a JSON file")
+    parser.add_argument("--file", default=str(BUNDLED_CATALOG_PATH), help="Catalog file to start from")
+    parser.add_argument("--synthetic", type=int, default=0, help="Number of generated courses to add")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--output", help="Write a JSON catalog file instead of the database")
+    parser.add_argument("--replace", action="store_true", help="Delete the courses already in the table")
+    args = parser.parse_args()
+    main(args.file, args.synthetic, args.seed, args.output, args.replace)
@@ -0,0 +1,189 @@
+"""
+Create the student tables and fill them with demo and synthetic students.
+
+Students "1" and "2" are the demo students the frontend and the docs use.
+The remaining students are generated deterministically from `--seed`, each
+with a major, interests, career goals and a few semesters of graded
+courses, so the repository can be tried at production size (the default is
+200,000 students). Rows are inserted in chunks of `--chunk-size`.
+
+Works against the configured Postgres database or, for local testing, a
+SQLite stand-in (requires aiosqlite):
+    DATABASE_URL=sqlite+aiosqlite:///./students.db
+
+Usage (from the backend directory):
+    python -m scripts.seed_students --students 200000 --reset
+"""
+from typing import Any, Dict, List, Tuple
+import argparse
+import asyncio
+import random
+import time
+
+from sqlalchemy import func, insert, select
+
+from core.models.database import Base, dispose_engines, get_async_engine
+from core.models.student import Enrollment, Grade, Student
+
+DEMO_STUDENTS: List[Tuple[Dict[str, Any], List[Dict[str, Any]]]] = [
+    (
+        {
+            "id": "1",
+            "name": "Alex Johnson",
+            "major": "Computer Science",
+            "year": 3,
+            "gpa": 3.7,
+            "interests": ["Artificial Intelligence", "Web Development", "Game Design"],
+            "career_goals": ["Software Engineer", "AI Researcher"],
+        },
+        [
+            {"id": "CS101", "name": "Introduction to Programming", "credits": 3, "grade": "A", "grade_points": 4.0, "semester": "Fall 2024"},
+            {"id": "CS201", "name": "Data Structures", "credits": 4, "grade": "B+", "grade_points": 3.3, "semester": "Spring 2025"},
+            {"id": "MATH240", "name": "Linear Algebra", "credits": 3, "grade": "B", "grade_points": 3.0, "semester": "Fall 2024"},
+            {"id": "ENG101", "name": "College Writing", "credits": 3, "grade": "A-", "grade_points": 3.7, "semester": "Fall 2024"},
+        ],
+    ),
+    (
+        {
+            "id": "2",
+            "name": "Sam Rivera",
+            "major": "Biology",
+            "year": 2,
+            "gpa": 3.2,
+            "interests": ["Genetics", "Environmental Science", "Research"],
+            "career_goals": ["Medical Researcher", "Biotechnology"],
+        },
+        [
+            {"id": "BIO101", "name": "Introduction to Biology", "credits": 4, "grade": "A-", "grade_points": 3.7, "semester": "Fall 2024"},
+            {"id": "CHEM101", "name": "General Chemistry", "credits": 4, "grade": "B", "grade_points": 3.0, "semester": "Fall 2024"},
+            {"id": "MATH101", "name": "Calculus I", "credits": 4, "grade": "C+", "grade_points": 2.3, "semester": "Spring 2025"},
+        ],
+    ),
+]
+
+# Major -> (courses, interests, career goals) the synthetic students are drawn from
+MAJORS: Dict[str, Tuple[List[Tuple[str, str, int]], List[str], List[str]]] = {
+    "Computer Science": (
+        [("CS101", "Introduction to Programming", 3), ("CS201", "Data Structures", 4),
+         ("CS301", "Algorithms", 4), ("CS350", "Operating Systems", 4), ("MATH240", "Linear Algebra", 3)],
+        ["Artificial Intelligence", "Web Development", "Game Design", "Security", "Databases"],
+        ["Software Engineer", "AI Researcher", "Data Engineer", "Security Analyst"],
+    ),
+    "Biology": (
+        [("BIO101", "Introduction to Biology", 4), ("BIO201", "Genetics", 4),
+         ("CHEM101", "General Chemistry", 4), ("BIO310", "Ecology", 3), ("MATH101", "Calculus I", 4)],
+        ["Genetics", "Environmental Science", "Research", "Microbiology"],
+        ["Medical Researcher", "Biotechnology", "Physician", "Ecologist"],
+    ),
+    "Mathematics": (
+        [("MATH101", "Calculus I", 4), ("MATH201", "Calculus II", 4), ("MATH240", "Linear Algebra", 3),
+         ("MATH310", "Real Analysis", 3), ("STAT200", "Probability and Statistics", 3)],
+        ["Number Theory", "Statistics", "Cryptography", "Modeling"],
+        ["Actuary", "Data Scientist", "Professor", "Quantitative Analyst"],
+    ),
+    "Psychology": (
+        [("PSY101", "Introduction to Psychology", 3), ("PSY210", "Research Methods", 3),
+         ("PSY250", "Cognitive Psychology", 3), ("STAT200", "Probability and Statistics", 3), ("ENG101", "College Writing", 3)],
+        ["Cognition", "Counseling", "Neuroscience", "Behavioral Economics"],
+        ["Clinical Psychologist", "UX Researcher", "Counselor"],
+    ),
+    "Business": (
+        [("BUS101", "Introduction to Business", 3), ("ECON101", "Microeconomics", 3),
+         ("ACC201", "Financial Accounting", 3), ("MKT220", "Marketing Principles", 3), ("STAT200", "Probability and Statistics", 3)],
+        ["Entrepreneurship", "Finance", "Marketing", "Operations"],
+        ["Product Manager", "Financial Analyst", "Consultant", "Founder"],
+    ),
+}
+GRADES = [("A", 4.0), ("A-", 3.7), ("B+", 3.3), ("B", 3.0), ("B-", 2.7), ("C+", 2.3), ("C", 2.0)]
+SEMESTERS = ["Fall 2023", "Spring 2024", "Fall 2024", "Spring 2025"]
+FIRST_NAMES = ["Alex", "Sam", "Jordan", "Taylor", "Morgan", "Casey", "Riley", "Jamie", "Avery", "Quinn",
+               "Priya", "Wei", "Amara", "Diego", "Noor", "Mateo", "Yuki", "Kofi", "Lena", "Omar"]
+LAST_NAMES = ["Johnson", "Rivera", "Chen", "Patel", "Okafor", "Garcia", "Kim", "Nguyen", "Smith", "Haddad",
+              "Novak", "Silva", "Mensah", "Rossi", "Ivanova", "Tanaka", "Brown", "Lopez", "Ali", "Muller"]
+
+def synthetic_student(rng: random.Random, student_id: str) -> Tuple[Dict[str, Any], List[Dict[str, Any]]]:
+    major = rng.choice(list(MAJORS))
+    courses, interests, goals = MAJORS[major]
+    year = rng.randint(1, 4)
+    semesters = SEMESTERS[-min(year, len(SEMESTERS)):]
+    taken = []
+    for (course_id, name, credits), semester in zip(rng.sample(courses, k=rng.randint(2, len(courses))),
+                                                    rng.choices(semesters, k=len(courses))):
+        grade, points = rng.choice(GRADES)
+        taken.append({"id": course_id, "name": name, "credits": credits,
+                      "grade": grade, "grade_points": points, "semester": semester})
+    credits = sum(course["credits"] for course in taken)
+    profile = {
+        "id": student_id,
+        "name": f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}",
+        "major": major,
+        "year": year,
+        "gpa": round(sum(course["grade_points"] * course["credits"] for course in taken) / credits, 2),
+        "interests": rng.sample(interests, k=2),
+        "career_goals": rng.sample(goals, k=rng.randint(1, 2)),
+    }
+    return profile, taken
+
+def generate(count: int, seed: int):
+    """Yield (profile, courses) for the demo students, then `count` synthetic ones"""
+    yield from DEMO_STUDENTS[:count]
+    rng = random.Random(seed)
+    for number in range(len(DEMO_STUDENTS) + 1, count + 1):
+        yield synthetic_student(rng, str(number))
+
+async def insert_chunk(connection, students: List[Tuple[Dict[str, Any], List[Dict[str, Any]]]], next_id: int) -> int:
+    """Insert students with their enrollments and grades; returns the next free enrollment id"""
+    enrollments, grades = [], []
+    for profile, courses in students:
+        for course in courses:
+            enrollments.append({"id": next_id, "student_id": profile["id"], "course_id": course["id"],
+                                "course_name": course["name"], "credits": course["credits"],
+                                "semester": course["semester"]})
+            grades.append({"enrollment_id": next_id, "grade": course["grade"], "grade_points": course["grade_points"]})
+            next_id += 1
+    await connection.execute(insert(Student), [profile for profile, _ in students])
+    if enrollments:
+        await connection.execute(insert(Enrollment), enrollments)
+        await connection.execute(insert(Grade), grades)
+    return next_id
+
+async def main(count: int, seed: int, chunk_size: int, reset: bool) -> None:
+    engine = get_async_engine()
+    started = time.perf_counter()
+    async with engine.begin() as connection:
+        if reset:
+            await connection.run_sync(Base.metadata.drop_all)
+        await connection.run_sync(Base.metadata.create_all)
+        existing = await connection.scalar(select(func.count()).select_from(Student))
+        next_id = (await connection.scalar(select(func.max(Enrollment.id))) or 0) + 1
+    if existing:
+        print(f"{existing} students already present; run with --reset to replace them")
+        await dispose_engines()
+        return
+
+    inserted = 0
+    chunk: List[Tuple[Dict[str, Any], List[Dict[str, Any]]]] = []
+    for student in generate(count, seed):
+        chunk.append(student)
+        if len(chunk) == chunk_size:
+            async with engine.begin() as connection:
+                next_id = await insert_chunk(connection, chunk, next_id)
+            inserted += len(chunk)
+            chunk = []
+            print(f"Inserted {inserted}/{count} students")
+    if chunk:
+        async with engine.begin() as connection:
+            next_id = await insert_chunk(connection, chunk, next_id)
+        inserted += len(chunk)
+
+    print(f"Seeded {inserted} students and {next_id - 1} enrollments in {time.perf_counter() - started:.1f}s")
+    await dispose_engines()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Create and seed the student tables")
+    parser.add_argument("--students", type=int, default=200_000)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--chunk-size", type=int, default=5000)
+    parser.add_argument("--reset", action="store_true", help="Drop and recreate the student tables first")
+    args = parser.parse_args()
+    asyncio.run(main(args.students, args.seed, args.chunk_size, args.reset))
@@ -1,6 +1,9 @@
 from typing import Dict, Any
 from services.agent.base import BaseAgent, AgentResponse, agent_registry
 from backend.services.mcp.server import BasePattern, MCPResult
+from services.mcp.dispatch import mcp_dispatcher
+from services.mcp.rendering import render_tool_result
+from services.students import student_context_fields
 import logging
 
 logger = logging.getLogger(__name__)
@@ -20,6 +23,10 @@ class AcademicAdvisorAgent(BaseAgent):
                              **kwargs) -> AgentResponse:
         """Process a message and generate an academic advisor response."""
         try:
+            # Load the student's data when only their id was passed
+            if context.get("student_id") and "student_profile" not in context:
+                context.update(await self._load_student_context(context["student_id"]))
+            
             # Get the selected pattern from context if available
             pattern: BasePattern = context.get("selected_pattern")
             
@@ -54,51 +61,32 @@ class AcademicAdvisorAgent(BaseAgent):
                 metadata={"error": str(e)}
             )
     
+    async def _load_student_context(self, student_id: str) -> Dict[str, Any]:
+        """Read the student's profile, courses and GPA totals with one resource read."""
+        try:
+            student = await mcp_dispatcher.read_resource(f"student://{student_id}/context")
+        except Exception as e:
+            logger.warning(f"Could not load context for student {student_id}: {str(e)}")
+            return {}
+        return {key: value for key, value in student_context_fields(student or {}).items() if value}
+    
     async def _generate_response_from_mcp(self, 
                                          message: str, 
                                          mcp_result: MCPResult, 
                                          context: Dict[str, Any]) -> str:
         """Generate a response based on MCP reasoning results."""
-        # In a real implementation, this would use an LLM to generate a natural response
-        # For now, we'll implement a simple template-based approach
-        
+        # Known result shapes are formatted with the shared templates
         result = mcp_result.result or {}
-        
-        if "action_plan" in result:
-            # Create a response focusing on the action plan
-            action_plan = result["action_plan"]
-            strengths = result.get("strengths", [])
-            weaknesses = result.get("weaknesses", [])
-            
-            response = f"Based on my analysis of your academic performance, "
-            
-            if strengths:
-                response += f"I can see you're doing well in {', '.join([s.get('subject', 'some subjects') for s in strengths[:2]])}. "
-            
-            if weaknesses:
-                response += f"You might want to focus more on {', '.join([w.get('subject', 'certain subjects') for w in weaknesses[:2]])}. "
-            
-            response += "\n\nHere's an action plan to help you improve:\n"
-            
-            weekly_actions = action_plan.get("weekly_actions", [])
-            if weekly_actions:
-                for action in weekly_actions:
-                    response += f"- {action.get('day')}: Focus on {action.get('focus')} with activities like {', '.join(action.get('activities', []))}\n"
-            
-            resources = action_plan.get("resources", [])
-            if resources:
-                response += "\nRecommended resources:\n"
-                for resource in resources:
-                    response += f"- {resource.get('name')}: {resource.get('url')}\n"
-            
+        response = render_tool_result("analyze_academic_performance", result)
+        if response:
             return response
-        else:
-            # Generic response if no specific action plan is available
-            return (
-                "I've analyzed your academic situation and have some insights to share. "
-                "To provide more specific guidance, could you tell me more about your "
-                "current courses, grades, and what specific academic goals you have?"
-            )
+
+        # Generic response if no specific action plan is available
+        return (
+            "I've analyzed your academic situation and have some insights to share. "
+            "To provide more specific guidance, could you tell me more about your "
+            "current courses, grades, and what specific academic goals you have?"
+        )
     
     async def _generate_fallback_response(self, 
                                          message: str, 
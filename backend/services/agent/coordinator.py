@@ -1,6 +1,7 @@
 from typing import Dict, Any, List
 from services.agent.base import BaseAgent, AgentResponse, agent_registry
 from backend.services.mcp.server import mcp_registry, BasePattern
+from services.intent import intent_router
 import logging
 
 logger = logging.getLogger(__name__)
@@ -13,20 +14,8 @@ class AgentCoordinator:
     
     async def classify_intent(self, message: str, context: Dict[str, Any]) -> str:
         """Classify the intent of a message to determine appropriate agent."""
-        # This would be implemented with an intent classification model
-        # For now, use a simple keyword-based approach
-        message_lower = message.lower()
-        
-        if any(keyword in message_lower for keyword in ["grade", "course", "class", "study", "academic"]):
-            return "AcademicAdvisor"
-        elif any(keyword in message_lower for keyword in ["career", "job", "profession", "employment"]):
-            return "CareerCounselor"
-        elif any(keyword in message_lower for keyword in ["sad", "happy", "anxious", "stressed", "emotion", "feel"]):
-            return "EmotionalSupport"
-        elif any(keyword in message_lower for keyword in ["project", "assignment", "thesis", "research"]):
-            return "ProjectMentor"
-        else:
-            return "AcademicAdvisor"  # Default to academic advisor
+        # Shares the routing table with the chat API's pattern selection
+        return intent_router.agent_for(message)
     
     async def select_agent(self, message: str, context: Dict[str, Any]) -> BaseAgent:
         """Select the appropriate agent based on message intent and context."""
@@ -0,0 +1,154 @@
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple
+import asyncio
+import time
+import logging
+from services.mcp.dispatch import MCPDispatcher
+from services.mcp.rendering import render_tool_result
+from services.api.context import load_student_context
+from services.students import StudentRepository, student_repository_scope
+from services.llm import LLMQueueFull
+from services.llm.scheduler import PRIORITY_BATCH, request_context
+from core.utils.metrics import metrics_registry
+
+logger = logging.getLogger(__name__)
+
+PatternRunner = Callable[[MCPDispatcher, str, Dict[str, Any]], Awaitable[Tuple[Optional[str], Any]]]
+
+class BatchStats:
+    """Totals over every batch run by this worker"""
+
+    def __init__(self):
+        self.counters = {"runs": 0, "students": 0, "succeeded": 0, "failed": 0}
+        self.last_run: Optional[Dict[str, Any]] = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {**self.counters, "last_run": self.last_run}
+
+batch_stats = BatchStats()
+metrics_registry.register("chat_batch", batch_stats.stats)
+
+class BatchRun:
+    """
+    Runs one pattern for many students, streaming each result as it finishes.
+
+    A fixed pool of workers takes students off a shared queue, so at most
+    `concurrency` students are being processed at once however large the
+    batch is. Every worker uses the same MCP dispatcher and student
+    repository; the repository loads the profiles and courses of the whole
+    batch up front, a few hundred students per query. LLM calls run in the "batch"
+    priority class and are accounted to the student they are made for, so
+    interactive chat keeps precedence. A call rejected by a full LLM queue
+    is retried after the suggested delay. A student that fails is reported
+    and the batch carries on.
+    """
+
+    def __init__(self, mcp: MCPDispatcher, student_ids: List[str], pattern: str,
+                 run_pattern: PatternRunner, concurrency: int = 8, max_retries: int = 2):
+        self.mcp = mcp
+        # Keep the first occurrence of each student
+        self.student_ids = list(dict.fromkeys(student_ids))
+        self.pattern = pattern
+        self.run_pattern = run_pattern
+        self.concurrency = max(1, min(concurrency, len(self.student_ids) or 1))
+        self.max_retries = max_retries
+        self.succeeded = 0
+        self.failed = 0
+
+    async def run_student(self, student_id: str) -> Dict[str, Any]:
+        """Load one student's data and run the pattern on it"""
+        started = time.perf_counter()
+        with request_context(student_id=student_id, priority=PRIORITY_BATCH):
+            context, failed = await load_student_context(self.mcp, student_id)
+            if "student" in failed:
+                raise RuntimeError(f"Could not load the data of student {student_id}")
+            for attempt in range(self.max_retries + 1):
+                try:
+                    tool_name, result = await self.run_pattern(self.mcp, self.pattern, context)
+                    break
+                except LLMQueueFull as e:
+                    if attempt == self.max_retries:
+                        raise
+                    await asyncio.sleep(e.retry_after)
+
+        if tool_name is None:
+            raise ValueError(f"No data to run {self.pattern} for student {student_id}")
+
+        return {
+            "type": "result",
+            "student_id": student_id,
+            "tool": tool_name,
+            "result": result,
+            "summary": render_tool_result(tool_name, result) if isinstance(result, (dict, list)) else result,
+            "elapsed_ms": round((time.perf_counter() - started) * 1000, 1),
+        }
+
+    async def events(self) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Yield one `result` or `error` event per student in completion order,
+        then a `summary` event with totals and throughput.
+        """
+        started = time.perf_counter()
+        pending = asyncio.Queue()
+        for student_id in self.student_ids:
+            pending.put_nowait(student_id)
+        finished: asyncio.Queue = asyncio.Queue()
+        # Shared by the workers, which then find every student already loaded
+        repository = StudentRepository()
+        try:
+            await repository.preload(self.student_ids)
+        except Exception as e:
+            # The workers load their students one by one instead
+            logger.warning(f"Preloading {len(self.student_ids)} students failed: {str(e)}")
+
+        async def worker() -> None:
+            with student_repository_scope(repository):
+                while not pending.empty():
+                    student_id = pending.get_nowait()
+                    try:
+                        event = await self.run_student(student_id)
+                    except Exception as e:
+                        logger.warning(f"Batch {self.pattern} failed for student {student_id}: {str(e)}")
+                        event = {"type": "error", "student_id": student_id, "detail": str(e)}
+                    finished.put_nowait(event)
+
+        batch_stats.counters["runs"] += 1
+        logger.info(f"Batch {self.pattern} started for {len(self.student_ids)} students "
+                    f"with {self.concurrency} workers")
+        workers = [asyncio.create_task(worker()) for _ in range(self.concurrency)]
+        try:
+            for _ in range(len(self.student_ids)):
+                event = await finished.get()
+                if event["type"] == "result":
+                    self.succeeded += 1
+                else:
+                    self.failed += 1
+                yield event
+        finally:
+            # Stops the remaining work when the client goes away
+            for task in workers:
+                task.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+            batch_stats.counters["students"] += self.succeeded + self.failed
+            batch_stats.counters["succeeded"] += self.succeeded
+            batch_stats.counters["failed"] += self.failed
+
+        yield self.summary(time.perf_counter() - started)
+
+    def summary(self, elapsed: float) -> Dict[str, Any]:
+        processed = self.succeeded + self.failed
+        summary = {
+            "type": "summary",
+            "pattern": self.pattern,
+            "total": len(self.student_ids),
+            "succeeded": self.succeeded,
+            "failed": self.failed,
+            "concurrency": self.concurrency,
+            "elapsed_ms": round(elapsed * 1000, 1),
+            "students_per_minute": round(processed / elapsed * 60, 1) if elapsed > 0 else None,
+        }
+        batch_stats.last_run = summary
+        logger.info(
+            f"Batch {self.pattern} finished: {self.succeeded}/{len(self.student_ids)} succeeded "
+            f"in {summary['elapsed_ms']}ms ({summary['students_per_minute']} students/min)"
+        )
+        return summary
@@ -0,0 +1,208 @@
+from typing import Dict, Any, Optional, Awaitable, Callable, List, Tuple
+import asyncio
+import time
+import logging
+from services.mcp.dispatch import MCPDispatcher
+from services.courses import search_uri, tokenize
+from services.students.summary import data_version, student_context_fields
+from services.students.repository import student_repository_scope
+from core.config import settings
+
+logger = logging.getLogger(__name__)
+
+async def read_resource_value(mcp: MCPDispatcher, uri: str) -> Any:
+    """Read an MCP resource as plain Python data"""
+    return await mcp.read_resource(uri)
+
+async def run_lookups(lookups: Dict[str, Tuple[Awaitable[Any], float]]) -> Tuple[Dict[str, Any], List[str]]:
+    """
+    Run independent lookups concurrently, each under its own timeout.
+
+    A lookup that fails or times out is logged and left out of the results, so
+    it only degrades its own part of the context.
+
+    Args:
+        lookups: Mapping of lookup name to (awaitable, timeout in seconds)
+
+    Returns:
+        Tuple of (results by name for the lookups that succeeded, names of the
+        lookups that failed)
+    """
+    async def run(name: str, awaitable: Awaitable[Any], timeout: float) -> Any:
+        started = time.perf_counter()
+        try:
+            return await asyncio.wait_for(awaitable, timeout=timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"Context lookup '{name}' timed out after {timeout}s")
+            raise
+        except Exception as e:
+            logger.error(f"Context lookup '{name}' failed: {str(e)}")
+            raise
+        finally:
+            logger.debug(f"Context lookup '{name}' took {(time.perf_counter() - started) * 1000:.1f}ms")
+
+    names = list(lookups)
+    outcomes = await asyncio.gather(
+        *(run(name, *lookups[name]) for name in names),
+        return_exceptions=True
+    )
+
+    results: Dict[str, Any] = {}
+    failed: List[str] = []
+    for name, outcome in zip(names, outcomes):
+        if isinstance(outcome, BaseException):
+            failed.append(name)
+        else:
+            results[name] = outcome
+    return results, failed
+
+def student_lookups(mcp: MCPDispatcher, student_id: str) -> Dict[str, Tuple[Awaitable[Any], float]]:
+    """Resource reads that make up a student's context, keyed by lookup name"""
+    timeout = settings.CONTEXT_RESOURCE_TIMEOUT_SECONDS
+    # Profile, courses and GPA totals come from one combined resource read
+    return {"student": (read_resource_value(mcp, f"student://{student_id}/context"), timeout)}
+
+def student_context_from(results: Dict[str, Any]) -> Dict[str, Any]:
+    """Context fields from the results of `student_lookups`, leaving out empty ones"""
+    fields = student_context_fields(results["student"]) if results.get("student") else {}
+    return {key: value for key, value in fields.items() if value}
+
+async def load_student_context(mcp: MCPDispatcher, student_id: str) -> Tuple[Dict[str, Any], List[str]]:
+    """
+    Read the student's combined context resource into a context dict.
+
+    Returns:
+        Tuple of (context, names of the lookups that failed or timed out)
+    """
+    with student_repository_scope():
+        results, failed = await run_lookups(student_lookups(mcp, student_id))
+    return student_context_from(results), failed
+
+async def assemble_context(mcp: MCPDispatcher,
+                           message: str,
+                           detect_intent: Callable[[str], Awaitable[str]],
+                           student_id: Optional[str] = None,
+                           context: Optional[Dict[str, Any]] = None) -> Tuple[Dict[str, Any], str, List[str]]:
+    """
+    Build the context for one chat turn, running every independent lookup at once.
+
+    The student context read, the course search for the message and intent
+    detection start together, each with its own timeout. A failed read leaves
+    its data out of the context and a failed intent detection falls back to
+    the "general" pattern. Courses matching the message are added to the
+    context as `relevant_courses`, so prompts carry those rather than the
+    catalog.
+
+    Args:
+        mcp: MCP dispatcher used for the resource reads
+        message: The user's message
+        detect_intent: Coroutine function mapping a message to a pattern name
+        student_id: Optional student whose data should be read
+        context: Already loaded student context; skips the resource reads when given
+
+    Returns:
+        Tuple of (context, pattern name, names of the lookups that failed)
+    """
+    lookups = {"intent": (detect_intent(message), settings.CONTEXT_INTENT_TIMEOUT_SECONDS)}
+    if context is None and student_id:
+        lookups.update(student_lookups(mcp, student_id))
+    if settings.CHAT_COURSE_SEARCH_LIMIT > 0 and tokenize(message):
+        lookups["relevant_courses"] = (
+            read_resource_value(mcp, search_uri(message, settings.CHAT_COURSE_SEARCH_LIMIT)),
+            settings.CONTEXT_RESOURCE_TIMEOUT_SECONDS,
+        )
+
+    with student_repository_scope():
+        results, failed = await run_lookups(lookups)
+
+    pattern = results.pop("intent", None) or "general"
+    if context is None:
+        context = student_context_from(results)
+    relevant_courses = (results.get("relevant_courses") or {}).get("results")
+    if relevant_courses:
+        # A copy, since a held session context is shared between turns
+        context = {**context, "relevant_courses": relevant_courses}
+
+    return context, pattern, failed
+
+def context_version(context: Dict[str, Any]) -> str:
+    """Stable fingerprint of a context dict, used to detect stale copies"""
+    return data_version(context)
+
+class StudentContextSession:
+    """
+    Student context held for the lifetime of one WebSocket connection.
+
+    The profile and courses are read once and reused for every message on the
+    connection. The data is reloaded when the client asks for a refresh, when
+    the client reports a context version different from the one held here, or
+    when the copy is older than `max_age` seconds.
+    """
+
+    def __init__(self, mcp: MCPDispatcher, student_id: str, max_age: Optional[float] = 300.0):
+        self.mcp = mcp
+        self.student_id = student_id
+        self.max_age = max_age
+        self.context: Optional[Dict[str, Any]] = None
+        self.version: Optional[str] = None
+        self.loaded_at: Optional[float] = None
+        self.loads = 0
+
+    @property
+    def is_loaded(self) -> bool:
+        return self.context is not None
+
+    def is_stale(self, client_version: Optional[str] = None) -> bool:
+        """Check whether the held context should be reloaded before use"""
+        if not self.is_loaded:
+            return True
+        if client_version is not None and client_version != self.version:
+            return True
+        if self.max_age is not None and time.monotonic() - self.loaded_at > self.max_age:
+            return True
+        return False
+
+    async def refresh(self) -> Optional[Dict[str, Any]]:
+        """
+        Reload the student context from the MCP resources.
+
+        A failed read leaves the held context as it was, so the next message
+        tries again instead of reusing an empty context until it expires.
+
+        Returns:
+            The reloaded context, or None if the read failed
+        """
+        context, failed = await load_student_context(self.mcp, self.student_id)
+        if "student" in failed:
+            logger.warning(f"Could not load context for student {self.student_id}, retrying on the next message")
+            return None
+        self.context = context
+        self.version = context_version(self.context)
+        self.loaded_at = time.monotonic()
+        self.loads += 1
+        logger.info(f"Loaded context for student {self.student_id} (version {self.version}, load #{self.loads})")
+        return self.context
+
+    async def get(self, client_version: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """
+        Return the held context, reloading it first if it is missing or stale.
+
+        Args:
+            client_version: Context version last seen by the client, if any
+
+        Returns:
+            The student context dict, or None if it could not be reloaded, in
+            which case the reply reads the student's data itself and reports
+            the failure
+        """
+        if self.is_stale(client_version):
+            return await self.refresh()
+        return self.context
+
+    def describe(self) -> Dict[str, Any]:
+        """Metadata about the held context for frames sent to the client"""
+        return {
+            "student_id": self.student_id,
+            "version": self.version,
+            "loads": self.loads,
+        }
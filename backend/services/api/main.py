@@ -1,9 +1,18 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 from services.api.routes import api_router
+from services.api.warmup import create_warmup
+from services.mcp import mcp_dispatcher
+from services.courses import course_catalog
+from services.llm import provider_registry
 from core.config import settings
+from core.utils.metrics import metrics_registry
+from core.utils.neo4j_client import close_neo4j_client
+from core.utils.redis_client import close_redis_clients
 import logging
+import sys
 
 # Configure logging
 logging.basicConfig(
@@ -11,13 +20,44 @@ logging.basicConfig(
     format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
 )
 
-print(settings)
+logger = logging.getLogger(__name__)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Application lifespan.
+
+    Clients (LLM providers, Redis, Neo4j, database engines) are created on
+    first use rather than at import time. The warm-up creates the ones the
+    first requests need in the background, while `/ready` reports not ready;
+    whatever was created is closed here on shutdown.
+    """
+    logger.info(f"Starting API ({settings.APP_ENV})")
+    warmup = app.state.warmup = create_warmup(mcp_dispatcher)
+    metrics_registry.register("warmup", warmup.describe)
+    if settings.WARMUP_ENABLED:
+        warmup.start()
+    else:
+        warmup.status = "ready"
+    yield
+
+    await warmup.stop()
+    await course_catalog.aclose()
+    await mcp_dispatcher.aclose()
+    await provider_registry.aclose()
+    await close_redis_clients()
+    close_neo4j_client()
+    # The database module is only loaded when something used it
+    database = sys.modules.get("core.models.database")
+    if database is not None:
+        await database.dispose_engines()
 
 # Create FastAPI app
 app = FastAPI(
     title="AI Student Mentor API",
     description="API for the AI Student Mentoring Platform",
     version="0.1.0",
+    lifespan=lifespan,
 )
 
 # Add CORS middleware
@@ -47,11 +87,24 @@ async def global_exception_handler(request: Request, exc: Exception):
 async def root():
     return {"message": "Welcome to the AI Student Mentor API"}
 
-# Health check endpoint
+# Health check endpoint (liveness)
 @app.get("/health")
 async def health_check():
     return {"status": "healthy"}
 
+# Readiness: only route traffic here once the warm-up has finished
+@app.get("/ready")
+async def readiness_check(request: Request):
+    warmup = getattr(request.app.state, "warmup", None)
+    if warmup is None or not warmup.is_ready:
+        return JSONResponse(status_code=503, content=warmup.describe() if warmup else {"status": "starting"})
+    return warmup.describe()
+
+# Runtime statistics of caches and other components
+@app.get("/metrics")
+async def metrics():
+    return metrics_registry.collect()
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run("services.api.main:app", host="0.0.0.0", port=8000, reload=True)
\ No newline at end of file
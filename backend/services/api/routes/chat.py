@@ -1,32 +1,46 @@
-from fastapi import APIRouter, WebSocket, WebSocketDisconnect, HTTPException, Depends
-from fastapi.responses import JSONResponse
+from fastapi import APIRouter, WebSocket, WebSocketDisconnect, HTTPException, Depends, Header
+from fastapi.responses import JSONResponse, StreamingResponse
 from pydantic import BaseModel
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Optional, AsyncIterator, Tuple
 import json
+import time
 import asyncio
-from fastmcp import Client
-from services.mcp import mcp_server
+from services.mcp import mcp_dispatcher, MCPDispatcher
+from services.mcp.rendering import render_tool_result
+from services.api.context import StudentContextSession, assemble_context
+from services.api.batch import BatchRun
 import logging
-from langchain_ollama import ChatOllama
-from langchain.schema import SystemMessage, HumanMessage
-from langchain_google_genai import ChatGoogleGenerativeAI
+from langchain_core.messages import SystemMessage, HumanMessage
+from services.llm import stream_text, llm_scheduler, LLMQueueFull, LLMDeadlineExceeded, provider_registry
+from services.llm.providers import use_provider
+from services.llm.cascade import model_cascade
+from services.llm.scheduler import PRIORITY_INTERACTIVE, request_context
+from services.llm.prompt_context import serialize_context
+from services.intent import intent_router, intent_classifier
 from core.config import settings
+from core.utils.metrics import metrics_registry
+from core.utils.singleflight import create_single_flight
 
 logger = logging.getLogger(__name__)
 
-import getpass
-import os
-
-if "GOOGLE_API_KEY" not in os.environ:
-    os.environ["GOOGLE_API_KEY"] = settings.GOOGLE_API_KEY
 # Create router
 router = APIRouter()
 
-# Initialize LangChain LLM
-llm = ChatGoogleGenerativeAI(
-    model="gemini-2.0-flash",
-    # other parameters as needed
-)
+# Replies to requests sent with the same idempotency key share one computation
+chat_flight = create_single_flight("chat", result_ttl=settings.CHAT_IDEMPOTENCY_TTL_SECONDS)
+metrics_registry.register("chat_idempotency", chat_flight.stats)
+
+MENTOR_SYSTEM_PROMPT = """
+You are an AI student mentor that provides academic advice, career guidance,
+and educational support. Be helpful, encouraging, and provide specific,
+actionable advice to students.
+"""
+
+JSON_REWRITE_SYSTEM_PROMPT = "You are a helpful assistant that converts JSON data into natural language."
+
+POLISH_SYSTEM_PROMPT = "You are a helpful assistant that rewrites draft replies to students so they read naturally."
+
+FALLBACK_REPLY = "I'm sorry, I wasn't able to process your request properly. Could you please try again or rephrase your question?"
 
 class ChatMessage(BaseModel):
     """Chat message model"""
@@ -37,289 +51,527 @@ class ChatRequest(BaseModel):
     """Chat request model"""
     messages: List[ChatMessage]
     student_id: Optional[str] = None
+    stream: bool = False
+    polish: Optional[bool] = None
+    idempotency_key: Optional[str] = None
+    provider: Optional[str] = None
+
+class BatchRequest(BaseModel):
+    """Batch advising request model"""
+    student_ids: List[str]
+    pattern: str = "academic_progress"
+    concurrency: Optional[int] = None
 
 class ChatResponse(BaseModel):
     """Chat response model"""
     message: ChatMessage
     metadata: Optional[Dict[str, Any]] = None
-    
+
 @router.get("/test")
 async def test():
     """Test endpoint"""
     return {"message": "Hello, this is a test endpoint!"}
 
+async def run_pattern_tool(mcp: MCPDispatcher, pattern_to_use: str, context: Dict[str, Any]) -> Tuple[Optional[str], Any]:
+    """
+    Call the MCP tool backing a pattern, if the context has the data it needs.
+
+    Returns:
+        Tuple of (tool name, decoded tool result), or (None, None) when the
+        pattern is not applicable
+    """
+    if pattern_to_use == "academic_progress" and "student_courses" in context:
+        tool_name = "analyze_academic_performance"
+        return tool_name, await mcp.call_tool(
+            tool_name,
+            {
+                "courses": context.get("student_courses", []),
+                "goals": {"career_goals": context.get("student_profile", {}).get("career_goals", [])}
+            }
+        )
+    elif pattern_to_use == "career_guidance" and "student_profile" in context:
+        # Use student profile for career guidance
+        profile = context.get("student_profile", {})
+        tool_name = "analyze_career_path"
+        return tool_name, await mcp.call_tool(
+            tool_name,
+            {
+                "interests": profile.get("interests", []),
+                "skills": [],  # No skills in mock data
+                "courses": context.get("student_courses", []),
+                "career_goals": profile.get("career_goals", [])
+            }
+        )
+
+    return None, None
+
+def build_general_messages(message: str, context: Dict[str, Any]) -> List:
+    """Build the LangChain messages for the open-ended mentor prompt"""
+    # Prepare a prompt that includes context if available
+    if context:
+        # Add relevant context to help the LLM
+        context_str = serialize_context(context, "general").text
+        full_prompt = f"""
+        Student message: {message}
+
+        Context information:
+        {context_str}
+
+        Provide a helpful, encouraging response that addresses the student's question
+        and incorporates relevant information from their profile and courses if appropriate.
+        """
+    else:
+        full_prompt = message
+
+    # Conversation history would need more processing to convert to LangChain message format
+    return [
+        SystemMessage(content=MENTOR_SYSTEM_PROMPT),
+        HumanMessage(content=full_prompt)
+    ]
+
+def build_rewrite_messages(result: Any) -> List:
+    """Build the LangChain messages that turn a structured tool result into prose"""
+    result_str = serialize_context({"result": result}, "tool_result").text
+    natural_prompt = f"""
+    I need to convert this tool result into a natural, helpful response for a student:
+
+    {result_str}
+
+    Write a friendly, conversational response that includes the key insights and
+    recommendations from this data.
+    """
+
+    return [
+        SystemMessage(content=JSON_REWRITE_SYSTEM_PROMPT),
+        HumanMessage(content=natural_prompt)
+    ]
+
+def build_polish_messages(draft: str) -> List:
+    """Build the LangChain messages for the optional polish pass over a rendered reply"""
+    polish_prompt = f"""
+    Rewrite this reply to a student so it reads as a friendly, conversational message.
+    Keep every fact, number and recommendation, and don't add new ones:
+
+    {draft}
+    """
+
+    return [
+        SystemMessage(content=POLISH_SYSTEM_PROMPT),
+        HumanMessage(content=polish_prompt)
+    ]
+
+async def stream_llm(langchain_messages: List, timings: Dict[str, float],
+                     priority: str = PRIORITY_INTERACTIVE,
+                     provider: Optional[str] = None) -> AsyncIterator[str]:
+    """
+    Stream text deltas from the LLM through the scheduler.
+
+    Args:
+        langchain_messages: Messages to send to the LLM
+        timings: Dict that receives `llm_ttft_ms` once the first token arrives
+        priority: Scheduler priority class of the call
+        provider: LLM provider name; defaults to the configured one
+
+    Yields:
+        Non-empty text deltas in arrival order
+    """
+    started = time.perf_counter()
+    async for delta in stream_text(langchain_messages, priority=priority, provider=provider):
+        if not delta:
+            continue
+        if "llm_ttft_ms" not in timings:
+            timings["llm_ttft_ms"] = round((time.perf_counter() - started) * 1000, 1)
+        yield delta
+
+async def generate_reply(message: str, student_id: Optional[str] = None,
+                         context: Optional[Dict[str, Any]] = None,
+                         polish: Optional[bool] = None,
+                         mcp: MCPDispatcher = mcp_dispatcher,
+                         priority: str = PRIORITY_INTERACTIVE,
+                         provider: Optional[str] = None) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Run the chat pipeline for one user message and stream the reply.
+
+    Args:
+        message: The user's message
+        student_id: Optional student whose data should be used as context
+        context: Already loaded student context; skips the resource reads when given
+        polish: Run templated tool results through the LLM for tone; defaults to
+            `settings.CHAT_POLISH_TOOL_RESULTS`
+        mcp: Dispatcher used for MCP tool calls and resource reads
+        priority: Scheduler priority class of the LLM calls made for this reply
+        provider: LLM provider for this reply and the tool sampling it causes;
+            defaults to `settings.LLM_PROVIDER`, with the model cascade, when
+            enabled, answering easy general messages
+
+    Yields:
+        `{"type": "delta", "delta": ...}` events followed by one
+        `{"type": "final", "message": ..., "metadata": ...}` event
+
+    Raises:
+        LLMQueueFull: If the LLM scheduler rejects the reply's LLM call
+        LLMDeadlineExceeded: If the reply is not complete before the LLM deadline
+    """
+    started = time.perf_counter()
+    timings: Dict[str, float] = {}
+
+    # LLM calls made for this reply, including tool sampling, count against this
+    # student and go to this provider; both are restored once the reply is done,
+    # as the caller's task may go on to serve other messages
+    with request_context(student_id=student_id, priority=priority), use_provider(provider):
+        # Read student data and determine the MCP pattern concurrently
+        context, pattern_to_use, degraded = await assemble_context(
+            mcp, message, determine_pattern, student_id=student_id, context=context
+        )
+        timings["context_ms"] = round((time.perf_counter() - started) * 1000, 1)
+
+        # Try to process with identified pattern
+        tool_name, result = await run_pattern_tool(mcp, pattern_to_use, context)
+
+        if polish is None:
+            polish = settings.CHAT_POLISH_TOOL_RESULTS
+
+        langchain_messages = None
+        cascade = None
+        if result is None:
+            # Pattern-specific processing wasn't applicable, answer with the LLM directly
+            langchain_messages = build_general_messages(message, context)
+            rendered_by = "llm"
+            if model_cascade.active and provider is None:
+                # Let the small model answer when it is confident enough
+                draft, cascade = await model_cascade.try_draft(message, pattern_to_use, langchain_messages)
+                if draft is not None:
+                    result = draft
+                    langchain_messages = None
+                    rendered_by = "cascade"
+        elif isinstance(result, (dict, list)):
+            # Known result shapes are formatted with templates, skipping the second LLM call
+            draft = render_tool_result(tool_name, result)
+            if draft is None:
+                # Unknown shape, turn the JSON tool result into a natural language response
+                langchain_messages = build_rewrite_messages(result)
+                rendered_by = "llm"
+            elif polish:
+                langchain_messages = build_polish_messages(draft)
+                rendered_by = "template+llm"
+            else:
+                result = draft
+                rendered_by = "template"
+        else:
+            rendered_by = "tool"
+
+        parts: List[str] = []
+        if langchain_messages is not None:
+            async for delta in stream_llm(langchain_messages, timings, priority, provider):
+                if "ttft_ms" not in timings:
+                    timings["ttft_ms"] = round((time.perf_counter() - started) * 1000, 1)
+                parts.append(delta)
+                yield {"type": "delta", "delta": delta}
+        else:
+            # Templated or plain text tool result, nothing to rewrite
+            timings["ttft_ms"] = round((time.perf_counter() - started) * 1000, 1)
+            parts.append(str(result))
+            yield {"type": "delta", "delta": parts[0]}
+
+        content = "".join(parts) or FALLBACK_REPLY
+        timings["total_ms"] = round((time.perf_counter() - started) * 1000, 1)
+        logger.info(
+            f"Chat reply pattern={pattern_to_use} rendered_by={rendered_by} ttft_ms={timings.get('ttft_ms')} "
+            f"llm_ttft_ms={timings.get('llm_ttft_ms')} total_ms={timings['total_ms']}"
+        )
+
+        metadata = {"pattern": pattern_to_use, "rendered_by": rendered_by, "timings": timings}
+        if langchain_messages is not None:
+            metadata["provider"] = provider_registry.resolve(provider)
+        elif rendered_by == "cascade":
+            metadata["provider"] = model_cascade.provider
+        if cascade:
+            metadata["cascade"] = cascade
+        if degraded:
+            metadata["degraded"] = degraded
+
+        yield {
+            "type": "final",
+            "message": content,
+            "metadata": metadata
+        }
+
+def format_sse(event: str, data: Dict[str, Any]) -> str:
+    """Encode one Server-Sent Events frame"""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+def idempotency_flight_key(idempotency_key: str, student_id: Optional[str]) -> str:
+    """Scope a client supplied idempotency key to the student it was sent for"""
+    return f"{student_id or 'anonymous'}:{idempotency_key}"
+
+async def generate_reply_once(message: str, student_id: Optional[str], polish: Optional[bool],
+                              idempotency_key: str, provider: Optional[str] = None) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Run `generate_reply` at most once per idempotency key.
+
+    The first request with a key runs the pipeline and streams its events as
+    usual. Requests with the same key that arrive while it runs, or within
+    `settings.CHAT_IDEMPOTENCY_TTL_SECONDS` after it finished, on any worker,
+    attach to that computation and receive its final reply as a single delta.
+    """
+    events: asyncio.Queue = asyncio.Queue()
+
+    async def run() -> Dict[str, Any]:
+        final_event = None
+        async for event in generate_reply(message, student_id, polish=polish, provider=provider):
+            events.put_nowait(event)
+            if event["type"] == "final":
+                final_event = event
+        return final_event
+
+    reply = asyncio.ensure_future(
+        chat_flight.do(idempotency_flight_key(idempotency_key, student_id), run)
+    )
+    try:
+        while True:
+            next_event = asyncio.ensure_future(events.get())
+            done, _ = await asyncio.wait({next_event, reply}, return_when=asyncio.FIRST_COMPLETED)
+            if next_event in done:
+                # This request runs the pipeline, relay its events live
+                event = next_event.result()
+                yield event
+                if event["type"] == "final":
+                    return
+                continue
+
+            next_event.cancel()
+            if not events.empty():
+                continue
+            # Attached to a computation started by an earlier request
+            final_event = reply.result()
+            yield {"type": "delta", "delta": final_event["message"]}
+            yield final_event
+            return
+    finally:
+        if not reply.done():
+            reply.cancel()
+
+async def stream_chat_events(message: str, student_id: Optional[str], polish: Optional[bool] = None,
+                             idempotency_key: Optional[str] = None,
+                             provider: Optional[str] = None) -> AsyncIterator[str]:
+    """Adapt the reply events of `generate_reply` to an SSE stream"""
+    try:
+        if idempotency_key:
+            events = generate_reply_once(message, student_id, polish, idempotency_key, provider)
+        else:
+            events = generate_reply(message, student_id, polish=polish, provider=provider)
+
+        async for event in events:
+            if event["type"] == "delta":
+                yield format_sse("delta", {"delta": event["delta"]})
+            else:
+                yield format_sse("final", {
+                    "message": {"role": "assistant", "content": event["message"]},
+                    "metadata": event["metadata"]
+                })
+    except LLMQueueFull as e:
+        # Headers are already sent, so report the rejection in-band
+        logger.warning(f"Rejected streaming chat request: {str(e)}")
+        yield format_sse("error", {"status": 429, "detail": str(e), "retry_after": e.retry_after})
+    except LLMDeadlineExceeded as e:
+        logger.warning(f"Streaming chat request timed out: {str(e)}")
+        yield format_sse("error", {"status": 504, "detail": str(e)})
+    except Exception as e:
+        # Headers are already sent, so report the failure in-band
+        logger.error(f"Error in streaming chat endpoint: {str(e)}", exc_info=True)
+        yield format_sse("error", {"detail": f"An error occurred: {str(e)}"})
+
 @router.post("/", response_model=ChatResponse)
-async def chat(request: ChatRequest):
-    """Process a chat message and return a response"""
+async def chat(request: ChatRequest,
+               idempotency_key_header: Optional[str] = Header(None, alias="Idempotency-Key")):
+    """
+    Process a chat message and return a response.
+
+    With `stream` set, the reply is sent as Server-Sent Events: `delta` events
+    carry text as it is generated and a final `final` event carries the full
+    message and metadata.
+
+    An idempotency key, sent as the `Idempotency-Key` header or the
+    `idempotency_key` field, makes retries of the same request attach to the
+    original computation instead of starting a new one.
+
+    `provider` picks one of the configured LLM providers for this request.
+    """
     try:
         # Extract the latest user message
         if not request.messages or len(request.messages) == 0:
             raise HTTPException(status_code=400, detail="No messages provided")
-        
+
         latest_message = request.messages[-1]
         if latest_message.role != "user":
             raise HTTPException(status_code=400, detail="Last message must be from user")
-        
-        # Create context with student information if provided
-        context = {}
-        if request.student_id:
-            # Use in-memory client to access student data
-            async with Client(mcp_server) as client:
-                # Retrieve student profile
-                try:
-                    profile_response = await client.read_resource(f"student://{request.student_id}/profile")
-                    if profile_response and profile_response.content:
-                        context["student_profile"] = profile_response.content
-                    
-                    # Retrieve student courses
-                    courses_response = await client.read_resource(f"student://{request.student_id}/courses")
-                    if courses_response and courses_response.content:
-                        context["student_courses"] = courses_response.content
-                except Exception as e:
-                    logger.error(f"Error retrieving student data: {str(e)}")
-        
-        # Create conversation history
-        conversation_history = []
-        for msg in request.messages[:-1]:  # Exclude the latest message
-            conversation_history.append({
-                "role": msg.role,
-                "content": msg.content
-            })
-        
-        # Determine which MCP pattern to use based on message content
-        pattern_to_use = await determine_pattern(latest_message.content)
-        
-        # Process message using appropriate MCP pattern
-        async with Client(mcp_server) as client:
-            response = None
-            
-            # Try to process with identified pattern
-            if pattern_to_use == "academic_progress":
-                # If student courses are available, use them
-                if "student_courses" in context:
-                    response = await client.call_tool(
-                        "analyze_academic_performance", 
-                        {
-                            "courses": context.get("student_courses", []),
-                            "goals": context.get("student_profile", {}).get("career_goals", [])
-                        }
-                    )
-            elif pattern_to_use == "career_guidance" and "student_profile" in context:
-                # Use student profile for career guidance
-                profile = context.get("student_profile", {})
-                response = await client.call_tool(
-                    "analyze_career_path",
-                    {
-                        "interests": profile.get("interests", []),
-                        "skills": [],  # No skills in mock data
-                        "courses": context.get("student_courses", []),
-                        "career_goals": profile.get("career_goals", [])
-                    }
-                )
-            
-            # If pattern-specific processing failed or wasn't applicable, use LangChain
-            if not response or not getattr(response, "text", None):
-                # System message for LLM
-                system_message_text = """
-                You are an AI student mentor that provides academic advice, career guidance, 
-                and educational support. Be helpful, encouraging, and provide specific, 
-                actionable advice to students.
-                """
-                
-                # Prepare a prompt that includes context if available
-                prompt = latest_message.content
-                if context:
-                    # Add relevant context to help the LLM
-                    context_str = json.dumps(context, indent=2)
-                    full_prompt = f"""
-                    Student message: {prompt}
-                    
-                    Context information:
-                    {context_str}
-                    
-                    Provide a helpful, encouraging response that addresses the student's question
-                    and incorporates relevant information from their profile and courses if appropriate.
-                    """
-                else:
-                    full_prompt = prompt
-                
-                # Use LangChain to generate a response
-                langchain_messages = [
-                    SystemMessage(content=system_message_text),
-                    HumanMessage(content=full_prompt)
-                ]
-                
-                # Add conversation history if available
-                # This would need more processing to convert to LangChain message format
-                
-                llm_response = await llm.ainvoke(langchain_messages)
-                content = llm_response.content
-            else:
-                # Extract content from the MCP response
-                if hasattr(response, "text"):
-                    content = response.text
-                elif hasattr(response, "content"):
-                    # If it's a tool response with JSON content
-                    if isinstance(response.content, dict):
-                        # Use LangChain to format the JSON content into a natural language response
-                        json_str = json.dumps(response.content, indent=2)
-                        natural_prompt = f"""
-                        I need to convert this JSON result into a natural, helpful response for a student:
-                        
-                        {json_str}
-                        
-                        Write a friendly, conversational response that includes the key insights and 
-                        recommendations from this data.
-                        """
-                        
-                        langchain_messages = [
-                            SystemMessage(content="You are a helpful assistant that converts JSON data into natural language."),
-                            HumanMessage(content=natural_prompt)
-                        ]
-                        
-                        natural_response = await llm.ainvoke(langchain_messages)
-                        content = natural_response.content
-                    else:
-                        content = str(response.content)
-                else:
-                    # Fallback response
-                    content = "I'm sorry, I wasn't able to process your request properly. Could you please try again or rephrase your question?"
-        
+
+        idempotency_key = idempotency_key_header or request.idempotency_key
+
+        provider = request.provider
+        if provider and provider not in provider_registry.names():
+            raise HTTPException(status_code=400, detail=f"Unknown LLM provider: {provider}")
+
+        # Turn work away up front when the LLM queue is already too deep
+        llm_scheduler.check_admission(provider=provider, student_id=request.student_id)
+
+        if request.stream:
+            return StreamingResponse(
+                stream_chat_events(latest_message.content, request.student_id, request.polish,
+                                   idempotency_key, provider),
+                media_type="text/event-stream",
+                headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+            )
+
+        if idempotency_key:
+            events = generate_reply_once(latest_message.content, request.student_id, request.polish,
+                                         idempotency_key, provider)
+        else:
+            events = generate_reply(latest_message.content, request.student_id, polish=request.polish,
+                                    provider=provider)
+
+        final_event = None
+        async for event in events:
+            if event["type"] == "final":
+                final_event = event
+
         return ChatResponse(
-            message=ChatMessage(role="assistant", content=content),
-            metadata={"pattern": pattern_to_use}
+            message=ChatMessage(role="assistant", content=final_event["message"]),
+            metadata=final_event["metadata"]
         )
-    
+
+    except HTTPException:
+        raise
+    except LLMQueueFull as e:
+        logger.warning(f"Rejected chat request: {str(e)}")
+        raise HTTPException(status_code=429, detail=str(e),
+                            headers={"Retry-After": str(max(int(e.retry_after), 1))})
+    except LLMDeadlineExceeded as e:
+        logger.warning(f"Chat request timed out: {str(e)}")
+        raise HTTPException(status_code=504, detail=str(e))
     except Exception as e:
         logger.error(f"Error in chat endpoint: {str(e)}", exc_info=True)
         raise HTTPException(status_code=500, detail=f"An error occurred: {str(e)}")
 
-# Update your WebSocket endpoint similarly
+# Patterns that can run without a user message, on student data alone
+BATCH_PATTERNS = {"academic_progress", "career_guidance"}
+
+async def stream_batch_events(run: BatchRun) -> AsyncIterator[str]:
+    """Encode the events of a batch run as NDJSON lines"""
+    try:
+        async for event in run.events():
+            yield json.dumps(event, default=str) + "\n"
+    except Exception as e:
+        # The response has already started, so report the failure in-band
+        logger.error(f"Error in batch chat endpoint: {str(e)}", exc_info=True)
+        yield json.dumps({"type": "error", "detail": f"An error occurred: {str(e)}"}) + "\n"
+
+@router.post("/batch")
+async def chat_batch(request: BatchRequest):
+    """
+    Run a pattern for many students at once, e.g. `academic_progress` for a
+    cohort before registration.
+
+    The response is NDJSON: one `result` or `error` line per student as soon
+    as that student is done, then a `summary` line with the totals and the
+    throughput in students per minute. Students are processed by at most
+    `concurrency` workers at a time and their LLM calls run at batch priority.
+    """
+    if request.pattern not in BATCH_PATTERNS:
+        raise HTTPException(status_code=400,
+                            detail=f"Pattern must be one of: {', '.join(sorted(BATCH_PATTERNS))}")
+    if not request.student_ids:
+        raise HTTPException(status_code=400, detail="No student_ids provided")
+    if len(request.student_ids) > settings.BATCH_MAX_STUDENTS:
+        raise HTTPException(status_code=400,
+                            detail=f"At most {settings.BATCH_MAX_STUDENTS} students per batch")
+
+    concurrency = min(request.concurrency or settings.BATCH_CONCURRENCY, settings.BATCH_MAX_CONCURRENCY)
+    run = BatchRun(mcp_dispatcher, request.student_ids, request.pattern, run_pattern_tool,
+                   concurrency=concurrency, max_retries=settings.BATCH_MAX_RETRIES)
+    return StreamingResponse(
+        stream_batch_events(run),
+        media_type="application/x-ndjson",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 @router.websocket("/ws/chat")
 async def websocket_chat(websocket: WebSocket):
-    """WebSocket endpoint for streaming chat interactions"""
+    """
+    WebSocket endpoint for streaming chat interactions.
+
+    Each reply is sent as `{"type": "delta", "delta": ...}` frames followed by a
+    `{"type": "final", "message": ..., "metadata": ...}` frame with the full text.
+
+    The student context is loaded once per connection, either when it opens
+    (`?student_id=...`) or on the first message that carries a `student_id`,
+    and reused for every later message. Clients can send `{"type": "refresh"}`
+    to reload it, or pass the `context_version` from their last final frame so
+    a changed context is picked up.
+
+    When the LLM queue is too deep, the message is answered with a
+    `{"type": "error", "status": 429, ...}` frame and the connection stays open.
+    A message may carry a `provider` to answer it with another configured LLM.
+    """
     await websocket.accept()
-    
+
+    session: Optional[StudentContextSession] = None
+
     try:
-        async with Client(mcp_server) as client:
-            while True:
-                # Receive and parse message
-                data = await websocket.receive_text()
-                request_data = json.loads(data)
-                
-                message = request_data.get("message", "")
-                student_id = request_data.get("student_id")
-                
-                # Create context with student information if provided
-                context = {}
-                if student_id:
-                    # Retrieve student profile
-                    try:
-                        profile_response = await client.read_resource(f"student://{student_id}/profile")
-                        if profile_response and profile_response.content:
-                            context["student_profile"] = profile_response.content
-                        
-                        # Retrieve student courses
-                        courses_response = await client.read_resource(f"student://{student_id}/courses")
-                        if courses_response and courses_response.content:
-                            context["student_courses"] = courses_response.content
-                    except Exception as e:
-                        logger.error(f"Error retrieving student data: {str(e)}")
-                
-                # Determine which MCP pattern to use based on message content
-                pattern_to_use = await determine_pattern(message)
-                
-                # Process message with appropriate pattern
-                response = None
-                
-                # Try to process with identified pattern
-                if pattern_to_use == "academic_progress" and "student_courses" in context:
-                    response = await client.call_tool(
-                        "analyze_academic_performance", 
-                        {
-                            "courses": context.get("student_courses", []),
-                            "goals": context.get("student_profile", {}).get("career_goals", [])
-                        }
-                    )
-                elif pattern_to_use == "career_guidance" and "student_profile" in context:
-                    profile = context.get("student_profile", {})
-                    response = await client.call_tool(
-                        "analyze_career_path",
-                        {
-                            "interests": profile.get("interests", []),
-                            "skills": [],
-                            "courses": context.get("student_courses", []),
-                            "career_goals": profile.get("career_goals", [])
-                        }
-                    )
-                
-                # If pattern-specific processing failed or wasn't applicable, use LangChain
-                if not response or not getattr(response, "text", None):
-                    # System message for LLM
-                    system_message_text = """
-                    You are an AI student mentor that provides academic advice, career guidance, 
-                    and educational support. Be helpful, encouraging, and provide specific, 
-                    actionable advice to students.
-                    """
-                    
-                    # Add context to prompt if available
-                    if context:
-                        context_str = json.dumps(context, indent=2)
-                        full_prompt = f"""
-                        Student message: {message}
-                        
-                        Context information:
-                        {context_str}
-                        
-                        Provide a helpful, encouraging response that addresses the student's question
-                        and incorporates relevant information from their profile and courses if appropriate.
-                        """
-                    else:
-                        full_prompt = message
-                    
-                    # Use LangChain to generate a response
-                    langchain_messages = [
-                        SystemMessage(content=system_message_text),
-                        HumanMessage(content=full_prompt)
-                    ]
-                    
-                    llm_response = await llm.ainvoke(langchain_messages)
-                    content = llm_response.content
-                else:
-                    # Extract content from the MCP response
-                    if hasattr(response, "text"):
-                        content = response.text
-                    elif hasattr(response, "content"):
-                        if isinstance(response.content, dict):
-                            # Format JSON into natural language using LangChain
-                            json_str = json.dumps(response.content, indent=2)
-                            natural_prompt = f"""
-                            I need to convert this JSON result into a natural, helpful response for a student:
-                            
-                            {json_str}
-                            
-                            Write a friendly, conversational response that includes the key insights and 
-                            recommendations from this data.
-                            """
-                            
-                            langchain_messages = [
-                                SystemMessage(content="You are a helpful assistant that converts JSON data into natural language."),
-                                HumanMessage(content=natural_prompt)
-                            ]
-                            
-                            natural_response = await llm.ainvoke(langchain_messages)
-                            content = natural_response.content
-                        else:
-                            content = str(response.content)
-                    else:
-                        content = "I'm sorry, I wasn't able to process your request properly. Could you please try again or rephrase your question?"
-                
-                # Send response
+        student_id = websocket.query_params.get("student_id")
+        if student_id:
+            session = StudentContextSession(mcp_dispatcher, student_id, settings.WS_CONTEXT_MAX_AGE_SECONDS)
+            await session.refresh()
+
+        while True:
+            # Receive and parse message
+            data = await websocket.receive_text()
+            request_data = json.loads(data)
+
+            # The student never changes mid-connection, so only bind a new session when it does
+            student_id = request_data.get("student_id")
+            if student_id and (session is None or session.student_id != student_id):
+                session = StudentContextSession(mcp_dispatcher, student_id, settings.WS_CONTEXT_MAX_AGE_SECONDS)
+
+            if request_data.get("type") == "refresh":
+                if session:
+                    await session.refresh()
+                await websocket.send_json({
+                    "type": "context",
+                    "context": session.describe() if session else None
+                })
+                continue
+
+            message = request_data.get("message", "")
+            context = await session.get(request_data.get("context_version")) if session else {}
+            session_student = session.student_id if session else None
+
+            # Stream the reply as it is generated; a rejected reply keeps the connection open
+            provider = request_data.get("provider")
+            if provider and provider not in provider_registry.names():
+                await websocket.send_json({"type": "error", "status": 400,
+                                           "detail": f"Unknown LLM provider: {provider}"})
+                continue
+
+            try:
+                llm_scheduler.check_admission(provider=provider, student_id=session_student)
+                async for event in generate_reply(message, student_id=session_student, context=context,
+                                                  polish=request_data.get("polish"), provider=provider):
+                    if event["type"] == "final" and session:
+                        event["metadata"]["context_version"] = session.version
+                    await websocket.send_json(event)
+            except LLMQueueFull as e:
+                logger.warning(f"Rejected WebSocket chat message: {str(e)}")
                 await websocket.send_json({
-                    "message": content,
-                    "metadata": {"pattern": pattern_to_use}
+                    "type": "error",
+                    "status": 429,
+                    "detail": str(e),
+                    "retry_after": e.retry_after
                 })
-                
+            except LLMDeadlineExceeded as e:
+                logger.warning(f"WebSocket chat message timed out: {str(e)}")
+                await websocket.send_json({"type": "error", "status": 504, "detail": str(e)})
+
     except WebSocketDisconnect:
         logger.info("WebSocket client disconnected")
     except Exception as e:
@@ -329,24 +581,15 @@ async def websocket_chat(websocket: WebSocket):
 async def determine_pattern(message: str) -> str:
     """
     Determine which MCP pattern to use based on message content.
-    
+
     Args:
         message: The user's message
-        
+
     Returns:
         The name of the pattern to use
     """
-    message_lower = message.lower()
-    
-    if any(keyword in message_lower for keyword in ["grade", "gpa", "performance", "academic", "study plan"]):
-        print("Academic Progress Pattern")
-        return "academic_progress"
-    elif any(keyword in message_lower for keyword in ["career", "job", "profession", "future", "industry"]):
-        print("Career Guidance Pattern")
-        return "career_guidance"
-    elif any(keyword in message_lower for keyword in ["schedule", "plan", "semester", "degree"]):
-        print("Planning Pattern")
-        return "planning"
-    else:
-        print("General Pattern")
-        return "general"
\ No newline at end of file
+    if settings.INTENT_CLASSIFIER == "embedding":
+        result = await intent_classifier.classify(message)
+        logger.debug(f"Intent {result['pattern']} by {result['method']} (similarity {result['similarity']:.2f})")
+        return result["pattern"]
+    return intent_router.pattern_for(message)
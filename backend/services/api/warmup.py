@@ -0,0 +1,148 @@
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+import asyncio
+import time
+import logging
+from langchain_core.messages import HumanMessage
+
+from core.config import settings
+from core.utils.redis_client import get_async_redis_client, mark_async_redis_failure
+from services.mcp.dispatch import MCPDispatcher
+from services.mcp.server import setup_mcp_server
+from services.intent import intent_classifier
+from services.llm.client import complete_text
+from services.llm.providers import get_provider, provider_registry
+from services.llm.scheduler import PRIORITY_BATCH
+
+logger = logging.getLogger(__name__)
+
+class WarmUp:
+    """
+    Warm-up run in the background when the API starts.
+
+    Stages run in order and the steps within a stage run concurrently. A
+    failing step is logged and reported but doesn't stop the others, since
+    every step only saves the first requests some latency. The process is
+    ready once every stage has finished or the overall timeout has passed.
+    """
+
+    def __init__(self, stages: List[Dict[str, Callable[[], Awaitable[Any]]]], timeout: float = 60.0):
+        self.stages = stages
+        self.timeout = timeout
+        self.status = "pending"
+        self.steps: Dict[str, Dict[str, Any]] = {}
+        self.started_at: Optional[float] = None
+        self.elapsed_ms: Optional[float] = None
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def is_ready(self) -> bool:
+        return self.status in ("ready", "degraded")
+
+    async def _step(self, name: str, step: Callable[[], Awaitable[Any]]) -> None:
+        started = time.perf_counter()
+        self.steps[name] = {"status": "running"}
+        try:
+            await step()
+            self.steps[name] = {"status": "ok"}
+        except Exception as e:
+            logger.warning(f"Warm-up step {name} failed: {str(e)}")
+            self.steps[name] = {"status": "failed", "error": str(e)}
+        self.steps[name]["ms"] = round((time.perf_counter() - started) * 1000, 1)
+
+    async def _run_stages(self) -> None:
+        for stage in self.stages:
+            await asyncio.gather(*(self._step(name, step) for name, step in stage.items()))
+
+    async def run(self) -> None:
+        """Run every stage, then mark the process ready"""
+        self.status = "running"
+        self.started_at = time.perf_counter()
+        try:
+            await asyncio.wait_for(self._run_stages(), timeout=self.timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"Warm-up did not finish within {self.timeout}s")
+            for step in self.steps.values():
+                if step["status"] == "running":
+                    step["status"] = "timed_out"
+
+        failed = [name for name, step in self.steps.items() if step["status"] != "ok"]
+        self.status = "degraded" if failed else "ready"
+        self.elapsed_ms = round((time.perf_counter() - self.started_at) * 1000, 1)
+        logger.info(f"Warm-up finished in {self.elapsed_ms}ms ({self.status}"
+                    f"{', failed: ' + ', '.join(failed) if failed else ''})")
+
+    def start(self) -> asyncio.Task:
+        """Start the warm-up in the background"""
+        if self._task is None:
+            self._task = asyncio.create_task(self.run())
+        return self._task
+
+    async def stop(self) -> None:
+        """Cancel a warm-up that is still running"""
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+
+    def describe(self) -> Dict[str, Any]:
+        return {"status": self.status, "elapsed_ms": self.elapsed_ms, "steps": self.steps}
+
+async def open_redis() -> None:
+    try:
+        await get_async_redis_client().ping()
+    except Exception:
+        mark_async_redis_failure()
+        raise
+
+async def open_database() -> None:
+    """Create the async engine and open its first pooled connection, used by the student reads"""
+    # Imported here so SQLAlchemy is loaded by the warm-up rather than by importing the app
+    from sqlalchemy import text
+    from core.models.database import get_async_engine
+
+    async with get_async_engine().connect() as connection:
+        await connection.execute(text("SELECT 1"))
+
+def build_llm_providers() -> None:
+    for name in provider_registry.names():
+        get_provider(name)
+
+async def load_llm_providers() -> None:
+    """Build every configured provider in a thread, since their client libraries are imported on first use"""
+    await asyncio.to_thread(build_llm_providers)
+
+async def prime_llm() -> None:
+    """One tiny call to the default provider, opening its connection ahead of the first user"""
+    # Built off the event loop if the providers step didn't get to it
+    await asyncio.to_thread(get_provider)
+    await complete_text([HumanMessage(content="Reply with OK.")], PRIORITY_BATCH, max_tokens=1,
+                        deadline=settings.WARMUP_LLM_TIMEOUT_SECONDS, hedge=False)
+
+def create_warmup(mcp: MCPDispatcher) -> WarmUp:
+    """The API's warm-up: mount MCP components, open pools and load caches and indexes, then prime the LLM"""
+    async def preload_catalog() -> None:
+        await mcp.read_resource("courses://catalog")
+
+    async def open_mcp_client() -> None:
+        if mcp.mode == "client":
+            await mcp.get_client()
+        elif mcp.mode == "remote":
+            await mcp.pool.start()
+
+    async def load_intent_index() -> None:
+        if settings.INTENT_CLASSIFIER == "embedding":
+            await intent_classifier.load()
+
+    preload: Dict[str, Callable[[], Awaitable[Any]]] = {
+        "redis": open_redis,
+        "database": open_database,
+        "llm_providers": load_llm_providers,
+        "mcp_client": open_mcp_client,
+        "course_catalog": preload_catalog,
+        "intent_index": load_intent_index,
+    }
+    stages = [{"mcp_servers": setup_mcp_server}, preload]
+    if settings.WARMUP_PRIME_LLM:
+        # After the providers are built, so the call doesn't build one on the event loop
+        stages.append({"llm_priming": prime_llm})
+
+    return WarmUp(stages, timeout=settings.WARMUP_TIMEOUT_SECONDS)
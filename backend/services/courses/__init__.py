@@ -0,0 +1,9 @@
+from services.courses.catalog import CourseCatalog, SUMMARY_FIELDS, encode_cursor, decode_cursor
+from services.courses.store import CatalogStore, FileCatalogSource, DatabaseCatalogSource, course_catalog
+from services.courses.search import CourseSearchIndex, CourseSearch, course_search, search_uri, tokenize
+
+__all__ = [
+    "CourseCatalog", "SUMMARY_FIELDS", "encode_cursor", "decode_cursor",
+    "CatalogStore", "FileCatalogSource", "DatabaseCatalogSource", "course_catalog",
+    "CourseSearchIndex", "CourseSearch", "course_search", "search_uri", "tokenize",
+]
@@ -0,0 +1,129 @@
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+import base64
+import bisect
+import json
+
+# Fields of the course summaries in catalog pages; courses://{id} has the rest
+SUMMARY_FIELDS = ["id", "name", "department", "credits", "description", "prerequisites", "offered_semesters"]
+
+def normalize(value: str) -> str:
+    """Key form of a department or semester name"""
+    return " ".join(value.split()).casefold()
+
+def summarize(course: Dict[str, Any]) -> Dict[str, Any]:
+    """The catalog page form of a course"""
+    return {field: course[field] for field in SUMMARY_FIELDS if field in course}
+
+def encode_cursor(after: str) -> str:
+    """Opaque cursor continuing after a course id"""
+    return base64.urlsafe_b64encode(json.dumps({"after": after}).encode("utf-8")).decode("ascii")
+
+def decode_cursor(cursor: str) -> str:
+    """
+    Course id a cursor continues after.
+
+    Raises:
+        ValueError: If the cursor is not one returned by a catalog page
+    """
+    try:
+        return json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))["after"]
+    except (ValueError, KeyError, TypeError):
+        raise ValueError(f"Invalid cursor: {cursor}")
+
+class CourseCatalog:
+    """
+    One version of the course catalog with its indexes.
+
+    Courses are kept in id order, with indexes by department and offered
+    semester (both case-folded) and by prerequisite (the courses requiring a
+    course). A catalog is never changed after it is built; a new version is
+    a new catalog, so readers holding one always see a consistent version.
+    """
+
+    def __init__(self, courses: Iterable[Dict[str, Any]], version: str):
+        self.version = version
+        self.courses: Dict[str, Dict[str, Any]] = {}
+        for course in sorted(courses, key=lambda course: course["id"]):
+            self.courses[course["id"]] = course
+        self.ids: List[str] = list(self.courses)
+
+        self.by_department: Dict[str, List[str]] = {}
+        self.by_semester: Dict[str, List[str]] = {}
+        self.by_prerequisite: Dict[str, List[str]] = {}
+        # Ids are added in order, so every index list stays sorted
+        for course_id, course in self.courses.items():
+            department = course.get("department") or "Other"
+            self.by_department.setdefault(normalize(department), []).append(course_id)
+            for semester in course.get("offered_semesters") or []:
+                self.by_semester.setdefault(normalize(semester), []).append(course_id)
+            for prerequisite in course.get("prerequisites") or []:
+                self.by_prerequisite.setdefault(prerequisite, []).append(course_id)
+
+    def __len__(self) -> int:
+        return len(self.courses)
+
+    def get(self, course_id: str) -> Optional[Dict[str, Any]]:
+        return self.courses.get(course_id)
+
+    def department(self, name: str) -> List[Dict[str, Any]]:
+        """Summaries of a department's courses, matched case-insensitively"""
+        return [summarize(self.courses[course_id]) for course_id in self.by_department.get(normalize(name), [])]
+
+    def select(self, department: Optional[str] = None, semester: Optional[str] = None,
+               prerequisite: Optional[str] = None) -> List[str]:
+        """
+        Ids of the courses matching every filter given, in id order.
+
+        Args:
+            department: Department name, case-insensitive
+            semester: Offered semester (e.g. "Fall"), case-insensitive
+            prerequisite: Id of a course the matches require
+        """
+        candidates = []
+        if department is not None:
+            candidates.append(self.by_department.get(normalize(department), []))
+        if semester is not None:
+            candidates.append(self.by_semester.get(normalize(semester), []))
+        if prerequisite is not None:
+            candidates.append(self.by_prerequisite.get(prerequisite, []))
+        if not candidates:
+            return self.ids
+
+        # Walk the smallest list, which keeps the id order
+        candidates.sort(key=len)
+        others = [set(ids) for ids in candidates[1:]]
+        return [course_id for course_id in candidates[0] if all(course_id in ids for ids in others)]
+
+    def page(self, limit: int, cursor: Optional[str] = None,
+             **filters: Optional[str]) -> Tuple[List[Dict[str, Any]], Optional[str], int]:
+        """
+        One page of the courses matching the filters, as summaries.
+
+        Pages are keyed by course id, so a cursor stays valid across catalog
+        versions: the next page continues after the last course returned.
+
+        Args:
+            limit: Maximum number of courses in the page
+            cursor: Cursor of the previous page, None for the first
+            **filters: Filters of `select`
+
+        Returns:
+            Tuple of (course summaries, cursor of the next page or None on the
+            last page, number of matching courses)
+
+        Raises:
+            ValueError: If the cursor is invalid
+        """
+        ids = self.select(**filters)
+        start = bisect.bisect_right(ids, decode_cursor(cursor)) if cursor else 0
+        chunk = ids[start:start + limit]
+        next_cursor = encode_cursor(chunk[-1]) if chunk and start + limit < len(ids) else None
+        return [summarize(self.courses[course_id]) for course_id in chunk], next_cursor, len(ids)
+
+    def describe(self) -> Dict[str, Any]:
+        return {
+            "version": self.version,
+            "courses": len(self.courses),
+            "departments": len(self.by_department),
+            "semesters": sorted(self.by_semester),
+        }
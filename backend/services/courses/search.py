@@ -0,0 +1,428 @@
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+from pathlib import Path
+import asyncio
+import hashlib
+import heapq
+import json
+import math
+import os
+import re
+import tempfile
+import time
+import logging
+from urllib.parse import urlencode
+
+from core.config import settings
+from core.utils.metrics import metrics_registry
+from services.courses.catalog import CourseCatalog, summarize
+from services.courses.store import course_catalog
+
+logger = logging.getLogger(__name__)
+
+# Bumped when the tokenizer or the file layout changes, so older index files are rebuilt
+INDEX_FORMAT = 1
+
+# Entries of a large mapping serialized per `json.dumps` call when the index is
+# written. One call holds the GIL throughout, so writing in chunks lets the
+# event loop run while a thread writes a large index.
+SAVE_CHUNK_SIZE = 1000
+
+# Weight of a term occurrence per course field
+FIELD_WEIGHTS = {"name": 3.0, "topics": 2.0, "description": 1.0}
+
+STOPWORDS = frozenset("""
+a about an and any are as at be by can course courses class classes do does for from have how i in is it
+me my of on or that the there this to what which with would you your
+""".split())
+
+_TOKEN = re.compile(r"[a-z0-9]+")
+
+def stem(token: str) -> str:
+    """Fold simple plurals, so "graphs" finds "graph" and "theories" finds "theory\""""
+    if len(token) > 4 and token.endswith("ies"):
+        return token[:-3] + "y"
+    if len(token) > 3 and token.endswith("s") and not token.endswith(("ss", "us", "is")):
+        return token[:-1]
+    return token
+
+def tokenize(text: str) -> List[str]:
+    """Lowercased, stemmed terms of a text, without stopwords"""
+    return [stem(token) for token in _TOKEN.findall(text.lower()) if token not in STOPWORDS]
+
+def search_uri(query: str, limit: Optional[int] = None, department: Optional[str] = None) -> str:
+    """
+    courses://search URI for a free-text query.
+
+    The query is reduced to its search terms, which keeps characters like
+    `&` and `=` in a user's message out of the query string.
+    """
+    params = {"q": " ".join(tokenize(query))}
+    if limit:
+        params["limit"] = limit
+    if department:
+        params["department"] = department
+    return f"courses://search?{urlencode(params)}"
+
+def course_fields(course: Dict[str, Any]) -> Dict[str, str]:
+    return {
+        "name": course.get("name") or "",
+        "topics": " ".join(course.get("topics") or []),
+        "description": course.get("description") or "",
+    }
+
+def json_chunks(value: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+    """Split a mapping into mappings of about `SAVE_CHUNK_SIZE` entries, nested entries included"""
+    chunk: Dict[str, Any] = {}
+    size = 0
+    for key, item in value.items():
+        chunk[key] = item
+        size += 1 + (len(item) if isinstance(item, dict) else 0)
+        if size >= SAVE_CHUNK_SIZE:
+            yield chunk
+            chunk, size = {}, 0
+    if chunk:
+        yield chunk
+
+def write_json(file, data: Dict[str, Any]) -> None:
+    """Write a JSON object to a file, serializing its large mappings in chunks"""
+    separators = (",", ":")
+    file.write("{")
+    for position, (key, value) in enumerate(data.items()):
+        file.write(("," if position else "") + json.dumps(key) + ":")
+        if isinstance(value, dict):
+            file.write("{")
+            for number, chunk in enumerate(json_chunks(value)):
+                file.write(("," if number else "") + json.dumps(chunk, separators=separators)[1:-1])
+            file.write("}")
+        else:
+            file.write(json.dumps(value, separators=separators))
+    file.write("}")
+
+def fingerprint(fields: Dict[str, str]) -> str:
+    encoded = json.dumps(fields, sort_keys=True)
+    return hashlib.sha1(encoded.encode("utf-8")).hexdigest()[:16]
+
+class CourseSearchIndex:
+    """
+    Inverted index over course names, topics and descriptions, ranked with BM25.
+
+    Each term maps to the courses containing it with a field-weighted term
+    frequency (an occurrence in the name counts more than one in the
+    description). Courses are added and removed individually, and `update`
+    only re-indexes the courses whose indexed text changed, using a
+    fingerprint kept per course. The index can be written to and read back
+    from a JSON file.
+
+    An index is not safe to change while it is being searched; `copy` gives
+    an independent index to update instead.
+    """
+
+    def __init__(self, k1: float = 1.2, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.postings: Dict[str, Dict[str, float]] = {}
+        self.lengths: Dict[str, float] = {}
+        self.fingerprints: Dict[str, str] = {}
+        self.terms: Dict[str, List[str]] = {}
+        self.total_length = 0.0
+        self.catalog_version: Optional[str] = None
+
+    def __len__(self) -> int:
+        return len(self.lengths)
+
+    def add(self, course_id: str, fields: Dict[str, str]) -> None:
+        """Index a course, replacing its previous entry"""
+        if course_id in self.lengths:
+            self.remove(course_id)
+        frequencies: Dict[str, float] = {}
+        for field, text in fields.items():
+            weight = FIELD_WEIGHTS.get(field, 1.0)
+            for term in tokenize(text):
+                frequencies[term] = frequencies.get(term, 0.0) + weight
+        for term, frequency in frequencies.items():
+            self.postings.setdefault(term, {})[course_id] = frequency
+        length = sum(frequencies.values())
+        self.lengths[course_id] = length
+        self.total_length += length
+        self.terms[course_id] = list(frequencies)
+        self.fingerprints[course_id] = fingerprint(fields)
+
+    def remove(self, course_id: str) -> None:
+        if course_id not in self.lengths:
+            return
+        for term in self.terms.pop(course_id):
+            documents = self.postings.get(term)
+            if documents is not None:
+                documents.pop(course_id, None)
+                if not documents:
+                    del self.postings[term]
+        self.total_length -= self.lengths.pop(course_id)
+        self.fingerprints.pop(course_id, None)
+
+    def update(self, courses: Dict[str, Dict[str, Any]], version: Optional[str] = None) -> Tuple[int, int]:
+        """
+        Bring the index in line with a catalog, touching only what changed.
+
+        Args:
+            courses: Courses by id
+            version: Catalog version the index now reflects
+
+        Returns:
+            Tuple of (courses indexed, courses removed)
+        """
+        removed = [course_id for course_id in self.lengths if course_id not in courses]
+        for course_id in removed:
+            self.remove(course_id)
+        indexed = 0
+        for course_id, course in courses.items():
+            fields = course_fields(course)
+            if self.fingerprints.get(course_id) != fingerprint(fields):
+                self.add(course_id, fields)
+                indexed += 1
+        self.catalog_version = version
+        return indexed, len(removed)
+
+    def copy(self) -> "CourseSearchIndex":
+        """Independent copy, which can be updated while this one is searched"""
+        index = CourseSearchIndex(k1=self.k1, b=self.b)
+        index.postings = {term: dict(documents) for term, documents in self.postings.items()}
+        index.lengths = dict(self.lengths)
+        index.fingerprints = dict(self.fingerprints)
+        # The term lists are replaced, never changed, by `add` and `remove`
+        index.terms = dict(self.terms)
+        index.total_length = self.total_length
+        index.catalog_version = self.catalog_version
+        return index
+
+    def search(self, query: str, limit: int = 10,
+               allowed: Optional[Iterable[str]] = None) -> List[Tuple[str, float]]:
+        """
+        Rank the courses matching any term of a query.
+
+        Args:
+            query: Free text
+            limit: Number of results
+            allowed: Optional course ids to restrict the results to
+
+        Returns:
+            List of (course id, BM25 score), best first
+        """
+        count = len(self.lengths)
+        if not count:
+            return []
+        average_length = self.total_length / count
+        allowed = set(allowed) if allowed is not None else None
+        scores: Dict[str, float] = {}
+        for term in set(tokenize(query)):
+            documents = self.postings.get(term)
+            if not documents:
+                continue
+            idf = math.log(1 + (count - len(documents) + 0.5) / (len(documents) + 0.5))
+            for course_id, frequency in documents.items():
+                if allowed is not None and course_id not in allowed:
+                    continue
+                norm = self.k1 * (1 - self.b + self.b * self.lengths[course_id] / average_length)
+                scores[course_id] = scores.get(course_id, 0.0) + idf * frequency * (self.k1 + 1) / (frequency + norm)
+        return heapq.nlargest(limit, scores.items(), key=lambda item: (item[1], item[0]))
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "format": INDEX_FORMAT,
+            "catalog_version": self.catalog_version,
+            "k1": self.k1,
+            "b": self.b,
+            "postings": self.postings,
+            "lengths": self.lengths,
+            "fingerprints": self.fingerprints,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "CourseSearchIndex":
+        """
+        Raises:
+            ValueError: If the data was written by an incompatible version
+        """
+        if data.get("format") != INDEX_FORMAT:
+            raise ValueError(f"Unsupported search index format: {data.get('format')}")
+        index = cls(k1=data["k1"], b=data["b"])
+        index.postings = data["postings"]
+        index.lengths = data["lengths"]
+        index.fingerprints = data["fingerprints"]
+        index.catalog_version = data["catalog_version"]
+        index.total_length = sum(index.lengths.values())
+        for term, documents in index.postings.items():
+            for course_id in documents:
+                index.terms.setdefault(course_id, []).append(term)
+        return index
+
+    def save(self, path: str) -> None:
+        """
+        Write the index to a file, replacing it atomically.
+
+        The index is written to a temporary file of its own next to the
+        target first, so processes sharing the path don't write to the same
+        temporary file.
+        """
+        target = Path(path)
+        target.parent.mkdir(parents=True, exist_ok=True)
+        with tempfile.NamedTemporaryFile("w", dir=target.parent, prefix=f".{target.name}.",
+                                         suffix=".tmp", delete=False) as file:
+            try:
+                write_json(file, self.to_dict())
+            except BaseException:
+                file.close()
+                os.unlink(file.name)
+                raise
+        os.replace(file.name, target)
+
+    @classmethod
+    def load(cls, path: str) -> "CourseSearchIndex":
+        return cls.from_dict(json.loads(Path(path).read_text()))
+
+class CourseSearch:
+    """
+    Course search over the catalog of `course_catalog`.
+
+    On first use the index is read from `index_path` when the file exists,
+    then updated against the current catalog, so a restart only re-indexes
+    the courses that changed since the file was written. After every catalog
+    reload a copy of the index is updated the same way and written back.
+
+    Indexes are built, updated and written in a thread, so a reload of a
+    large catalog doesn't hold up the event loop. An index is published with
+    one assignment once it is complete, and isn't changed after that, so a
+    search never sees a half-updated index.
+    """
+
+    def __init__(self, index_path: Optional[str] = None):
+        self.index_path = index_path
+        self.index: Optional[CourseSearchIndex] = None
+        # Catalog the published index reflects
+        self.catalog: Optional[CourseCatalog] = None
+        self.lock = asyncio.Lock()
+        self.counters = {"searches": 0, "updates": 0, "loaded_from_disk": 0}
+        self.search_seconds = 0.0
+        self.last_update: Optional[Dict[str, Any]] = None
+        course_catalog.subscribe(self.on_reload)
+
+    async def get(self) -> Tuple[CourseSearchIndex, CourseCatalog]:
+        """The index and the catalog it reflects, building the index first if needed"""
+        if self.index is None:
+            # Outside the lock: the first catalog load runs the reload listeners, `on_reload` included
+            await course_catalog.get()
+            async with self.lock:
+                if self.index is None:
+                    # A reload that ran before the lock was taken found no index to update
+                    catalog = course_catalog.catalog
+                    # Built off the event loop; nothing searches it before it is published
+                    index = await asyncio.to_thread(self.open_index)
+                    changed = await asyncio.to_thread(self.apply, index, catalog)
+                    self.index, self.catalog = index, catalog
+                    if changed:
+                        await asyncio.to_thread(self.save, index)
+        return self.index, self.catalog
+
+    def open_index(self) -> CourseSearchIndex:
+        if self.index_path and Path(self.index_path).exists():
+            try:
+                index = CourseSearchIndex.load(self.index_path)
+                self.counters["loaded_from_disk"] += 1
+                logger.info(f"Loaded course search index with {len(index)} courses from {self.index_path}")
+                return index
+            except Exception as e:
+                logger.warning(f"Rebuilding course search index, could not read {self.index_path}: {str(e)}")
+        return CourseSearchIndex()
+
+    def apply(self, index: CourseSearchIndex, catalog: CourseCatalog) -> bool:
+        """
+        Update an index to a catalog.
+
+        Returns:
+            Whether the index changed and should be written back
+        """
+        started = time.perf_counter()
+        changed = index.catalog_version != catalog.version
+        indexed, removed = index.update(catalog.courses, catalog.version)
+        self.counters["updates"] += 1
+        self.last_update = {
+            "catalog_version": catalog.version,
+            "indexed": indexed,
+            "removed": removed,
+            "ms": round((time.perf_counter() - started) * 1000, 1),
+        }
+        logger.info(f"Course search index updated to catalog {catalog.version}: "
+                    f"{indexed} indexed, {removed} removed in {self.last_update['ms']}ms")
+        return bool(changed or indexed or removed)
+
+    def update_copy(self, index: CourseSearchIndex, catalog: CourseCatalog) -> Tuple[CourseSearchIndex, bool]:
+        """A copy of an index updated to a catalog, and whether it changed"""
+        index = index.copy()
+        return index, self.apply(index, catalog)
+
+    def save(self, index: CourseSearchIndex) -> None:
+        if not self.index_path:
+            return
+        try:
+            index.save(self.index_path)
+        except OSError as e:
+            logger.warning(f"Could not write course search index to {self.index_path}: {str(e)}")
+
+    async def on_reload(self, previous: Optional[CourseCatalog], catalog: CourseCatalog) -> None:
+        # Waits for an initial build in progress, which may have started from the previous catalog
+        async with self.lock:
+            if self.index is None:
+                # Built on first use, from the catalog current by then
+                return
+            # The latest catalog, should reloads have overtaken each other
+            catalog = course_catalog.catalog
+            if catalog is self.catalog:
+                return
+            # Incremental, on a copy so searches carry on with the published index meanwhile
+            index, changed = await asyncio.to_thread(self.update_copy, self.index, catalog)
+            self.index, self.catalog = index, catalog
+            if changed:
+                # Under the lock, so writes of successive reloads don't overlap
+                await asyncio.to_thread(self.save, index)
+
+    async def search(self, query: str, limit: Optional[int] = None,
+                     department: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Find the courses best matching a free-text query.
+
+        Args:
+            query: Free text, e.g. "graphs" or "is there a course on graphs?"
+            limit: Number of results, `settings.COURSE_SEARCH_LIMIT` by default
+            department: Optional department to restrict the results to
+
+        Returns:
+            Dict with the query, the results (course summaries with a
+            `score`, best first) and the catalog version
+        """
+        index, catalog = await self.get()
+        limit = max(1, min(limit or settings.COURSE_SEARCH_LIMIT, settings.COURSE_SEARCH_MAX_LIMIT))
+        allowed = catalog.select(department=department) if department else None
+
+        started = time.perf_counter()
+        ranked = index.search(query, limit, allowed)
+        self.search_seconds += time.perf_counter() - started
+        self.counters["searches"] += 1
+
+        results = []
+        for course_id, score in ranked:
+            course = catalog.get(course_id)
+            if course is not None:
+                results.append({**summarize(course), "score": round(score, 3)})
+        return {"query": query, "results": results, "catalog_version": catalog.version}
+
+    def stats(self) -> Dict[str, Any]:
+        searches = self.counters["searches"]
+        return {
+            **self.counters,
+            "courses": len(self.index) if self.index else 0,
+            "terms": len(self.index.postings) if self.index else 0,
+            "avg_search_us": round(self.search_seconds / searches * 1e6, 1) if searches else 0.0,
+            "last_update": self.last_update,
+        }
+
+course_search = CourseSearch(index_path=settings.COURSE_SEARCH_INDEX_PATH)
+metrics_registry.register("course_search", course_search.stats)
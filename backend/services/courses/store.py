@@ -0,0 +1,215 @@
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from pathlib import Path
+import asyncio
+import hashlib
+import json
+import os
+import time
+import logging
+
+from core.config import settings
+from core.utils.metrics import metrics_registry
+from services.courses.catalog import CourseCatalog
+
+logger = logging.getLogger(__name__)
+
+# Shipped with the code, used unless COURSE_CATALOG_PATH names another file
+BUNDLED_CATALOG_PATH = Path(__file__).parent / "catalog.json"
+
+# Called with (previous catalog or None, new catalog) after each reload
+ReloadListener = Callable[[Optional[CourseCatalog], CourseCatalog], Any]
+
+class FileCatalogSource:
+    """
+    Catalog read from a JSON file.
+
+    The file holds a list of courses, or an object with a `courses` list and
+    an optional `version`. Without a version, the version is a hash of the
+    file's contents. The file is only read again once its size or
+    modification time changes.
+    """
+
+    def __init__(self, path: str):
+        self.path = Path(path)
+        self.stamp: Optional[Tuple[int, int]] = None
+        self.known_version: Optional[str] = None
+
+    def read(self) -> Tuple[str, List[Dict[str, Any]]]:
+        raw = self.path.read_bytes()
+        data = json.loads(raw)
+        courses = data["courses"] if isinstance(data, dict) else data
+        version = data.get("version") if isinstance(data, dict) else None
+        return str(version or hashlib.sha1(raw).hexdigest()[:12]), courses
+
+    async def version(self) -> Optional[str]:
+        stat = os.stat(self.path)
+        stamp = (stat.st_mtime_ns, stat.st_size)
+        if stamp == self.stamp:
+            return self.known_version
+        version, _ = await asyncio.to_thread(self.read)
+        self.stamp, self.known_version = stamp, version
+        return version
+
+    async def load(self) -> Tuple[str, List[Dict[str, Any]]]:
+        stat = os.stat(self.path)
+        version, courses = await asyncio.to_thread(self.read)
+        self.stamp, self.known_version = (stat.st_mtime_ns, stat.st_size), version
+        return version, courses
+
+class DatabaseCatalogSource:
+    """
+    Catalog read from the `courses` table.
+
+    The version is derived from the number of courses and the latest
+    `updated_at`, which is checked with one indexed query. SQLAlchemy and
+    the models are imported when the table is first read, so the API only
+    loads them when it serves the catalog from the database.
+    """
+
+    async def version(self) -> Optional[str]:
+        from sqlalchemy import func, select
+        from core.models.course import Course
+        from core.models.database import get_async_session
+
+        async with get_async_session()() as session:
+            count, updated_at = (await session.execute(
+                select(func.count(Course.id), func.max(Course.updated_at))
+            )).one()
+        return f"{count}:{updated_at.isoformat() if updated_at else '-'}"
+
+    async def load(self) -> Tuple[str, List[Dict[str, Any]]]:
+        # Read the version first, so a change made during the load is picked up by the next check
+        version = await self.version()
+        from sqlalchemy import select
+        from core.models.course import Course
+        from core.models.database import get_async_session
+
+        async with get_async_session()() as session:
+            courses = [course.to_dict() for course in await session.scalars(select(Course))]
+        return version, courses
+
+def create_catalog_source():
+    """The catalog source selected by `settings.COURSE_CATALOG_SOURCE`"""
+    if settings.COURSE_CATALOG_SOURCE == "database":
+        return DatabaseCatalogSource()
+    if settings.COURSE_CATALOG_SOURCE == "file":
+        return FileCatalogSource(settings.COURSE_CATALOG_PATH or str(BUNDLED_CATALOG_PATH))
+    raise ValueError(f"Unknown COURSE_CATALOG_SOURCE: {settings.COURSE_CATALOG_SOURCE}")
+
+class CatalogStore:
+    """
+    The course catalog of this process, loaded once and kept in memory.
+
+    The catalog is loaded from its source on first use and indexed (see
+    `CourseCatalog`). While `reload_interval` is set, a background task
+    checks the source's version and, when it changed, builds the new catalog
+    and its indexes off the event loop, then swaps it in with a single
+    assignment. Readers keep the catalog they got, so a request never sees a
+    mix of two versions. Listeners registered with `subscribe` run after
+    each swap, e.g. to drop cached results or update a search index.
+    """
+
+    def __init__(self, source_factory: Callable[[], Any] = create_catalog_source,
+                 reload_interval: float = 60.0):
+        self.source_factory = source_factory
+        self.source = None
+        self.reload_interval = reload_interval
+        self.catalog: Optional[CourseCatalog] = None
+        self.listeners: List[ReloadListener] = []
+        self.lock = asyncio.Lock()
+        self.watcher: Optional[asyncio.Task] = None
+        self.counters = {"loads": 0, "checks": 0, "failures": 0}
+        self.last_load: Optional[Dict[str, Any]] = None
+
+    def subscribe(self, listener: ReloadListener) -> None:
+        """Run a callable (sync or async) after every load with (previous, new) catalog"""
+        self.listeners.append(listener)
+
+    async def get(self) -> CourseCatalog:
+        """
+        The current catalog, loading it first if needed.
+
+        Raises:
+            Exception: If the first load fails
+        """
+        if self.catalog is None:
+            await self.reload(initial=True)
+        if self.watcher is None and self.reload_interval > 0:
+            self.watcher = asyncio.create_task(self.watch())
+        return self.catalog
+
+    async def reload(self, force: bool = False, initial: bool = False) -> bool:
+        """
+        Load the catalog again if its version changed.
+
+        Args:
+            force: Load even if the version is unchanged
+            initial: Only load if no catalog is loaded yet
+
+        Returns:
+            Whether a new catalog was swapped in
+        """
+        async with self.lock:
+            if initial:
+                # Concurrent first reads wait for one load
+                if self.catalog is not None:
+                    return False
+                force = True
+            if self.source is None:
+                self.source = self.source_factory()
+            self.counters["checks"] += 1
+            if not force and self.catalog is not None:
+                if await self.source.version() == self.catalog.version:
+                    return False
+
+            started = time.perf_counter()
+            version, courses = await self.source.load()
+            if not force and self.catalog is not None and version == self.catalog.version:
+                return False
+            catalog = await asyncio.to_thread(CourseCatalog, courses, version)
+            previous, self.catalog = self.catalog, catalog
+            self.counters["loads"] += 1
+            self.last_load = {
+                "version": version,
+                "courses": len(catalog),
+                "ms": round((time.perf_counter() - started) * 1000, 1),
+                "at": time.time(),
+            }
+            logger.info(f"Loaded course catalog version {version} with {len(catalog)} courses "
+                        f"in {self.last_load['ms']}ms")
+
+        for listener in self.listeners:
+            try:
+                result = listener(previous, catalog)
+                if asyncio.iscoroutine(result):
+                    await result
+            except Exception as e:
+                logger.error(f"Course catalog reload listener failed: {str(e)}")
+        return True
+
+    async def watch(self) -> None:
+        while True:
+            await asyncio.sleep(self.reload_interval)
+            try:
+                await self.reload()
+            except Exception as e:
+                # Keep serving the catalog already loaded
+                self.counters["failures"] += 1
+                logger.warning(f"Course catalog check failed: {str(e)}")
+
+    async def aclose(self) -> None:
+        if self.watcher is not None:
+            self.watcher.cancel()
+            await asyncio.gather(self.watcher, return_exceptions=True)
+            self.watcher = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            **self.counters,
+            "catalog": self.catalog.describe() if self.catalog else None,
+            "last_load": self.last_load,
+            "reload_interval_seconds": self.reload_interval,
+        }
+
+course_catalog = CatalogStore(reload_interval=settings.COURSE_CATALOG_RELOAD_INTERVAL_SECONDS)
+metrics_registry.register("course_catalog", course_catalog.stats)
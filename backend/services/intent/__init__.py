@@ -0,0 +1,7 @@
+from services.intent.router import IntentRouter, IntentMatch, INTENT_TABLE, intent_router
+from services.intent.embedding import EmbeddingIntentClassifier, HashingEmbedder, INTENT_EXAMPLES, intent_classifier
+
+__all__ = [
+    "IntentRouter", "IntentMatch", "INTENT_TABLE", "intent_router",
+    "EmbeddingIntentClassifier", "HashingEmbedder", "INTENT_EXAMPLES", "intent_classifier",
+]
@@ -0,0 +1,316 @@
+from typing import Any, Dict, List, Optional, Tuple
+from operator import mul
+import asyncio
+import hashlib
+import json
+import math
+import os
+import string
+import time
+import logging
+from cachetools import LRUCache
+
+from core.config import settings
+from core.utils.metrics import metrics_registry
+from services.intent.router import IntentRouter, intent_router
+
+logger = logging.getLogger(__name__)
+
+# Labelled example messages for each chat pattern
+INTENT_EXAMPLES: Dict[str, List[str]] = {
+    "academic_progress": [
+        "How am I doing in my classes this term?",
+        "What is my GPA right now?",
+        "Why did my grades drop this semester?",
+        "Which subjects am I strongest in?",
+        "I keep failing my exams, what should I change?",
+        "Can you make me a study plan to improve my marks?",
+        "Am I on track academically?",
+        "How can I raise my grade in data structures?",
+        "Analyze my academic performance",
+        "What are my weak areas in my coursework?",
+    ],
+    "career_guidance": [
+        "What jobs can I get with a computer science degree?",
+        "I want to become a data scientist, where do I start?",
+        "Which careers fit my interests?",
+        "Should I apply for internships this summer?",
+        "How do I get into the biotech industry?",
+        "What skills do employers look for in software engineers?",
+        "Is AI research a good career path for me?",
+        "What can I do after graduating with a biology major?",
+        "Help me prepare for job interviews",
+        "What profession matches my strengths?",
+    ],
+    "planning": [
+        "Which courses should I take next semester?",
+        "Help me build my class schedule",
+        "How many credits should I take this term?",
+        "Plan the rest of my degree",
+        "What are the prerequisites for machine learning?",
+        "Can I graduate a semester early?",
+        "Should I take linear algebra and data structures together?",
+        "When should I fit in my electives?",
+        "Organize my weekly timetable around my classes",
+        "What order should I take the math courses in?",
+    ],
+    "general": [
+        "Hi there",
+        "Thanks for your help!",
+        "What can you do?",
+        "Tell me a fun fact",
+        "Good morning",
+        "Who are you?",
+        "I feel stressed and overwhelmed lately",
+        "How do I stay motivated?",
+        "Can you explain recursion to me?",
+        "What's the best way to take notes?",
+    ],
+}
+
+_SEPARATORS = str.maketrans({char: " " for char in string.punctuation})
+
+# Function words carry no intent and only add noise to lexical embeddings
+_STOPWORDS = frozenset(
+    "a an and are am as at be by can could do for from how i i'm in is it me my of on or "
+    "should so that the this to was what which with would you your".split()
+)
+
+def normalize_message(message: str) -> str:
+    """Case- and whitespace-insensitive form of a message, used as the cache key"""
+    return " ".join(message.casefold().split())
+
+def _dot(a: List[float], b: List[float]) -> float:
+    return sum(map(mul, a, b))
+
+def _sparse(vector: List[float]) -> Optional[List[Tuple[int, float]]]:
+    """Non-zero entries of a vector, or None when it is too dense to benefit"""
+    entries = [(index, value) for index, value in enumerate(vector) if value]
+    return entries if len(entries) * 4 < len(vector) else None
+
+def _normalize(vector: List[float]) -> List[float]:
+    norm = math.sqrt(_dot(vector, vector))
+    return [value / norm for value in vector] if norm else vector
+
+class HashingEmbedder:
+    """
+    Deterministic local embedding based on feature hashing.
+
+    Words other than stopwords (with a trailing plural "s" removed) and
+    their bigrams are hashed into a fixed number of signed buckets and the
+    vector is L2 normalized. It needs no model download or network access,
+    gives identical vectors in every process, and is the embedder used in
+    tests and by default.
+    """
+
+    def __init__(self, dimensions: int = 256):
+        self.dimensions = dimensions
+        self.name = f"hashing-{dimensions}"
+
+    def _features(self, text: str) -> List[Tuple[str, float]]:
+        words = [word[:-1] if len(word) > 3 and word.endswith("s") else word
+                 for word in text.casefold().translate(_SEPARATORS).split()
+                 if word not in _STOPWORDS]
+        features = [(word, 1.0) for word in words]
+        features += [(f"{first} {second}", 0.5) for first, second in zip(words, words[1:])]
+        return features
+
+    def embed_one(self, text: str) -> List[float]:
+        vector = [0.0] * self.dimensions
+        for feature, weight in self._features(text):
+            digest = hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest()
+            bucket = int.from_bytes(digest[:4], "little") % self.dimensions
+            vector[bucket] += weight if digest[4] & 1 else -weight
+        return _normalize(vector)
+
+    async def embed(self, texts: List[str]) -> List[List[float]]:
+        return [self.embed_one(text) for text in texts]
+
+class OllamaEmbedder:
+    """Embeddings from a model served by a local Ollama instance"""
+
+    def __init__(self, model: str, base_url: Optional[str] = None):
+        from langchain_ollama import OllamaEmbeddings
+
+        self.name = f"ollama-{model}"
+        self.client = OllamaEmbeddings(model=model, base_url=base_url)
+
+    async def embed(self, texts: List[str]) -> List[List[float]]:
+        vectors = await self.client.aembed_documents(texts)
+        return [_normalize(list(vector)) for vector in vectors]
+
+def create_embedder() -> Any:
+    """Create the embedder selected by `INTENT_EMBEDDING_PROVIDER`"""
+    if settings.INTENT_EMBEDDING_PROVIDER == "ollama":
+        return OllamaEmbedder(settings.INTENT_EMBEDDING_MODEL, settings.OLLAMA_BASE_URL)
+    if settings.INTENT_EMBEDDING_PROVIDER == "hashing":
+        return HashingEmbedder()
+    raise ValueError(f"Unknown intent embedding provider: {settings.INTENT_EMBEDDING_PROVIDER}")
+
+class EmbeddingIntentClassifier:
+    """
+    Classifies chat messages into patterns by nearest-neighbour lookup.
+
+    The labelled examples are embedded once and the index is persisted as
+    JSON under `settings.VECTOR_DB_DIR`; it is rebuilt only when the
+    embedder or the examples change. A message is embedded, compared with
+    every example, and the labels of the `k` nearest examples vote with
+    their similarity. Embeddings and votes are cached per normalized
+    message, so a repeated message costs one dictionary lookup. When the
+    best similarity or the winning share of the vote is too low, the
+    keyword router decides instead.
+    """
+
+    def __init__(self, embedder: Any, examples: Dict[str, List[str]],
+                 index_dir: Optional[str] = None, k: int = 3,
+                 min_similarity: float = 0.3, min_share: float = 0.5,
+                 fallback: IntentRouter = intent_router, cache_size: int = 4096):
+        self.embedder = embedder
+        self.examples = examples
+        self.index_path = os.path.join(index_dir, "intent_index.json") if index_dir else None
+        self.k = k
+        self.min_similarity = min_similarity
+        self.min_share = min_share
+        self.fallback = fallback
+        self.cache: LRUCache = LRUCache(maxsize=cache_size)
+        self.labels: List[str] = []
+        self.vectors: List[List[float]] = []
+        self._lock = asyncio.Lock()
+        self.counters = {"classified": 0, "cache_hits": 0, "fallbacks": 0}
+
+    @property
+    def is_loaded(self) -> bool:
+        return bool(self.vectors)
+
+    def fingerprint(self) -> str:
+        """Identity of the embedder and example set the index was built from"""
+        encoded = json.dumps([self.embedder.name, self.examples], sort_keys=True)
+        return hashlib.sha1(encoded.encode("utf-8")).hexdigest()
+
+    async def load(self) -> None:
+        """Load the persisted index, or build and persist it if it is missing or outdated"""
+        async with self._lock:
+            if self.is_loaded:
+                return
+            started = time.perf_counter()
+            if self._read_index():
+                source = "loaded"
+            else:
+                await self._build_index()
+                self._write_index()
+                source = "built"
+            logger.info(
+                f"Intent index {source} with {len(self.vectors)} examples "
+                f"in {(time.perf_counter() - started) * 1000:.1f}ms"
+            )
+
+    def _read_index(self) -> bool:
+        if not self.index_path or not os.path.exists(self.index_path):
+            return False
+        try:
+            with open(self.index_path, "r", encoding="utf-8") as f:
+                index = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Could not read intent index {self.index_path}: {str(e)}")
+            return False
+        if index.get("fingerprint") != self.fingerprint():
+            return False
+        self.labels = index["labels"]
+        self.vectors = index["vectors"]
+        return True
+
+    async def _build_index(self) -> None:
+        labels, texts = [], []
+        for label, examples in self.examples.items():
+            labels.extend([label] * len(examples))
+            texts.extend(examples)
+        self.vectors = await self.embedder.embed(texts)
+        self.labels = labels
+
+    def _write_index(self) -> None:
+        if not self.index_path:
+            return
+        try:
+            os.makedirs(os.path.dirname(self.index_path), exist_ok=True)
+            tmp_path = f"{self.index_path}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({"fingerprint": self.fingerprint(), "labels": self.labels, "vectors": self.vectors}, f)
+            os.replace(tmp_path, self.index_path)
+        except OSError as e:
+            logger.warning(f"Could not persist intent index to {self.index_path}: {str(e)}")
+
+    async def embed_message(self, message: str) -> List[float]:
+        """Embed a message"""
+        return (await self.embedder.embed([normalize_message(message)]))[0]
+
+    def nearest(self, vector: List[float]) -> Tuple[Optional[str], float, float]:
+        """
+        Vote among the `k` nearest examples.
+
+        Returns:
+            Tuple of (winning label, similarity of the nearest example,
+            share of the vote won by the label)
+        """
+        # Hashed message vectors have few non-zero entries, so skip the zeros
+        entries = _sparse(vector)
+        if entries is not None:
+            similarities = [sum(example[index] * value for index, value in entries) for example in self.vectors]
+        else:
+            similarities = [_dot(vector, example) for example in self.vectors]
+        neighbours = sorted(zip(similarities, self.labels), reverse=True)[:self.k]
+        if not neighbours:
+            return None, 0.0, 0.0
+
+        votes: Dict[str, float] = {}
+        for similarity, label in neighbours:
+            votes[label] = votes.get(label, 0.0) + max(similarity, 0.0)
+        label = max(votes, key=votes.get)
+        total = sum(votes.values())
+        return label, neighbours[0][0], votes[label] / total if total else 0.0
+
+    async def classify(self, message: str) -> Dict[str, Any]:
+        """
+        Classify a message into a chat pattern.
+
+        Args:
+            message: The user's message
+
+        Returns:
+            Dict with the `pattern`, the `method` that decided it ("embedding"
+            or "keyword"), the nearest example `similarity` and the vote `share`
+        """
+        if not self.is_loaded:
+            await self.load()
+
+        self.counters["classified"] += 1
+        key = normalize_message(message)
+        cached = self.cache.get(key)
+        if cached is None:
+            # The examples don't change once loaded, so the vote is cached with the embedding
+            vector = await self.embed_message(message)
+            cached = self.cache[key] = (vector, *self.nearest(vector))
+        else:
+            self.counters["cache_hits"] += 1
+        _, label, similarity, share = cached
+        if label is not None and similarity >= self.min_similarity and share >= self.min_share:
+            return {"pattern": label, "method": "embedding", "similarity": similarity, "share": share}
+
+        self.counters["fallbacks"] += 1
+        return {
+            "pattern": self.fallback.pattern_for(message),
+            "method": "keyword",
+            "similarity": similarity,
+            "share": share,
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        return {**self.counters, "examples": len(self.vectors), "cache_size": len(self.cache)}
+
+# Shared classifier; the index is loaded on first use
+intent_classifier = EmbeddingIntentClassifier(
+    create_embedder(),
+    INTENT_EXAMPLES,
+    index_dir=settings.VECTOR_DB_DIR,
+    min_similarity=settings.INTENT_MIN_SIMILARITY,
+)
+metrics_registry.register("intent_classifier", intent_classifier.stats)
@@ -0,0 +1,239 @@
+from typing import Any, Dict, List, Optional, Tuple
+import re
+import string
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Intent routing table. Each intent names the MCP pattern used by the chat
+# routes and the agent used by the coordinator, with weighted keywords.
+# `agent_keywords` only count towards the coordinator's agent: broad words
+# like "course" or "class" say who should answer, but not that a message
+# wants a pattern's tool (a GPA report for academic_progress). Keywords
+# match whole words, with an optional plural "s"/"es".
+INTENT_TABLE: Dict[str, Dict[str, Any]] = {
+    "academic_progress": {
+        "pattern": "academic_progress",
+        "agent": "AcademicAdvisor",
+        "keywords": {
+            "gpa": 3.0,
+            "grade": 2.0,
+            "study plan": 2.5,
+            "transcript": 2.0,
+            "performance": 1.5,
+            "academic": 1.0,
+        },
+        "agent_keywords": {
+            "exam": 1.0,
+            "study": 0.5,
+            "course": 0.5,
+            "class": 0.5,
+        },
+    },
+    "career_guidance": {
+        "pattern": "career_guidance",
+        "agent": "CareerCounselor",
+        "keywords": {
+            "career": 3.0,
+            "job": 2.0,
+            "profession": 2.0,
+            "employment": 2.0,
+            "internship": 2.0,
+            "industry": 1.5,
+            "future": 0.5,
+        },
+    },
+    "planning": {
+        "pattern": "planning",
+        "agent": "AcademicAdvisor",
+        "keywords": {
+            "schedule": 2.0,
+            "semester": 1.5,
+            "degree": 1.5,
+            "prerequisite": 1.5,
+            "plan": 1.0,
+        },
+    },
+    "emotional_support": {
+        "pattern": "general",
+        "agent": "EmotionalSupport",
+        "keywords": {
+            "anxious": 2.0,
+            "stressed": 2.0,
+            "sad": 2.0,
+            "emotion": 2.0,
+            "overwhelmed": 2.0,
+            "feel": 1.5,
+            "feeling": 1.5,
+            "happy": 1.0,
+        },
+    },
+    "project": {
+        "pattern": "general",
+        "agent": "ProjectMentor",
+        "keywords": {
+            "thesis": 2.0,
+            "project": 1.5,
+            "assignment": 1.5,
+            "research": 1.0,
+        },
+    },
+}
+
+DEFAULT_PATTERN = "general"
+DEFAULT_AGENT = "AcademicAdvisor"
+
+class IntentMatch:
+    """
+    Outcome of routing one message.
+
+    `intent`, `agent`, `score` and `scores` count every keyword. `pattern`
+    comes from `pattern_scores`, which leave out `agent_keywords`, so a
+    message can have an intent and still get the default pattern.
+    """
+
+    def __init__(self, intent: Optional[str], pattern: str, agent: str,
+                 score: float, scores: Dict[str, float], matched: List[str],
+                 pattern_scores: Optional[Dict[str, float]] = None):
+        self.intent = intent
+        self.pattern = pattern
+        self.agent = agent
+        self.score = score
+        self.scores = scores
+        self.matched = matched
+        self.pattern_scores = scores if pattern_scores is None else pattern_scores
+
+    def __repr__(self) -> str:
+        return f"IntentMatch(intent={self.intent!r}, pattern={self.pattern!r}, agent={self.agent!r}, score={self.score})"
+
+class IntentRouter:
+    """
+    Routes messages to intents in a single pass over the message.
+
+    The table is compiled into a vocabulary that maps every keyword form
+    (plain, "s" and "es" plurals) to the weights it carries. A message is
+    split into words once and intersected with that vocabulary, which gives
+    whole-word matching at hash-lookup cost whatever the number of keywords.
+    Python's regex engine tries every alternative at every position, so a
+    combined keyword regex was several times slower than this on long
+    messages. Multi-word keywords such as "study plan" are confirmed with
+    their own compiled expression only when all of their words occur, and
+    take precedence over their component words.
+
+    Each distinct keyword found adds its weight to every intent that lists
+    it, and the intent with the highest total wins; ties go to the intent
+    declared first. The pattern is picked the same way from the totals
+    without `agent_keywords`.
+    """
+
+    # Punctuation becomes whitespace, so str.split() yields the words. ASCII
+    # messages are translated as bytes, which is several times faster than
+    # str.translate with a mapping.
+    SEPARATORS = str.maketrans({char: " " for char in string.punctuation})
+    ASCII_SEPARATORS = bytes.maketrans(string.punctuation.encode(), b" " * len(string.punctuation))
+
+    def __init__(self, table: Dict[str, Dict[str, Any]],
+                 default_pattern: str = DEFAULT_PATTERN,
+                 default_agent: str = DEFAULT_AGENT,
+                 min_score: float = 0.5):
+        self.table = table
+        self.default_pattern = default_pattern
+        self.default_agent = default_agent
+        self.min_score = min_score
+        self.order = {intent: index for index, intent in enumerate(table)}
+
+        # keyword -> [(intent, weight, counts towards the pattern)]
+        self.weights: Dict[str, List[Tuple[str, float, bool]]] = {}
+        for intent, spec in table.items():
+            for group, for_pattern in (("keywords", True), ("agent_keywords", False)):
+                for keyword, weight in spec.get(group, {}).items():
+                    self.weights.setdefault(" ".join(keyword.lower().split()), []).append(
+                        (intent, weight, for_pattern))
+
+        # Word form -> keyword, for single-word keywords
+        self.vocabulary: Dict[str, str] = {}
+        # Multi-word keyword -> (words, matcher)
+        self.phrases: Dict[str, Tuple[frozenset, re.Pattern]] = {}
+        for keyword in self.weights:
+            words = keyword.split()
+            if len(words) == 1:
+                for form in (keyword, f"{keyword}s", f"{keyword}es"):
+                    self.vocabulary.setdefault(form, keyword)
+            else:
+                words[-1] = f"{re.escape(words[-1])}(?:e?s)?"
+                matcher = re.compile(r"\b" + r"\s+".join(words) + r"\b")
+                self.phrases[keyword] = (frozenset(keyword.split()), matcher)
+
+        self.phrase_words = frozenset(word for words, _ in self.phrases.values() for word in words)
+        # Every word that matters, intersected with a message's word list
+        # without building a set of all of the message's words
+        self.lookup_words = frozenset(self.vocabulary) | self.phrase_words
+
+    def match_keywords(self, message: str) -> List[str]:
+        """Distinct keywords of the table that occur in a message"""
+        text = message.lower()
+        if text.isascii():
+            words = self.lookup_words.intersection(text.encode().translate(self.ASCII_SEPARATORS).decode().split())
+        else:
+            words = self.lookup_words.intersection(text.translate(self.SEPARATORS).split())
+
+        vocabulary = self.vocabulary
+        matched = {vocabulary[word] for word in words if word in vocabulary}
+        if not words.isdisjoint(self.phrase_words):
+            for keyword, (phrase_words, matcher) in self.phrases.items():
+                if phrase_words.issubset(words | matched) and matcher.search(text):
+                    matched.add(keyword)
+                    # The phrase claims its words, as the longest match would
+                    matched.difference_update(phrase_words)
+        return sorted(matched)
+
+    def route(self, message: str) -> IntentMatch:
+        """
+        Score a message against every intent.
+
+        Args:
+            message: The user's message
+
+        Returns:
+            The best intent, or the defaults when no intent reaches `min_score`
+        """
+        matched = self.match_keywords(message)
+
+        scores: Dict[str, float] = {}
+        pattern_scores: Dict[str, float] = {}
+        for keyword in matched:
+            for intent, weight, for_pattern in self.weights[keyword]:
+                scores[intent] = scores.get(intent, 0.0) + weight
+                if for_pattern:
+                    pattern_scores[intent] = pattern_scores.get(intent, 0.0) + weight
+
+        best = self.best(scores)
+        if best is None:
+            return IntentMatch(None, self.default_pattern, self.default_agent, 0.0, scores, matched, pattern_scores)
+
+        pattern_intent = best if pattern_scores == scores else self.best(pattern_scores)
+        pattern = self.default_pattern
+        if pattern_intent is not None:
+            pattern = self.table[pattern_intent].get("pattern", self.default_pattern)
+        return IntentMatch(best, pattern, self.table[best].get("agent", self.default_agent),
+                           scores[best], scores, matched, pattern_scores)
+
+    def best(self, scores: Dict[str, float]) -> Optional[str]:
+        """Highest scoring intent that reaches `min_score`; ties go to the intent declared first"""
+        best = max(scores, key=lambda intent: (scores[intent], -self.order[intent]), default=None)
+        return best if best is not None and scores[best] >= self.min_score else None
+
+    def pattern_for(self, message: str) -> str:
+        """Name of the MCP pattern for a message"""
+        match = self.route(message)
+        logger.debug(f"Routed message to pattern {match.pattern} (scores {match.pattern_scores})")
+        return match.pattern
+
+    def agent_for(self, message: str) -> str:
+        """Name of the agent for a message"""
+        match = self.route(message)
+        logger.debug(f"Routed message to agent {match.agent} (scores {match.scores})")
+        return match.agent
+
+# Shared router used by the API routes and the agent coordinator
+intent_router = IntentRouter(INTENT_TABLE)
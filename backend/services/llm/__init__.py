@@ -0,0 +1,15 @@
+from services.llm.scheduler import llm_scheduler, LLMQueueFull
+from services.llm.providers import LLMProvider, provider_registry, get_provider
+from services.llm.hedging import LLMDeadlineExceeded, latency_tracker, llm_hedger
+from services.llm.client import sample_text, stream_text, sampling_handler
+from services.llm.cache import SampleCache, sample_cache, cached_sample
+from services.llm.structured import sample_structured, structured_output_stats
+
+__all__ = [
+    "LLMProvider", "provider_registry", "get_provider",
+    "sample_text", "stream_text", "sampling_handler",
+    "SampleCache", "sample_cache", "cached_sample",
+    "sample_structured", "structured_output_stats",
+    "llm_scheduler", "LLMQueueFull",
+    "LLMDeadlineExceeded", "latency_tracker", "llm_hedger",
+]
@@ -0,0 +1,194 @@
+from typing import Any, Callable, Dict, List, Optional, Union
+import hashlib
+import json
+import re
+import logging
+from cachetools import TTLCache
+from mcp.types import SamplingMessage, TextContent
+
+from core.config import settings
+from core.utils.metrics import metrics_registry
+from core.utils.redis_client import get_async_redis_client, async_redis_available, mark_async_redis_failure
+from core.utils.singleflight import create_single_flight
+from services.llm.providers import provider_registry
+from services.llm.client import context_sample
+
+logger = logging.getLogger(__name__)
+
+_WHITESPACE = re.compile(r"\s+")
+
+def normalize_prompt(messages: Union[str, List[Union[str, SamplingMessage]]]) -> List[List[str]]:
+    """Reduce a sampling prompt to (role, text) pairs with whitespace collapsed"""
+    if isinstance(messages, str):
+        messages = [messages]
+
+    normalized = []
+    for message in messages:
+        if isinstance(message, str):
+            role, text = "user", message
+        else:
+            role, text = message.role, getattr(message.content, "text", "")
+        normalized.append([role, _WHITESPACE.sub(" ", text).strip()])
+    return normalized
+
+class SampleCache:
+    """
+    Exact-match cache for LLM sampling results.
+
+    Lookups go to an in-process LRU first and to Redis second, so a result
+    sampled by one worker serves identical prompts on every worker. Keys
+    combine the normalized prompt with the model and sampling parameters.
+    Redis errors are logged and treated as misses.
+    """
+
+    def __init__(self, namespace: str = "sample", maxsize: int = 1024,
+                 local_ttl: float = 600.0, default_ttl: int = 21600, use_redis: bool = True):
+        self.namespace = namespace
+        self.default_ttl = default_ttl
+        self.use_redis = use_redis
+        self.local = TTLCache(maxsize=maxsize, ttl=local_ttl)
+        self.counters: Dict[str, Dict[str, int]] = {}
+
+    def make_key(self,
+                 messages: Union[str, List[Union[str, SamplingMessage]]],
+                 system_prompt: Optional[str] = None,
+                 temperature: Optional[float] = None,
+                 max_tokens: Optional[int] = None,
+                 model: Optional[str] = None,
+                 response_schema: Optional[Dict[str, Any]] = None) -> str:
+        """Build the cache key for a sampling request"""
+        payload = {
+            "messages": normalize_prompt(messages),
+            "system": _WHITESPACE.sub(" ", system_prompt).strip() if system_prompt else None,
+            "temperature": temperature,
+            "max_tokens": max_tokens,
+            "model": model or provider_registry.model_id(),
+        }
+        if response_schema is not None:
+            payload["response_schema"] = response_schema
+        digest = hashlib.sha256(json.dumps(payload, sort_keys=True).encode("utf-8")).hexdigest()
+        return f"{self.namespace}:{digest}"
+
+    def _count(self, tool: str, outcome: str) -> None:
+        counts = self.counters.setdefault(tool, {"local_hits": 0, "redis_hits": 0, "misses": 0})
+        counts[outcome] += 1
+
+    async def get(self, key: str, tool: str = "unknown") -> Optional[str]:
+        """Look a key up in the local tier, then in Redis"""
+        value = self.local.get(key)
+        if value is not None:
+            self._count(tool, "local_hits")
+            return value
+
+        if self.use_redis and async_redis_available():
+            try:
+                value = await get_async_redis_client().get(key)
+            except Exception as e:
+                mark_async_redis_failure()
+                logger.warning(f"Sample cache read from Redis failed: {str(e)}")
+                value = None
+            if value is not None:
+                self.local[key] = value
+                self._count(tool, "redis_hits")
+                return value
+
+        self._count(tool, "misses")
+        return None
+
+    async def set(self, key: str, value: str, ttl: Optional[int] = None) -> None:
+        """Store a value in both tiers"""
+        self.local[key] = value
+        if self.use_redis and async_redis_available():
+            try:
+                await get_async_redis_client().set(key, value, ex=ttl or self.default_ttl)
+            except Exception as e:
+                mark_async_redis_failure()
+                logger.warning(f"Sample cache write to Redis failed: {str(e)}")
+
+    def clear_local(self) -> None:
+        self.local.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit and miss counts per tool, plus totals"""
+        totals = {"local_hits": 0, "redis_hits": 0, "misses": 0}
+        for counts in self.counters.values():
+            for outcome, count in counts.items():
+                totals[outcome] += count
+        lookups = sum(totals.values())
+        hits = totals["local_hits"] + totals["redis_hits"]
+        return {
+            **totals,
+            "hit_rate": round(hits / lookups, 3) if lookups else 0.0,
+            "local_size": len(self.local),
+            "tools": {tool: dict(counts) for tool, counts in self.counters.items()},
+        }
+
+# Shared cache instance
+sample_cache = SampleCache(
+    maxsize=settings.SAMPLE_CACHE_LOCAL_SIZE,
+    default_ttl=settings.SAMPLE_CACHE_TTL_SECONDS,
+    use_redis=settings.SAMPLE_CACHE_USE_REDIS,
+)
+metrics_registry.register("sample_cache", sample_cache.stats)
+
+# Identical prompts sampled concurrently share one LLM call
+sample_flight = create_single_flight("sample")
+metrics_registry.register("sample_singleflight", sample_flight.stats)
+
+async def cached_sample(ctx: Any,
+                        messages: Union[str, List[Union[str, SamplingMessage]]],
+                        *,
+                        tool: str,
+                        system_prompt: Optional[str] = None,
+                        temperature: Optional[float] = None,
+                        max_tokens: Optional[int] = None,
+                        cache: bool = True,
+                        ttl: Optional[int] = None,
+                        response_schema: Optional[Dict[str, Any]] = None,
+                        accept: Optional[Callable[[str], bool]] = None) -> TextContent:
+    """
+    Call `ctx.sample` through the shared sampling cache.
+
+    On a cache miss, concurrent calls with the same key (in this worker or,
+    through Redis, in others) share a single sampling request.
+
+    Args:
+        ctx: The FastMCP context of the calling tool
+        messages: Prompt text or sampling messages, as for `ctx.sample`
+        tool: Name of the calling tool, used for per-tool statistics
+        system_prompt: Optional system prompt
+        temperature: Optional sampling temperature
+        max_tokens: Optional cap on generated tokens
+        cache: Set to False to opt the call out of caching; tools listed in
+            `settings.SAMPLE_CACHE_DISABLED_TOOLS` are never cached
+        ttl: Redis TTL in seconds; defaults to `settings.SAMPLE_CACHE_TTL_SECONDS`
+        response_schema: Optional JSON schema the reply must match
+        accept: Optional check of the sampled text; text it rejects is
+            returned but not cached
+
+    Returns:
+        The sampled content, as returned by `ctx.sample`
+    """
+    if not cache or not settings.SAMPLE_CACHE_ENABLED or tool in settings.SAMPLE_CACHE_DISABLED_TOOLS:
+        return await context_sample(ctx, messages, system_prompt=system_prompt, temperature=temperature,
+                                    max_tokens=max_tokens, response_schema=response_schema)
+
+    key = sample_cache.make_key(messages, system_prompt, temperature, max_tokens,
+                                response_schema=response_schema)
+    cached = await sample_cache.get(key, tool)
+    if cached is not None:
+        return TextContent(type="text", text=cached)
+
+    async def sample() -> str:
+        response = await context_sample(ctx, messages, system_prompt=system_prompt, temperature=temperature,
+                                        max_tokens=max_tokens, response_schema=response_schema)
+        text = getattr(response, "text", None)
+        if text and (accept is None or accept(text)):
+            await sample_cache.set(key, text, ttl)
+        return text or ""
+
+    if settings.SINGLEFLIGHT_ENABLED:
+        text = await sample_flight.do(key, sample)
+    else:
+        text = await sample()
+    return TextContent(type="text", text=text)
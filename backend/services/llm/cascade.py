@@ -0,0 +1,145 @@
+from typing import Any, Dict, List, Optional, Tuple
+import re
+import time
+import logging
+from langchain_core.messages import SystemMessage
+
+from core.config import settings
+from core.utils.metrics import metrics_registry
+from services.llm.client import complete_text
+from services.llm.scheduler import LLMQueueFull, PRIORITY_INTERACTIVE
+from services.llm.hedging import LLMDeadlineExceeded
+
+logger = logging.getLogger(__name__)
+
+# Patterns whose answers depend on student data the small model doesn't get
+TOOL_PATTERNS = {"academic_progress", "career_guidance", "planning"}
+
+CONFIDENCE_INSTRUCTIONS = """
+After your reply, add one last line of the form "CONFIDENCE: <number between 0 and 1>"
+saying how sure you are that the reply fully and correctly answers the student.
+Use a low number if the question needs the student's grades, courses or plans,
+specialised knowledge, or careful multi-step reasoning.
+"""
+
+_CONFIDENCE_LINE = re.compile(r"\s*\**confidence\**\s*[:=]\s*\**\s*([0-9]*\.?[0-9]+)\s*(%?)\s*\**\s*$", re.IGNORECASE)
+
+# Decisions, as logged and counted per pattern
+ACCEPTED = "accepted"
+LOW_CONFIDENCE = "low_confidence"
+TOOL_INTENT = "tool_intent"
+TOO_LONG = "too_long"
+DRAFT_FAILED = "draft_failed"
+
+def parse_confidence(text: str) -> Tuple[str, Optional[float]]:
+    """
+    Split the trailing confidence line off a draft.
+
+    Returns:
+        Tuple of (draft without the confidence line, confidence in [0, 1] or
+        None when the model didn't give one)
+    """
+    lines = text.rstrip().splitlines()
+    if not lines:
+        return "", None
+    match = _CONFIDENCE_LINE.fullmatch(lines[-1])
+    if match is None:
+        return text.strip(), None
+    confidence = float(match.group(1))
+    if match.group(2) or confidence > 1:
+        confidence /= 100
+    return "\n".join(lines[:-1]).strip(), min(max(confidence, 0.0), 1.0)
+
+class ModelCascade:
+    """
+    Answers easy chat messages with a small model and escalates the rest.
+
+    The small model drafts the reply and rates its own confidence. The
+    draft is used when the confidence reaches the pattern's threshold;
+    otherwise the main model answers as usual. Messages whose pattern
+    needs the student's data, and long messages, go to the main model
+    without a draft. Every decision is logged and counted per pattern so
+    the thresholds can be tuned from /metrics.
+    """
+
+    def __init__(self, provider: Optional[str], enabled: bool = False, min_confidence: float = 0.7,
+                 min_confidence_by_pattern: Optional[Dict[str, float]] = None,
+                 max_message_chars: int = 400, draft_max_tokens: int = 300, draft_timeout: float = 5.0):
+        self.provider = provider
+        self.enabled = enabled
+        self.min_confidence = min_confidence
+        self.min_confidence_by_pattern = min_confidence_by_pattern or {}
+        self.max_message_chars = max_message_chars
+        self.draft_max_tokens = draft_max_tokens
+        self.draft_timeout = draft_timeout
+        self.decisions: Dict[str, Dict[str, int]] = {}
+
+    @property
+    def active(self) -> bool:
+        return self.enabled and bool(self.provider) and self.provider != settings.LLM_PROVIDER
+
+    def threshold(self, pattern: str) -> float:
+        return self.min_confidence_by_pattern.get(pattern, self.min_confidence)
+
+    def _record(self, pattern: str, decision: str, confidence: Optional[float] = None,
+                draft_ms: Optional[float] = None) -> Dict[str, Any]:
+        counts = self.decisions.setdefault(pattern, {})
+        counts[decision] = counts.get(decision, 0) + 1
+        logger.info(f"Cascade pattern={pattern} decision={decision} confidence={confidence} draft_ms={draft_ms}")
+        return {"decision": decision, "confidence": confidence, "draft_ms": draft_ms}
+
+    def draft_messages(self, langchain_messages: List) -> List:
+        """The main model's messages, with the confidence instructions added to the system prompt"""
+        if langchain_messages and isinstance(langchain_messages[0], SystemMessage):
+            system = SystemMessage(content=f"{langchain_messages[0].content}\n{CONFIDENCE_INSTRUCTIONS}")
+            return [system, *langchain_messages[1:]]
+        return [SystemMessage(content=CONFIDENCE_INSTRUCTIONS), *langchain_messages]
+
+    async def try_draft(self, message: str, pattern: str, langchain_messages: List) -> Tuple[Optional[str], Dict[str, Any]]:
+        """
+        Draft a reply with the small model and decide whether to keep it.
+
+        Args:
+            message: The user's message
+            pattern: Pattern the message was classified as
+            langchain_messages: Messages the main model would get
+
+        Returns:
+            Tuple of (accepted draft or None to escalate, decision details)
+        """
+        if pattern in TOOL_PATTERNS:
+            return None, self._record(pattern, TOOL_INTENT)
+        if len(message) > self.max_message_chars:
+            return None, self._record(pattern, TOO_LONG)
+
+        started = time.perf_counter()
+        try:
+            text = await complete_text(self.draft_messages(langchain_messages), PRIORITY_INTERACTIVE,
+                                       max_tokens=self.draft_max_tokens, provider=self.provider,
+                                       deadline=self.draft_timeout, hedge=False)
+        except (LLMQueueFull, LLMDeadlineExceeded) as e:
+            logger.warning(f"Cascade draft skipped: {str(e)}")
+            return None, self._record(pattern, DRAFT_FAILED)
+        except Exception as e:
+            logger.error(f"Cascade draft failed: {str(e)}")
+            return None, self._record(pattern, DRAFT_FAILED)
+        draft_ms = round((time.perf_counter() - started) * 1000, 1)
+
+        draft, confidence = parse_confidence(text)
+        if not draft or confidence is None or confidence < self.threshold(pattern):
+            return None, self._record(pattern, LOW_CONFIDENCE, confidence, draft_ms)
+        return draft, self._record(pattern, ACCEPTED, confidence, draft_ms)
+
+    def stats(self) -> Dict[str, Any]:
+        return {"active": self.active, "provider": self.provider, "patterns": self.decisions}
+
+model_cascade = ModelCascade(
+    settings.LLM_CASCADE_PROVIDER,
+    enabled=settings.LLM_CASCADE_ENABLED,
+    min_confidence=settings.LLM_CASCADE_MIN_CONFIDENCE,
+    min_confidence_by_pattern=settings.LLM_CASCADE_MIN_CONFIDENCE_BY_PATTERN,
+    max_message_chars=settings.LLM_CASCADE_MAX_MESSAGE_CHARS,
+    draft_max_tokens=settings.LLM_CASCADE_DRAFT_MAX_TOKENS,
+    draft_timeout=settings.LLM_CASCADE_DRAFT_TIMEOUT_SECONDS,
+)
+metrics_registry.register("llm_cascade", model_cascade.stats)
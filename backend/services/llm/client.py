@@ -0,0 +1,179 @@
+from typing import Any, AsyncIterator, Dict, List, Optional, Union
+import os
+import logging
+from langchain_core.messages import SystemMessage, HumanMessage, AIMessage
+from mcp.types import SamplingMessage, TextContent
+from core.config import settings
+from services.llm.providers import provider_registry
+from services.llm.scheduler import llm_scheduler, LLMQueueFull, PRIORITY_INTERACTIVE, PRIORITY_TOOL
+from services.llm.hedging import llm_hedger
+
+logger = logging.getLogger(__name__)
+
+if "GOOGLE_API_KEY" not in os.environ:
+    os.environ["GOOGLE_API_KEY"] = settings.GOOGLE_API_KEY
+
+def to_langchain_messages(messages: Union[str, List[Union[str, SamplingMessage]]],
+                          system_prompt: Optional[str] = None) -> List:
+    """Convert MCP sampling messages into LangChain messages"""
+    if isinstance(messages, str):
+        messages = [messages]
+
+    langchain_messages = [SystemMessage(content=system_prompt)] if system_prompt else []
+    for message in messages:
+        if isinstance(message, str):
+            langchain_messages.append(HumanMessage(content=message))
+            continue
+
+        text = getattr(message.content, "text", "")
+        if message.role == "assistant":
+            langchain_messages.append(AIMessage(content=text))
+        else:
+            langchain_messages.append(HumanMessage(content=text))
+    return langchain_messages
+
+async def complete_text(langchain_messages: List, priority: str = PRIORITY_TOOL,
+                        temperature: Optional[float] = None,
+                        max_tokens: Optional[int] = None,
+                        provider: Optional[str] = None,
+                        deadline: Optional[float] = None,
+                        hedge: bool = True,
+                        response_schema: Optional[Dict[str, Any]] = None) -> str:
+    """
+    Generate a full reply to LangChain messages through the scheduler.
+
+    Args:
+        langchain_messages: Messages to send to the LLM
+        priority: Scheduler priority class of the call
+        temperature: Optional sampling temperature
+        max_tokens: Optional cap on generated tokens
+        provider: Provider name; defaults to `settings.LLM_PROVIDER`
+        deadline: Seconds the call may take; defaults to `settings.LLM_REQUEST_DEADLINE_SECONDS`
+        hedge: Whether a slow call may be hedged to the hedge provider
+        response_schema: JSON schema the reply must match, for providers
+            with a native JSON/schema mode
+
+    Returns:
+        The generated text
+
+    Raises:
+        LLMDeadlineExceeded: If no provider answers before the deadline
+    """
+    async def generate(name: str) -> str:
+        llm = provider_registry.get(name)
+        async with llm_scheduler.slot(provider=llm.name, priority=priority):
+            return await llm.generate(langchain_messages, temperature=temperature, max_tokens=max_tokens,
+                                      response_schema=response_schema)
+
+    _, text = await llm_hedger.race(provider_registry.resolve(provider), "generate", generate, deadline,
+                                    can_hedge=has_capacity if hedge else lambda name: False)
+    return text
+
+async def sample_text(messages: Union[str, List[Union[str, SamplingMessage]]],
+                      system_prompt: Optional[str] = None,
+                      temperature: Optional[float] = None,
+                      max_tokens: Optional[int] = None,
+                      provider: Optional[str] = None,
+                      response_schema: Optional[Dict[str, Any]] = None) -> str:
+    """
+    Run an MCP sampling request against the LLM.
+
+    Args:
+        messages: Prompt text or MCP sampling messages
+        system_prompt: Optional system prompt
+        temperature: Optional sampling temperature
+        max_tokens: Optional cap on generated tokens
+        provider: Provider name; defaults to `settings.LLM_PROVIDER`
+        response_schema: Optional JSON schema the reply must match
+
+    Returns:
+        The generated text
+
+    Raises:
+        LLMDeadlineExceeded: If no provider answers within `settings.LLM_REQUEST_DEADLINE_SECONDS`
+    """
+    return await complete_text(to_langchain_messages(messages, system_prompt), PRIORITY_TOOL,
+                               temperature=temperature, max_tokens=max_tokens, provider=provider,
+                               response_schema=response_schema)
+
+def has_capacity(provider: str) -> bool:
+    """Whether the scheduler would queue another call for a provider, used before hedging to it"""
+    try:
+        llm_scheduler.check_admission(provider=provider)
+    except LLMQueueFull:
+        return False
+    return True
+
+async def stream_text(langchain_messages: List, priority: str = PRIORITY_INTERACTIVE,
+                      student_id: Optional[str] = None,
+                      provider: Optional[str] = None) -> AsyncIterator[str]:
+    """
+    Stream text deltas from the LLM, holding a scheduler slot while streaming.
+
+    When hedging is enabled and the provider is slow to send its first
+    token, the hedge provider is started too and the first to answer is used.
+
+    Args:
+        langchain_messages: Messages to send to the LLM
+        priority: Scheduler priority class of the call
+        student_id: Student the call is accounted to
+        provider: Provider name; defaults to `settings.LLM_PROVIDER`
+
+    Yields:
+        Text deltas in arrival order, possibly empty
+
+    Raises:
+        LLMDeadlineExceeded: If the reply is not complete within `settings.LLM_REQUEST_DEADLINE_SECONDS`
+    """
+    async def open_stream(name: str) -> AsyncIterator[str]:
+        llm = provider_registry.get(name)
+        async with llm_scheduler.slot(provider=llm.name, priority=priority, student_id=student_id):
+            async for text in llm.stream(langchain_messages):
+                yield text
+
+    async for text in llm_hedger.stream(provider_registry.resolve(provider), open_stream, can_hedge=has_capacity):
+        yield text
+
+async def sampling_handler(messages: List[SamplingMessage], params: Any, context: Any) -> str:
+    """Sampling handler for MCP clients, so `ctx.sample` in tools reaches the LLM"""
+    return await sample_text(
+        messages,
+        system_prompt=params.systemPrompt,
+        temperature=params.temperature,
+        max_tokens=params.maxTokens,
+        response_schema=(params.metadata or {}).get("response_schema"),
+    )
+
+async def context_sample(ctx: Any,
+                         messages: Union[str, List[Union[str, SamplingMessage]]],
+                         system_prompt: Optional[str] = None,
+                         temperature: Optional[float] = None,
+                         max_tokens: Optional[int] = None,
+                         response_schema: Optional[Dict[str, Any]] = None) -> TextContent:
+    """
+    `ctx.sample` with an optional JSON schema for the reply.
+
+    In-process contexts take the schema directly. Over an MCP session it
+    travels in the sampling request's metadata, where `sampling_handler`
+    picks it up.
+    """
+    if response_schema is None:
+        return await ctx.sample(messages, system_prompt=system_prompt, temperature=temperature, max_tokens=max_tokens)
+    if getattr(ctx, "accepts_response_schema", False):
+        return await ctx.sample(messages, system_prompt=system_prompt, temperature=temperature,
+                                max_tokens=max_tokens, response_schema=response_schema)
+
+    if isinstance(messages, str):
+        messages = [messages]
+    sampling_messages = [
+        SamplingMessage(role="user", content=TextContent(type="text", text=message)) if isinstance(message, str) else message
+        for message in messages
+    ]
+    result = await ctx.request_context.session.create_message(
+        messages=sampling_messages,
+        system_prompt=system_prompt,
+        temperature=temperature,
+        max_tokens=max_tokens or 512,
+        metadata={"response_schema": response_schema},
+    )
+    return result.content
@@ -0,0 +1,241 @@
+from typing import Any, AsyncIterator, Awaitable, Callable, Deque, Dict, Optional, Tuple, TypeVar
+from collections import deque
+import asyncio
+import time
+import logging
+
+from core.config import settings
+from core.utils.metrics import metrics_registry
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+class LLMDeadlineExceeded(Exception):
+    """Raised when an LLM call does not finish before its deadline"""
+
+class LatencyTracker:
+    """
+    Rolling latency samples per provider and operation.
+
+    Operations are "generate" (time to the full reply) and "ttft" (time to
+    the first streamed token). The hedge delay of a provider is a
+    percentile of its recent samples, clamped to a configured range.
+    """
+
+    def __init__(self, window: int = 500, percentile: float = 0.95, default_delay_ms: float = 2000.0,
+                 min_delay_ms: float = 200.0, max_delay_ms: float = 10000.0, min_samples: int = 20):
+        self.window = window
+        self.percentile = percentile
+        self.default_delay_ms = default_delay_ms
+        self.min_delay_ms = min_delay_ms
+        self.max_delay_ms = max_delay_ms
+        self.min_samples = min_samples
+        self.samples: Dict[Tuple[str, str], Deque[float]] = {}
+
+    def record(self, provider: str, operation: str, latency_ms: float) -> None:
+        key = (provider, operation)
+        samples = self.samples.get(key)
+        if samples is None:
+            samples = self.samples[key] = deque(maxlen=self.window)
+        samples.append(latency_ms)
+
+    def quantile(self, provider: str, operation: str, q: float) -> Optional[float]:
+        """The `q` quantile of recent samples, or None without enough of them"""
+        samples = self.samples.get((provider, operation))
+        if not samples or len(samples) < self.min_samples:
+            return None
+        ordered = sorted(samples)
+        return ordered[min(int(len(ordered) * q), len(ordered) - 1)]
+
+    def hedge_delay(self, provider: str, operation: str) -> float:
+        """Seconds to wait on a provider before hedging to another one"""
+        delay_ms = self.quantile(provider, operation, self.percentile)
+        if delay_ms is None:
+            delay_ms = self.default_delay_ms
+        return min(max(delay_ms, self.min_delay_ms), self.max_delay_ms) / 1000
+
+    def stats(self) -> Dict[str, Any]:
+        snapshot: Dict[str, Any] = {}
+        for (provider, operation), samples in self.samples.items():
+            quantiles = {f"p{round(q * 100)}_ms": self.quantile(provider, operation, q) for q in (0.5, 0.95, 0.99)}
+            snapshot.setdefault(provider, {})[operation] = {
+                "samples": len(samples),
+                **{name: round(value, 1) if value is not None else None for name, value in quantiles.items()},
+                "hedge_delay_ms": round(self.hedge_delay(provider, operation) * 1000, 1),
+            }
+        return snapshot
+
+class LLMHedger:
+    """
+    Runs LLM calls against a deadline, hedging slow calls to a second provider.
+
+    The call starts on the primary provider. If it has not answered after
+    the primary's hedge delay, or it fails, the same call is started on the
+    hedge provider; whichever answers first wins and the other is
+    cancelled. Without a hedge provider only the deadline applies.
+    """
+
+    def __init__(self, tracker: LatencyTracker, hedge_provider: Optional[str] = None, enabled: bool = False,
+                 deadline: float = 60.0):
+        self.tracker = tracker
+        self.hedge_provider = hedge_provider
+        self.enabled = enabled
+        self.deadline = deadline
+        self.counters = {"calls": 0, "hedged": 0, "hedge_wins": 0, "failovers": 0, "deadline_exceeded": 0}
+
+    def hedge_for(self, primary: str) -> Optional[str]:
+        """Provider to hedge calls to `primary` with, if any"""
+        if not self.enabled or not self.hedge_provider or self.hedge_provider == primary:
+            return None
+        return self.hedge_provider
+
+    async def race(self, primary: str, operation: str, start: Callable[[str], Awaitable[T]],
+                   deadline: Optional[float] = None,
+                   discard: Optional[Callable[[T], Awaitable[None]]] = None,
+                   can_hedge: Optional[Callable[[str], bool]] = None) -> Tuple[str, T]:
+        """
+        Run `start(provider)` on the primary provider, hedged as configured.
+
+        Args:
+            primary: Provider the call is meant for
+            operation: Latency operation the call is measured as
+            start: Starts the call on a provider and returns its result
+            deadline: Seconds the call may take; defaults to `settings.LLM_REQUEST_DEADLINE_SECONDS`
+            discard: Releases a result that finished but lost the race
+            can_hedge: Whether the hedge provider may take the call right now
+
+        Returns:
+            Tuple of (provider that answered, its result)
+
+        Raises:
+            LLMDeadlineExceeded: If no provider answers before the deadline
+        """
+        self.counters["calls"] += 1
+        started = time.perf_counter()
+        deadline_at = started + (deadline or self.deadline)
+        hedge = self.hedge_for(primary)
+        hedge_at = started + self.tracker.hedge_delay(primary, operation) if hedge else None
+
+        tasks: Dict[asyncio.Future, Tuple[str, float]] = {
+            asyncio.ensure_future(start(primary)): (primary, started)
+        }
+        error: Optional[BaseException] = None
+        hedged = False
+
+        def start_hedge(reason: str) -> bool:
+            nonlocal hedged
+            hedged = True
+            if can_hedge is not None and not can_hedge(hedge):
+                return False
+            self.counters["hedged" if reason == "slow" else "failovers"] += 1
+            logger.info(f"Hedging {operation} call on {primary} to {hedge} ({reason})")
+            tasks[asyncio.ensure_future(start(hedge))] = (hedge, time.perf_counter())
+            return True
+
+        try:
+            while True:
+                now = time.perf_counter()
+                if now >= deadline_at:
+                    self.counters["deadline_exceeded"] += 1
+                    raise LLMDeadlineExceeded(
+                        f"LLM {operation} call on {primary} did not finish within {deadline_at - started:.1f}s"
+                    )
+                timeout = deadline_at - now
+                if hedge and not hedged:
+                    timeout = min(timeout, max(hedge_at - now, 0))
+
+                done, _ = await asyncio.wait(tasks, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    provider, task_started = tasks.pop(task)
+                    if task.exception() is not None:
+                        error = task.exception()
+                        logger.warning(f"LLM {operation} call on {provider} failed: {str(error)}")
+                        continue
+
+                    self.tracker.record(provider, operation, (time.perf_counter() - task_started) * 1000)
+                    if provider != primary:
+                        self.counters["hedge_wins"] += 1
+                    return provider, task.result()
+
+                if hedge and not hedged:
+                    if not tasks:
+                        start_hedge("failover")
+                    elif time.perf_counter() >= hedge_at:
+                        start_hedge("slow")
+                if not tasks:
+                    raise error
+        finally:
+            cancelled = []
+            for task, (provider, task_started) in tasks.items():
+                if task.done() and not task.cancelled() and task.exception() is None:
+                    if discard is not None:
+                        await discard(task.result())
+                    continue
+                task.cancel()
+                cancelled.append(task)
+                if provider == primary:
+                    # A lower bound, but it keeps slow primaries from looking fast
+                    self.tracker.record(provider, operation, (time.perf_counter() - task_started) * 1000)
+            # Let the losers unwind, closing their streams and connections before returning
+            await asyncio.gather(*cancelled, return_exceptions=True)
+
+    async def stream(self, primary: str, open_stream: Callable[[str], AsyncIterator[str]],
+                     deadline: Optional[float] = None,
+                     can_hedge: Optional[Callable[[str], bool]] = None) -> AsyncIterator[str]:
+        """
+        Stream from the provider that sends its first token first.
+
+        Hedging is decided on time to first token; once a stream has won,
+        the rest of it is read under the same overall deadline.
+
+        Raises:
+            LLMDeadlineExceeded: If the stream does not finish before the deadline
+        """
+        deadline = deadline or self.deadline
+        started = time.perf_counter()
+
+        async def first_chunk(provider: str) -> Tuple[AsyncIterator[str], Optional[str]]:
+            stream = open_stream(provider).__aiter__()
+            try:
+                return stream, await stream.__anext__()
+            except StopAsyncIteration:
+                return stream, None
+
+        async def discard(result: Tuple[AsyncIterator[str], Optional[str]]) -> None:
+            await result[0].aclose()
+
+        _, (stream, chunk) = await self.race(primary, "ttft", first_chunk, deadline, discard, can_hedge)
+        try:
+            while chunk is not None:
+                yield chunk
+                remaining = deadline - (time.perf_counter() - started)
+                try:
+                    chunk = await asyncio.wait_for(stream.__anext__(), max(remaining, 0))
+                except StopAsyncIteration:
+                    chunk = None
+                except asyncio.TimeoutError:
+                    self.counters["deadline_exceeded"] += 1
+                    raise LLMDeadlineExceeded(f"LLM stream did not finish within {deadline:.1f}s")
+        finally:
+            await stream.aclose()
+
+    def stats(self) -> Dict[str, Any]:
+        return {**self.counters, "hedge_provider": self.hedge_for(settings.LLM_PROVIDER)}
+
+latency_tracker = LatencyTracker(
+    window=settings.LLM_LATENCY_WINDOW,
+    percentile=settings.LLM_HEDGE_PERCENTILE,
+    default_delay_ms=settings.LLM_HEDGE_DEFAULT_DELAY_MS,
+    min_delay_ms=settings.LLM_HEDGE_MIN_DELAY_MS,
+    max_delay_ms=settings.LLM_HEDGE_MAX_DELAY_MS,
+    min_samples=settings.LLM_HEDGE_MIN_SAMPLES,
+)
+llm_hedger = LLMHedger(
+    latency_tracker,
+    hedge_provider=settings.LLM_HEDGE_PROVIDER,
+    enabled=settings.LLM_HEDGE_ENABLED,
+    deadline=settings.LLM_REQUEST_DEADLINE_SECONDS,
+)
+metrics_registry.register("llm_latency", latency_tracker.stats)
+metrics_registry.register("llm_hedging", llm_hedger.stats)
@@ -0,0 +1,275 @@
+from typing import Any, Callable, Dict, List, Optional
+import hashlib
+import json
+import math
+import logging
+
+from core.config import settings
+from core.utils.metrics import metrics_registry
+
+logger = logging.getLogger(__name__)
+
+def estimate_tokens(text: str) -> int:
+    """
+    Estimate the number of tokens in a text.
+
+    Gemini and most BPE tokenizers average close to four characters per
+    token on English prose and compact data, which is accurate enough for
+    budgeting without a round trip to the provider's token counting API.
+    """
+    return math.ceil(len(text) / 4) if text else 0
+
+# Token counter used for budgets and reports; replaceable with an exact tokenizer
+token_counter: Callable[[str], int] = estimate_tokens
+
+def count_tokens(text: str) -> int:
+    return token_counter(text)
+
+class ContextSection:
+    """
+    How one field of the prompt data is serialized.
+
+    Args:
+        name: Key of the data in the dict passed to `serialize_context`
+        fields: Record fields to keep, in output order; None keeps every field
+        priority: Higher priority sections are kept longer under a tight budget
+        required: Required sections are never dropped, only their rows trimmed
+        label: Heading used in the prompt; defaults to `name`
+    """
+
+    def __init__(self, name: str, fields: Optional[List[str]] = None, priority: int = 50,
+                 required: bool = False, label: Optional[str] = None):
+        self.name = name
+        self.fields = fields
+        self.priority = priority
+        self.required = required
+        self.label = label or name
+
+# Fields each prompt needs from the data it is given. Sections absent from a
+# profile are left out of the prompt, unless the profile is open (None).
+COURSE_FIELDS = ["id", "name", "credits", "grade", "semester"]
+CATALOG_FIELDS = ["id", "name", "department", "credits", "prerequisites", "description"]
+
+CONTEXT_PROFILES: Dict[str, Optional[List[ContextSection]]] = {
+    "general": [
+        ContextSection("student_profile", ["name", "major", "year", "gpa", "interests", "career_goals"],
+                       priority=100, label="profile"),
+        ContextSection("academic_summary", ["gpa", "total_credits", "course_count"], priority=70, label="totals"),
+        ContextSection("student_courses", COURSE_FIELDS, priority=50, label="courses"),
+        ContextSection("relevant_courses", ["id", "name", "department", "credits", "description"],
+                       priority=40, label="matching catalog courses"),
+    ],
+    "academic_progress": [
+        ContextSection("courses", COURSE_FIELDS + ["grade_points"], priority=100, required=True),
+        ContextSection("goals", priority=60),
+    ],
+    "academic_analysis": [
+        ContextSection("analysis", ["strengths", "weaknesses", "recommendations"], priority=100, required=True),
+    ],
+    "career_guidance": [
+        ContextSection("interests", priority=100, required=True),
+        ContextSection("skills", priority=90),
+        ContextSection("career_goals", priority=80),
+        ContextSection("courses", ["id", "name", "grade"], priority=40),
+    ],
+    "career_paths": [
+        ContextSection("career_paths", ["path_name", "skills_to_develop", "recommended_courses"],
+                       priority=100, required=True),
+    ],
+    "study_plan": [
+        ContextSection("course", CATALOG_FIELDS + ["topics"], priority=100, required=True),
+    ],
+    "semester_schedule": [
+        ContextSection("courses", ["id", "name", "credits", "schedule"], priority=100, required=True),
+    ],
+    "degree_path": [
+        ContextSection("courses", ["id", "name", "department", "credits", "prerequisites"],
+                       priority=50, required=True),
+        ContextSection("completed_courses", priority=100, required=True),
+    ],
+    # Arbitrary tool results: keep every field, only encode compactly
+    "tool_result": None,
+}
+
+class SerializedContext:
+    """Result of `serialize_context`"""
+
+    def __init__(self, text: str, tokens: int, baseline_tokens: int, dropped: List[str]):
+        self.text = text
+        self.tokens = tokens
+        self.baseline_tokens = baseline_tokens
+        self.dropped = dropped
+
+    @property
+    def tokens_saved(self) -> int:
+        return max(self.baseline_tokens - self.tokens, 0)
+
+    def __str__(self) -> str:
+        return self.text
+
+# --- Compact encoding ---
+
+def _scalar(value: Any) -> str:
+    if value is None:
+        return "-"
+    if isinstance(value, bool):
+        return "yes" if value else "no"
+    if isinstance(value, float):
+        return f"{value:g}"
+    return str(value).replace("\n", " ")
+
+def _inline(value: Any) -> str:
+    """Encode a value on a single line"""
+    if isinstance(value, dict):
+        return "{" + "; ".join(f"{key}={_inline(item)}" for key, item in value.items()) + "}"
+    if isinstance(value, list):
+        return ", ".join(_inline(item) for item in value)
+    return _scalar(value)
+
+def _select(record: Dict[str, Any], fields: Optional[List[str]]) -> Dict[str, Any]:
+    if fields is None:
+        return record
+    return {field: record[field] for field in fields if field in record}
+
+def _record_key(record: Dict[str, Any]) -> str:
+    if "id" in record:
+        return f"id:{record['id']}"
+    encoded = json.dumps(record, sort_keys=True, default=str)
+    return hashlib.sha1(encoded.encode("utf-8")).hexdigest()
+
+def dedupe_records(records: List[Any]) -> List[Any]:
+    """Drop repeated records, matching on `id` when records have one"""
+    seen = set()
+    unique = []
+    for record in records:
+        key = _record_key(record) if isinstance(record, dict) else _inline(record)
+        if key not in seen:
+            seen.add(key)
+            unique.append(record)
+    return unique
+
+def _is_table(value: Any) -> bool:
+    return isinstance(value, list) and len(value) > 0 and all(isinstance(item, dict) for item in value)
+
+def _encode_section(label: str, value: Any, fields: Optional[List[str]], omitted: int = 0) -> str:
+    """
+    Encode one section: records as a header plus one `|`-separated row each,
+    dicts as `key: value` lines, and anything else inline.
+    """
+    if _is_table(value):
+        rows = [_select(record, fields) for record in value]
+        columns = fields or list(dict.fromkeys(key for row in rows for key in row))
+        columns = [column for column in columns if any(column in row for row in rows)]
+        lines = [f"## {label} [{'|'.join(columns)}]"]
+        for row in rows:
+            lines.append("|".join(_inline(row.get(column)).replace("|", "/") for column in columns))
+        if omitted:
+            lines.append(f"(+{omitted} more omitted)")
+        return "\n".join(lines)
+
+    if isinstance(value, dict):
+        value = _select(value, fields)
+        return "\n".join([f"## {label}"] + [f"{key}: {_inline(item)}" for key, item in value.items()])
+
+    return f"## {label}\n{_inline(value)}"
+
+# --- Budgeting ---
+
+class _Part:
+    def __init__(self, section: ContextSection, value: Any):
+        self.section = section
+        self.rows = dedupe_records(value) if isinstance(value, list) else None
+        self.value = value
+        self.kept = len(self.rows) if self.rows is not None else None
+        self.text = ""
+        self.tokens = 0
+        self.render()
+
+    def render(self) -> None:
+        value = self.rows[:self.kept] if self.rows is not None else self.value
+        omitted = len(self.rows) - self.kept if self.rows is not None else 0
+        self.text = _encode_section(self.section.label, value, self.section.fields, omitted)
+        self.tokens = count_tokens(self.text)
+
+class ContextSerializerStats:
+    """Prompt size counters per profile, reported at GET /metrics"""
+
+    def __init__(self):
+        self.profiles: Dict[str, Dict[str, int]] = {}
+
+    def record(self, profile: str, result: SerializedContext) -> None:
+        counts = self.profiles.setdefault(profile, {"prompts": 0, "tokens": 0, "tokens_saved": 0, "truncated": 0})
+        counts["prompts"] += 1
+        counts["tokens"] += result.tokens
+        counts["tokens_saved"] += result.tokens_saved
+        counts["truncated"] += 1 if result.dropped else 0
+
+    def stats(self) -> Dict[str, Any]:
+        return {profile: dict(counts) for profile, counts in self.profiles.items()}
+
+serializer_stats = ContextSerializerStats()
+metrics_registry.register("prompt_context", serializer_stats.stats)
+
+def context_budget(profile: str) -> int:
+    """Token budget of a profile, from `PROMPT_CONTEXT_BUDGETS` or the default"""
+    return settings.PROMPT_CONTEXT_BUDGETS.get(profile, settings.PROMPT_CONTEXT_TOKEN_BUDGET)
+
+def serialize_context(data: Dict[str, Any], profile: str = "general", budget: Optional[int] = None) -> SerializedContext:
+    """
+    Serialize prompt data compactly and within a token budget.
+
+    Only the sections and fields selected by the profile are kept, repeated
+    records are removed and lists of records are written as tables. While the
+    result is over budget, rows are trimmed from the end of the lowest
+    priority section and, once it is down to one row, the section is dropped
+    unless it is required.
+
+    Args:
+        data: Prompt data keyed by section name
+        profile: Name of an entry in `CONTEXT_PROFILES`
+        budget: Token budget; defaults to the profile's configured budget
+
+    Returns:
+        The serialized context with its token count and the tokens saved
+        compared to `json.dumps(data, indent=2)`
+    """
+    sections = CONTEXT_PROFILES.get(profile)
+    if sections is None:
+        sections = [ContextSection(name) for name in data]
+    budget = context_budget(profile) if budget is None else budget
+
+    parts = [_Part(section, data[section.name]) for section in sections
+             if data.get(section.name) not in (None, "", [], {})]
+    dropped: List[str] = []
+
+    def total() -> int:
+        return sum(part.tokens for part in parts) + max(len(parts) - 1, 0)
+
+    for part in sorted(parts, key=lambda part: part.section.priority):
+        if total() <= budget:
+            break
+        if part.rows is not None:
+            # Trim rows first, estimating how many are needed to fit
+            while total() > budget and part.kept > 1:
+                row_tokens = max(part.tokens // max(part.kept, 1), 1)
+                excess = total() - budget
+                part.kept = max(part.kept - max(math.ceil(excess / row_tokens), 1), 1)
+                part.render()
+            if part.kept < len(part.rows):
+                dropped.append(f"{part.section.name}[{part.kept}:]")
+        if total() > budget and not part.section.required:
+            parts.remove(part)
+            dropped.append(part.section.name)
+
+    text = "\n".join(part.text for part in parts)
+    result = SerializedContext(
+        text=text,
+        tokens=count_tokens(text),
+        baseline_tokens=count_tokens(json.dumps(data, indent=2, default=str)),
+        dropped=dropped,
+    )
+    serializer_stats.record(profile, result)
+    if dropped:
+        logger.info(f"Prompt context '{profile}' over budget ({budget} tokens), dropped {', '.join(dropped)}")
+    logger.debug(f"Prompt context '{profile}': {result.tokens} tokens, {result.tokens_saved} saved")
+    return result
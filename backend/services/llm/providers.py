@@ -0,0 +1,325 @@
+from typing import Any, AsyncIterator, Callable, Dict, Iterator, List, Optional
+from contextlib import contextmanager
+from contextvars import ContextVar
+import json
+import logging
+import httpx
+from langchain_core.messages import BaseMessage
+
+from core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Provider chosen for the current request, so sampling done by MCP tools
+# on its behalf goes to the same provider as the reply itself
+current_provider: ContextVar[Optional[str]] = ContextVar("llm_provider", default=None)
+
+@contextmanager
+def use_provider(name: Optional[str]) -> Iterator[None]:
+    """Make a provider the current request's inside the block; no change when None"""
+    if not name:
+        yield
+        return
+    token = current_provider.set(name)
+    try:
+        yield
+    finally:
+        current_provider.reset(token)
+
+_http_client: Optional[httpx.AsyncClient] = None
+
+def get_http_client() -> httpx.AsyncClient:
+    """
+    HTTP client shared by every provider that talks HTTP directly.
+
+    One pool per worker keeps connections (and their TLS sessions) alive
+    between calls instead of opening one per request.
+    """
+    global _http_client
+    if _http_client is None or _http_client.is_closed:
+        _http_client = httpx.AsyncClient(
+            limits=http_limits(),
+            timeout=httpx.Timeout(settings.LLM_HTTP_TIMEOUT_SECONDS, connect=settings.LLM_HTTP_CONNECT_TIMEOUT_SECONDS),
+        )
+    return _http_client
+
+def http_limits() -> httpx.Limits:
+    return httpx.Limits(
+        max_connections=settings.LLM_HTTP_MAX_CONNECTIONS,
+        max_keepalive_connections=settings.LLM_HTTP_MAX_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry=settings.LLM_HTTP_KEEPALIVE_EXPIRY_SECONDS,
+    )
+
+def message_text(message: Any) -> str:
+    """Text of a LangChain message or message chunk"""
+    if isinstance(message.content, str):
+        return message.content
+    return "".join(part.get("text", "") if isinstance(part, dict) else str(part) for part in message.content)
+
+class LLMProvider:
+    """
+    A configured chat model.
+
+    Providers are built once per worker by the registry and shared by every
+    call, so their HTTP or gRPC connections are reused.
+    """
+
+    kind = "base"
+
+    def __init__(self, name: str, model: str):
+        self.name = name
+        self.model = model
+
+    async def generate(self, messages: List[BaseMessage], temperature: Optional[float] = None,
+                       max_tokens: Optional[int] = None, response_schema: Optional[Dict[str, Any]] = None) -> str:
+        """
+        Return the full reply to a list of LangChain messages.
+
+        With `response_schema` (a JSON schema) the reply should be a JSON
+        document matching it; providers that can enforce that natively do.
+        """
+        raise NotImplementedError
+
+    def stream(self, messages: List[BaseMessage], temperature: Optional[float] = None,
+               max_tokens: Optional[int] = None) -> AsyncIterator[str]:
+        """Yield text deltas of the reply to a list of LangChain messages"""
+        raise NotImplementedError
+
+    async def aclose(self) -> None:
+        return None
+
+    def describe(self) -> Dict[str, Any]:
+        return {"kind": self.kind, "model": self.model}
+
+class LangChainProvider(LLMProvider):
+    """Provider backed by a LangChain chat model"""
+
+    def __init__(self, name: str, model: str, chat_model: Any):
+        super().__init__(name, model)
+        self.chat_model = chat_model
+
+    def bind_params(self, temperature: Optional[float], max_tokens: Optional[int],
+                    response_schema: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Per-call sampling parameters in the form the chat model accepts"""
+        return {}
+
+    def _model(self, temperature: Optional[float], max_tokens: Optional[int],
+               response_schema: Optional[Dict[str, Any]] = None) -> Any:
+        params = self.bind_params(temperature, max_tokens, response_schema)
+        return self.chat_model.bind(**params) if params else self.chat_model
+
+    async def generate(self, messages: List[BaseMessage], temperature: Optional[float] = None,
+                       max_tokens: Optional[int] = None, response_schema: Optional[Dict[str, Any]] = None) -> str:
+        response = await self._model(temperature, max_tokens, response_schema).ainvoke(messages)
+        return message_text(response)
+
+    async def stream(self, messages: List[BaseMessage], temperature: Optional[float] = None,
+                     max_tokens: Optional[int] = None) -> AsyncIterator[str]:
+        async for chunk in self._model(temperature, max_tokens).astream(messages):
+            yield message_text(chunk)
+
+class GoogleProvider(LangChainProvider):
+    """Gemini through `ChatGoogleGenerativeAI`, which keeps one gRPC channel per instance"""
+
+    kind = "google"
+
+    def __init__(self, name: str, model: str, api_key: Optional[str] = None, **options: Any):
+        from langchain_google_genai import ChatGoogleGenerativeAI
+
+        chat_model = ChatGoogleGenerativeAI(model=model, google_api_key=api_key or settings.GOOGLE_API_KEY, **options)
+        super().__init__(name, model, chat_model)
+
+    def bind_params(self, temperature: Optional[float], max_tokens: Optional[int],
+                    response_schema: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        generation_config = {}
+        if temperature is not None:
+            generation_config["temperature"] = temperature
+        if max_tokens is not None:
+            generation_config["max_output_tokens"] = max_tokens
+        if response_schema is not None and settings.LLM_NATIVE_STRUCTURED_OUTPUT:
+            # Gemini's response_schema takes an OpenAPI subset rather than
+            # arbitrary JSON schema, so only JSON mode is enforced here
+            generation_config["response_mime_type"] = "application/json"
+        return {"generation_config": generation_config} if generation_config else {}
+
+class OllamaProvider(LangChainProvider):
+    """A model served by Ollama, through `ChatOllama` with a tuned connection pool"""
+
+    kind = "ollama"
+
+    def __init__(self, name: str, model: str, base_url: Optional[str] = None, **options: Any):
+        from langchain_ollama import ChatOllama
+
+        client_kwargs = {
+            "limits": http_limits(),
+            "timeout": httpx.Timeout(settings.LLM_HTTP_TIMEOUT_SECONDS, connect=settings.LLM_HTTP_CONNECT_TIMEOUT_SECONDS),
+        }
+        chat_model = ChatOllama(model=model, base_url=base_url or settings.OLLAMA_BASE_URL,
+                                client_kwargs=client_kwargs, **options)
+        super().__init__(name, model, chat_model)
+
+    def bind_params(self, temperature: Optional[float], max_tokens: Optional[int],
+                    response_schema: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        options = {}
+        if temperature is not None:
+            options["temperature"] = temperature
+        if max_tokens is not None:
+            options["num_predict"] = max_tokens
+        params: Dict[str, Any] = {"options": options} if options else {}
+        if response_schema is not None and settings.LLM_NATIVE_STRUCTURED_OUTPUT:
+            params["format"] = response_schema
+        return params
+
+class OpenAICompatibleProvider(LLMProvider):
+    """
+    Any server implementing the OpenAI chat completions API: vLLM, Ollama's
+    `/v1` endpoint, llama.cpp, or a local stand-in such as
+    `scripts/local_llm_stub.py`. Requests go through the shared HTTP pool.
+    """
+
+    kind = "openai_compatible"
+
+    _ROLES = {"system": "system", "human": "user", "ai": "assistant"}
+
+    def __init__(self, name: str, model: str, base_url: str, api_key: Optional[str] = None):
+        super().__init__(name, model)
+        self.base_url = base_url.rstrip("/")
+        self.headers = {"Authorization": f"Bearer {api_key}"} if api_key else {}
+
+    def _payload(self, messages: List[BaseMessage], temperature: Optional[float],
+                 max_tokens: Optional[int], stream: bool,
+                 response_schema: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        payload = {
+            "model": self.model,
+            "messages": [{"role": self._ROLES.get(message.type, "user"), "content": message_text(message)}
+                         for message in messages],
+            "stream": stream,
+        }
+        if temperature is not None:
+            payload["temperature"] = temperature
+        if max_tokens is not None:
+            payload["max_tokens"] = max_tokens
+        if response_schema is not None and settings.LLM_NATIVE_STRUCTURED_OUTPUT:
+            payload["response_format"] = {
+                "type": "json_schema",
+                "json_schema": {"name": response_schema.get("title", "response"), "schema": response_schema},
+            }
+        return payload
+
+    async def generate(self, messages: List[BaseMessage], temperature: Optional[float] = None,
+                       max_tokens: Optional[int] = None, response_schema: Optional[Dict[str, Any]] = None) -> str:
+        response = await get_http_client().post(
+            f"{self.base_url}/chat/completions",
+            json=self._payload(messages, temperature, max_tokens, stream=False, response_schema=response_schema),
+            headers=self.headers,
+        )
+        response.raise_for_status()
+        return response.json()["choices"][0]["message"].get("content") or ""
+
+    async def stream(self, messages: List[BaseMessage], temperature: Optional[float] = None,
+                     max_tokens: Optional[int] = None) -> AsyncIterator[str]:
+        async with get_http_client().stream(
+            "POST",
+            f"{self.base_url}/chat/completions",
+            json=self._payload(messages, temperature, max_tokens, stream=True),
+            headers=self.headers,
+        ) as response:
+            response.raise_for_status()
+            async for line in response.aiter_lines():
+                if not line.startswith("data:"):
+                    continue
+                data = line[len("data:"):].strip()
+                if data == "[DONE]":
+                    break
+                choices = json.loads(data).get("choices") or [{}]
+                yield (choices[0].get("delta") or {}).get("content") or ""
+
+    def describe(self) -> Dict[str, Any]:
+        return {**super().describe(), "base_url": self.base_url}
+
+class ProviderRegistry:
+    """
+    Builds LLM providers from settings and hands out the shared instances.
+
+    The default provider is `settings.LLM_PROVIDER` with `settings.LLM_MODEL`.
+    More providers can run side by side through `settings.LLM_PROVIDERS`,
+    which maps a provider name to its options, for example
+    `{"local": {"kind": "openai_compatible", "model": "llama3", "base_url": "http://localhost:8001/v1"}}`.
+    Callers pick a provider per call by name.
+    """
+
+    def __init__(self):
+        self.kinds: Dict[str, Callable[..., LLMProvider]] = {}
+        self.providers: Dict[str, LLMProvider] = {}
+
+    def register_kind(self, kind: str, factory: Callable[..., LLMProvider]) -> None:
+        """Make a provider implementation available under a kind name"""
+        self.kinds[kind] = factory
+
+    def config(self, name: str) -> Dict[str, Any]:
+        """Options for a provider name, from `LLM_PROVIDERS` or the default settings"""
+        config = dict(settings.LLM_PROVIDERS.get(name, {}))
+        if name == settings.LLM_PROVIDER:
+            config.setdefault("model", settings.LLM_MODEL)
+        config.setdefault("kind", name)
+        if "model" not in config:
+            raise ValueError(f"No model configured for LLM provider {name}")
+        return config
+
+    def names(self) -> List[str]:
+        return list(dict.fromkeys([settings.LLM_PROVIDER, *settings.LLM_PROVIDERS]))
+
+    def resolve(self, name: Optional[str] = None) -> str:
+        """Provider name for a call: the one asked for, the request's, or the default"""
+        return name or current_provider.get() or settings.LLM_PROVIDER
+
+    def model_id(self, name: Optional[str] = None) -> str:
+        """`provider:model` identifier of a provider, without building it"""
+        name = self.resolve(name)
+        return f"{name}:{self.config(name)['model']}"
+
+    def get(self, name: Optional[str] = None) -> LLMProvider:
+        """
+        Return the provider with the given name, building it on first use.
+
+        Args:
+            name: Provider name; defaults to the request's provider, then
+                `settings.LLM_PROVIDER`
+
+        Raises:
+            ValueError: If the provider or its kind is unknown
+        """
+        name = self.resolve(name)
+        provider = self.providers.get(name)
+        if provider is None:
+            options = self.config(name)
+            kind = options.pop("kind")
+            factory = self.kinds.get(kind)
+            if factory is None:
+                raise ValueError(f"Unknown LLM provider kind: {kind}")
+            provider = self.providers[name] = factory(name, **options)
+            logger.info(f"Created LLM provider {name} ({kind}, {provider.model})")
+        return provider
+
+    def describe(self) -> Dict[str, Any]:
+        return {name: provider.describe() for name, provider in self.providers.items()}
+
+    async def aclose(self) -> None:
+        """Close every provider and the shared HTTP pool"""
+        global _http_client
+        for provider in self.providers.values():
+            await provider.aclose()
+        self.providers.clear()
+        if _http_client is not None:
+            await _http_client.aclose()
+            _http_client = None
+
+provider_registry = ProviderRegistry()
+provider_registry.register_kind("google", GoogleProvider)
+provider_registry.register_kind("ollama", OllamaProvider)
+provider_registry.register_kind("openai_compatible", OpenAICompatibleProvider)
+provider_registry.register_kind("vllm", OpenAICompatibleProvider)
+
+def get_provider(name: Optional[str] = None) -> LLMProvider:
+    """Shortcut for `provider_registry.get`"""
+    return provider_registry.get(name)
@@ -0,0 +1,258 @@
+from typing import Any, AsyncIterator, Deque, Dict, Iterator, Optional
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+import asyncio
+import time
+import logging
+
+from core.config import settings
+from core.utils.metrics import metrics_registry
+
+logger = logging.getLogger(__name__)
+
+# Priority classes, most urgent first
+PRIORITY_INTERACTIVE = "interactive"
+PRIORITY_TOOL = "tool"
+PRIORITY_BATCH = "batch"
+PRIORITIES = [PRIORITY_INTERACTIVE, PRIORITY_TOOL, PRIORITY_BATCH]
+
+# Request-scoped defaults, so calls made deep inside MCP tools are attributed
+# to the student and the priority class of the request that caused them
+current_student: ContextVar[Optional[str]] = ContextVar("llm_student", default=None)
+current_priority: ContextVar[Optional[str]] = ContextVar("llm_priority", default=None)
+
+ANONYMOUS = "anonymous"
+
+class LLMQueueFull(Exception):
+    """Raised when an LLM call is rejected because the queue is too deep"""
+
+    def __init__(self, message: str, retry_after: float = 1.0):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+@contextmanager
+def request_context(student_id: Optional[str] = None, priority: Optional[str] = None) -> Iterator[None]:
+    """
+    Attribute the LLM calls made inside the block to a student and priority class.
+
+    The previous values are restored when the block exits, so a long-lived
+    task (e.g. a WebSocket connection) does not carry one request's values
+    into the next.
+    """
+    tokens = []
+    if student_id is not None:
+        tokens.append((current_student, current_student.set(student_id)))
+    if priority is not None:
+        tokens.append((current_priority, current_priority.set(priority)))
+    try:
+        yield
+    finally:
+        for variable, token in reversed(tokens):
+            variable.reset(token)
+
+def resolve_priority(requested: str) -> str:
+    """
+    The priority of a call is the lower of the one requested and the one of
+    the current request, so tool sampling inside a batch job runs as batch.
+    """
+    ambient = current_priority.get()
+    if ambient is None:
+        return requested
+    return max(requested, ambient, key=PRIORITIES.index)
+
+class _ProviderQueue:
+    """Concurrency slots and waiting calls for one provider"""
+
+    def __init__(self, name: str, capacity: int):
+        self.name = name
+        self.capacity = capacity
+        self.in_flight = 0
+        # priority -> student -> waiting futures; students are served round robin
+        self.waiting: Dict[str, "OrderedDict[str, Deque[asyncio.Future]]"] = {
+            priority: OrderedDict() for priority in PRIORITIES
+        }
+        self.depth = 0
+        self.depth_by_student: Dict[str, int] = {}
+        self.wait_ms: Dict[str, Deque[float]] = {priority: deque(maxlen=500) for priority in PRIORITIES}
+        self.counters = {"granted": 0, "queued": 0, "rejected": 0}
+
+    def enqueue(self, priority: str, student: str) -> asyncio.Future:
+        future = asyncio.get_running_loop().create_future()
+        self.waiting[priority].setdefault(student, deque()).append(future)
+        self.depth += 1
+        self.depth_by_student[student] = self.depth_by_student.get(student, 0) + 1
+        self.counters["queued"] += 1
+        return future
+
+    def _forget(self, student: str) -> None:
+        self.depth -= 1
+        remaining = self.depth_by_student.get(student, 1) - 1
+        if remaining:
+            self.depth_by_student[student] = remaining
+        else:
+            self.depth_by_student.pop(student, None)
+
+    def remove(self, priority: str, student: str, future: asyncio.Future) -> None:
+        """Drop a waiter that gave up before it was granted a slot"""
+        queue = self.waiting[priority].get(student)
+        if queue is not None and future in queue:
+            queue.remove(future)
+            if not queue:
+                del self.waiting[priority][student]
+            self._forget(student)
+
+    def grant_next(self) -> None:
+        """Hand free slots to waiters: highest priority class first, students in turn"""
+        while self.in_flight < self.capacity:
+            for priority in PRIORITIES:
+                students = self.waiting[priority]
+                if students:
+                    break
+            else:
+                return
+
+            student, queue = next(iter(students.items()))
+            future = queue.popleft()
+            if queue:
+                students.move_to_end(student)
+            else:
+                del students[student]
+            self._forget(student)
+
+            if future.done():
+                continue
+            self.in_flight += 1
+            future.set_result(None)
+
+class LLMScheduler:
+    """
+    Admission control and scheduling for every LLM call.
+
+    Each provider has a cap on concurrent calls. Calls over the cap wait in
+    one queue per priority class ("interactive", "tool", "batch"); a free
+    slot goes to the most urgent class with waiters, and within a class the
+    students with waiting calls take turns, so one busy student or a batch
+    job cannot crowd everyone else out. Calls are rejected with
+    `LLMQueueFull` up front when the provider's queue, or the student's
+    share of it, is already at its limit.
+    """
+
+    def __init__(self, default_capacity: int = 8, capacities: Optional[Dict[str, int]] = None,
+                 max_depth: int = 64, max_per_student: int = 4):
+        self.default_capacity = default_capacity
+        self.capacities = capacities or {}
+        self.max_depth = max_depth
+        self.max_per_student = max_per_student
+        self.providers: Dict[str, _ProviderQueue] = {}
+
+    def _queue(self, provider: str) -> _ProviderQueue:
+        queue = self.providers.get(provider)
+        if queue is None:
+            capacity = self.capacities.get(provider, self.default_capacity)
+            queue = self.providers[provider] = _ProviderQueue(provider, capacity)
+        return queue
+
+    def check_admission(self, provider: Optional[str] = None, student_id: Optional[str] = None) -> None:
+        """
+        Reject early when a new call for the student could not be queued.
+
+        Raises:
+            LLMQueueFull: If the provider's queue or the student's share is full
+        """
+        queue = self._queue(provider or settings.LLM_PROVIDER)
+        student = student_id or current_student.get() or ANONYMOUS
+        if queue.in_flight < queue.capacity and queue.depth == 0:
+            return
+
+        if queue.depth >= self.max_depth:
+            queue.counters["rejected"] += 1
+            raise LLMQueueFull(f"LLM queue for {queue.name} is full ({queue.depth} waiting)",
+                               retry_after=self._retry_after(queue))
+        if queue.depth_by_student.get(student, 0) >= self.max_per_student:
+            queue.counters["rejected"] += 1
+            raise LLMQueueFull(f"Too many pending LLM requests for student {student}",
+                               retry_after=self._retry_after(queue))
+
+    def _retry_after(self, queue: _ProviderQueue) -> float:
+        recent = [wait for waits in queue.wait_ms.values() for wait in waits]
+        return round(max(sum(recent) / len(recent) / 1000, 1.0), 1) if recent else 1.0
+
+    @asynccontextmanager
+    async def slot(self, provider: Optional[str] = None, priority: str = PRIORITY_INTERACTIVE,
+                   student_id: Optional[str] = None) -> AsyncIterator[None]:
+        """
+        Hold one of the provider's concurrency slots for the duration of a call.
+
+        Args:
+            provider: Provider name; defaults to `settings.LLM_PROVIDER`
+            priority: Requested priority class, lowered to the request's own class
+            student_id: Student to account the call to; defaults to the request's student
+
+        Raises:
+            LLMQueueFull: If the call cannot be queued
+        """
+        provider = provider or settings.LLM_PROVIDER
+        priority = resolve_priority(priority)
+        student = student_id or current_student.get() or ANONYMOUS
+        queue = self._queue(provider)
+
+        started = time.perf_counter()
+        if queue.in_flight < queue.capacity and queue.depth == 0:
+            queue.in_flight += 1
+        else:
+            self.check_admission(provider, student)
+            future = queue.enqueue(priority, student)
+            try:
+                await future
+            except asyncio.CancelledError:
+                if future.done() and not future.cancelled():
+                    # Granted just as the caller gave up, pass the slot on
+                    queue.in_flight -= 1
+                    queue.grant_next()
+                else:
+                    queue.remove(priority, student, future)
+                raise
+
+        wait_ms = (time.perf_counter() - started) * 1000
+        queue.wait_ms[priority].append(wait_ms)
+        queue.counters["granted"] += 1
+        if wait_ms > 1000:
+            logger.info(f"LLM call for {student} waited {wait_ms:.0f}ms in the {priority} queue of {provider}")
+
+        try:
+            yield
+        finally:
+            queue.in_flight -= 1
+            queue.grant_next()
+
+    def stats(self) -> Dict[str, Any]:
+        """Queue depth, in-flight calls and wait times per provider and priority class"""
+        snapshot = {}
+        for name, queue in self.providers.items():
+            waits = {}
+            for priority, samples in queue.wait_ms.items():
+                ordered = sorted(samples)
+                waits[priority] = {
+                    "depth": sum(len(futures) for futures in queue.waiting[priority].values()),
+                    "mean_wait_ms": round(sum(ordered) / len(ordered), 1) if ordered else 0.0,
+                    "p95_wait_ms": round(ordered[int(len(ordered) * 0.95) - 1], 1) if len(ordered) >= 20 else None,
+                }
+            snapshot[name] = {
+                "capacity": queue.capacity,
+                "in_flight": queue.in_flight,
+                "depth": queue.depth,
+                "students_waiting": len(queue.depth_by_student),
+                "priorities": waits,
+                **queue.counters,
+            }
+        return snapshot
+
+# One scheduler per worker process
+llm_scheduler = LLMScheduler(
+    default_capacity=settings.LLM_MAX_CONCURRENCY,
+    capacities=settings.LLM_PROVIDER_CONCURRENCY,
+    max_depth=settings.LLM_QUEUE_MAX_DEPTH,
+    max_per_student=settings.LLM_QUEUE_MAX_PER_STUDENT,
+)
+metrics_registry.register("llm_scheduler", llm_scheduler.stats)
@@ -0,0 +1,153 @@
+from typing import Any, Dict, Optional, Tuple, Type, TypeVar
+import json
+import re
+import logging
+from pydantic import BaseModel, ValidationError
+
+from core.config import settings
+from core.utils.metrics import metrics_registry
+from services.llm.cache import cached_sample
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T", bound=BaseModel)
+
+_FENCE = re.compile(r"```[a-zA-Z0-9_-]*\s*\n?(.*?)```", re.DOTALL)
+
+# Parse outcomes, as counted per tool
+CLEAN = "clean"
+REPAIRED = "repaired"
+INVALID_JSON = "invalid_json"
+SCHEMA_MISMATCH = "schema_mismatch"
+
+def extract_json(text: str) -> Tuple[Any, bool]:
+    """
+    Pull a JSON value out of an LLM reply.
+
+    The reply is parsed as is first. Failing that, the contents of the first
+    code fence are tried, then the first complete JSON object or array in
+    the text, ignoring whatever comes before or after it.
+
+    Returns:
+        Tuple of (decoded value, whether the text needed repairing)
+
+    Raises:
+        ValueError: If the text contains no JSON object or array
+    """
+    text = text.strip()
+    try:
+        return json.loads(text), False
+    except json.JSONDecodeError:
+        pass
+
+    fence = _FENCE.search(text)
+    if fence is not None:
+        try:
+            return json.loads(fence.group(1).strip()), True
+        except json.JSONDecodeError:
+            pass
+
+    decoder = json.JSONDecoder()
+    for match in re.finditer(r"[\[{]", text):
+        try:
+            value, _ = decoder.raw_decode(text, match.start())
+            return value, True
+        except json.JSONDecodeError:
+            continue
+    raise ValueError("No JSON object or array found in the reply")
+
+def parse_structured(text: str, schema: Type[T]) -> Tuple[Optional[T], str]:
+    """
+    Parse an LLM reply into a Pydantic model.
+
+    A bare array is accepted for a schema with a single field, since models
+    often answer "a list of X" with just the list.
+
+    Returns:
+        Tuple of (parsed model or None, parse outcome)
+    """
+    try:
+        data, repaired = extract_json(text)
+    except ValueError:
+        return None, INVALID_JSON
+
+    if isinstance(data, list) and len(schema.model_fields) == 1:
+        data = {next(iter(schema.model_fields)): data}
+    try:
+        return schema.model_validate(data), REPAIRED if repaired else CLEAN
+    except ValidationError:
+        return None, SCHEMA_MISMATCH
+
+def schema_instructions(schema: Type[BaseModel]) -> str:
+    """Prompt suffix asking for JSON that matches a schema"""
+    return (
+        "\nReply with only the JSON document, without code fences or commentary. "
+        f"It must match this JSON schema:\n{json.dumps(schema.model_json_schema(), separators=(',', ':'))}\n"
+    )
+
+class StructuredOutputStats:
+    """Parse outcomes of structured sampling, per tool"""
+
+    def __init__(self):
+        self.counters: Dict[str, Dict[str, int]] = {}
+
+    def record(self, tool: str, outcome: str) -> None:
+        counts = self.counters.setdefault(tool, {CLEAN: 0, REPAIRED: 0, INVALID_JSON: 0, SCHEMA_MISMATCH: 0})
+        counts[outcome] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        tools = {}
+        for tool, counts in self.counters.items():
+            total = sum(counts.values())
+            failed = counts[INVALID_JSON] + counts[SCHEMA_MISMATCH]
+            tools[tool] = {**counts, "failure_rate": round(failed / total, 3) if total else 0.0}
+        return {"native_mode": settings.LLM_NATIVE_STRUCTURED_OUTPUT, "tools": tools}
+
+structured_output_stats = StructuredOutputStats()
+metrics_registry.register("structured_output", structured_output_stats.stats)
+
+async def sample_structured(ctx: Any,
+                            prompt: str,
+                            schema: Type[T],
+                            *,
+                            tool: str,
+                            system_prompt: Optional[str] = None,
+                            temperature: Optional[float] = None,
+                            max_tokens: Optional[int] = None) -> Optional[T]:
+    """
+    Sample a reply that must match a Pydantic schema.
+
+    The schema is added to the prompt and passed to the provider, which
+    enforces it natively when it can. The reply goes through the sampling
+    cache; replies that don't parse are not cached. Outcomes are counted per
+    tool for /metrics.
+
+    Args:
+        ctx: The FastMCP context of the calling tool
+        prompt: Prompt text
+        schema: Pydantic model the reply must match
+        tool: Name of the calling tool, used for caching and statistics
+        system_prompt: Optional system prompt
+        temperature: Optional sampling temperature
+        max_tokens: Optional cap on generated tokens; defaults to
+            `settings.STRUCTURED_OUTPUT_MAX_TOKENS`
+
+    Returns:
+        The parsed reply, or None when it doesn't match the schema
+    """
+    response = await cached_sample(
+        ctx,
+        prompt + schema_instructions(schema),
+        tool=tool,
+        system_prompt=system_prompt,
+        temperature=temperature,
+        max_tokens=max_tokens or settings.STRUCTURED_OUTPUT_MAX_TOKENS,
+        response_schema=schema.model_json_schema(),
+        accept=lambda text: parse_structured(text, schema)[0] is not None,
+    )
+
+    parsed, outcome = parse_structured(getattr(response, "text", "") or "", schema)
+    structured_output_stats.record(tool, outcome)
+    if parsed is None:
+        logger.warning(f"{tool}: reply did not match {schema.__name__} ({outcome})")
+    return parsed
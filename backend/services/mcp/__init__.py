@@ -1,7 +1,8 @@
 from services.mcp.server import mcp_server, run_mcp_server
+from services.mcp.dispatch import mcp_dispatcher, MCPDispatcher
 
 
 
-__all__ = ["mcp_server", "run_mcp_server", ]
+__all__ = ["mcp_server", "run_mcp_server", "mcp_dispatcher", "MCPDispatcher"]
 
 # from services.mcp.server import mcp
\ No newline at end of file
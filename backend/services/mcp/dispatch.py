@@ -0,0 +1,380 @@
+from typing import ClassVar, Dict, Any, List, Optional, Tuple
+import asyncio
+import hashlib
+import inspect
+import json
+import logging
+from fastmcp import FastMCP, Client, Context
+from fastmcp.exceptions import ClientError, NotFoundError, ResourceError, ToolError
+from fastmcp.resources.template import match_uri_template
+from fastmcp.utilities.types import get_cached_typeadapter
+from mcp.server.lowlevel.helper_types import ReadResourceContents
+from mcp.shared.exceptions import McpError
+from mcp.types import TextContent
+from pydantic_core import to_jsonable_python
+
+from core.config import settings
+from core.utils.metrics import metrics_registry
+from core.utils.singleflight import create_single_flight
+from services.mcp.server import mcp_server, sub_servers, setup_mcp_server
+from services.mcp.pool import MCPCallTimeout, MCPClientPool, MCPPoolUnavailable
+from services.llm import sample_text, sampling_handler
+
+logger = logging.getLogger(__name__)
+
+# Separators used by FastMCP.import_server for prefixed names
+TOOL_SEPARATOR = "_"
+RESOURCE_SEPARATOR = "+"
+
+_LOG_LEVELS = {
+    "debug": logging.DEBUG,
+    "info": logging.INFO,
+    "notice": logging.INFO,
+    "warning": logging.WARNING,
+    "error": logging.ERROR,
+    "critical": logging.CRITICAL,
+    "alert": logging.CRITICAL,
+    "emergency": logging.CRITICAL,
+}
+
+def unwrap_mcp_contents(contents: Any) -> Any:
+    """
+    Convert the content list returned by the MCP client into a Python value.
+
+    Args:
+        contents: Result of `Client.read_resource` or `Client.call_tool`
+
+    Returns:
+        The decoded JSON value when the text is JSON, the raw text otherwise,
+        or None when there is no text content
+    """
+    if not contents:
+        return None
+
+    texts = [item.text for item in contents if getattr(item, "text", None)]
+    if not texts:
+        return None
+
+    text = texts[0] if len(texts) == 1 else "\n".join(texts)
+    try:
+        return json.loads(text)
+    except json.JSONDecodeError:
+        return text
+
+class DirectContext(Context):
+    """
+    Context injected into tools and resources that are called in-process.
+
+    It behaves like the FastMCP request context, but logs go to the Python
+    logger, resource reads are dispatched directly and sampling calls the LLM
+    without a round trip through a client session.
+    """
+
+    _dispatcher: Any = None
+    _origin: Optional[str] = None
+    accepts_response_schema: ClassVar[bool] = True
+
+    def __init__(self, dispatcher: "MCPDispatcher", origin: Optional[str] = None):
+        super().__init__(fastmcp=dispatcher.server)
+        self._dispatcher = dispatcher
+        self._origin = origin
+
+    async def log(self, message: str, level: Optional[str] = None, logger_name: Optional[str] = None) -> None:
+        logging.getLogger(logger_name or __name__).log(
+            _LOG_LEVELS.get(level or "info", logging.INFO), f"[{self._origin}] {message}"
+        )
+
+    async def report_progress(self, progress: float, total: Optional[float] = None) -> None:
+        # There is no client progress token for in-process calls
+        return None
+
+    async def read_resource(self, uri: Any) -> List[ReadResourceContents]:
+        return await self._dispatcher.read_resource_contents(str(uri))
+
+    async def sample(self,
+                     messages: Any,
+                     system_prompt: Optional[str] = None,
+                     temperature: Optional[float] = None,
+                     max_tokens: Optional[int] = None,
+                     response_schema: Optional[Dict[str, Any]] = None) -> TextContent:
+        if max_tokens is None:
+            max_tokens = 512
+        text = await sample_text(messages, system_prompt, temperature, max_tokens, response_schema=response_schema)
+        return TextContent(type="text", text=text)
+
+class MCPDispatcher:
+    """
+    Calls MCP tools and resources for the API.
+
+    In "direct" mode tools and resources registered on the main server or on
+    its component servers are called in-process: arguments are validated the
+    same way FastMCP validates them, but nothing is serialized to JSON and no
+    client session is opened per request. In "client" mode every call goes
+    through one long-lived in-memory `Client` session per worker. In
+    "remote" mode calls go to a pool of MCP worker processes over SSE (see
+    `services.mcp.pool`), so MCP capacity scales separately from the API;
+    names are still resolved locally, so unknown names fail without a round
+    trip.
+
+    Both modes accept names with or without the import prefix (for example
+    `analyze_academic_performance` or `ap_analyze_academic_performance`) and
+    return the decoded Python value, so callers don't depend on the mode.
+
+    With `coalesce` set, concurrent calls of the same tool with the same
+    arguments share one execution, within the worker and across workers.
+    """
+
+    def __init__(self, server: FastMCP, components: Dict[str, FastMCP], mode: str = "direct",
+                 coalesce: bool = False, pool: Optional[MCPClientPool] = None):
+        if mode not in ("direct", "client", "remote"):
+            raise ValueError(f"Unknown MCP dispatch mode: {mode}")
+        if mode == "remote" and pool is None:
+            raise ValueError("Remote MCP dispatch needs a client pool")
+        self.server = server
+        self.components = components
+        self.mode = mode
+        self.pool = pool
+        self.tool_flight = create_single_flight("tool") if coalesce else None
+        self._client: Optional[Client] = None
+        self._client_task: Optional[asyncio.Task] = None
+        self._client_ready: Optional[asyncio.Event] = None
+        self._closing: Optional[asyncio.Event] = None
+
+    # --- Name resolution ---
+
+    def resolve_tool(self, name: str) -> Tuple[Any, str]:
+        """
+        Find a tool by plain or prefixed name.
+
+        Returns:
+            Tuple of (FastMCP Tool, name it has on the main server)
+        """
+        if self.server._tool_manager.has_tool(name):
+            return self.server._tool_manager.get_tool(name), name
+
+        # A prefixed name only needs its own component loaded
+        prefix, _, key = name.partition(TOOL_SEPARATOR)
+        if prefix in self.components and self.components[prefix]._tool_manager.has_tool(key):
+            return self.components[prefix]._tool_manager.get_tool(key), name
+
+        for prefix, component in self.components.items():
+            key = name.removeprefix(f"{prefix}{TOOL_SEPARATOR}")
+            if component._tool_manager.has_tool(key):
+                return component._tool_manager.get_tool(key), f"{prefix}{TOOL_SEPARATOR}{key}"
+
+        raise NotFoundError(f"Unknown tool: {name}")
+
+    def resolve_resource(self, uri: str) -> Tuple[Any, str, str]:
+        """
+        Find the resource manager serving a plain or prefixed URI.
+
+        Returns:
+            Tuple of (resource manager, URI within that manager, URI on the main server)
+        """
+        if self.server._resource_manager.has_resource(uri):
+            return self.server._resource_manager, uri, uri
+
+        prefix, _, key = uri.partition(RESOURCE_SEPARATOR)
+        if prefix in self.components and self.components[prefix]._resource_manager.has_resource(key):
+            return self.components[prefix]._resource_manager, key, uri
+
+        for prefix, component in self.components.items():
+            key = uri.removeprefix(f"{prefix}{RESOURCE_SEPARATOR}")
+            if component._resource_manager.has_resource(key):
+                return component._resource_manager, key, f"{prefix}{RESOURCE_SEPARATOR}{key}"
+
+        raise NotFoundError(f"Unknown resource: {uri}")
+
+    # --- Public API ---
+
+    async def call_tool(self, name: str, arguments: Optional[Dict[str, Any]] = None) -> Any:
+        """
+        Call a tool and return its result as plain Python data.
+
+        Raises:
+            ToolError: If the tool is unknown or fails
+        """
+        arguments = arguments or {}
+        call = {
+            "client": self._call_tool_client,
+            "remote": self._call_tool_remote,
+        }.get(self.mode, self._call_tool_direct)
+        if self.tool_flight is None:
+            return await call(name, arguments)
+
+        try:
+            _, registered_name = self.resolve_tool(name)
+        except NotFoundError as e:
+            raise ToolError(str(e)) from e
+        return await self.tool_flight.do(self.tool_call_key(registered_name, arguments),
+                                         lambda: call(name, arguments))
+
+    @staticmethod
+    def tool_call_key(name: str, arguments: Dict[str, Any]) -> str:
+        """Identity of a tool call, used to coalesce identical concurrent calls"""
+        encoded = json.dumps([name, arguments], sort_keys=True, separators=(",", ":"), default=str)
+        return f"{name}:{hashlib.sha256(encoded.encode('utf-8')).hexdigest()}"
+
+    async def read_resource(self, uri: str) -> Any:
+        """
+        Read a resource and return its content as plain Python data.
+
+        Raises:
+            ResourceError: If the resource is unknown or fails
+        """
+        if self.mode == "client":
+            return await self._read_resource_client(uri)
+        if self.mode == "remote":
+            return await self._read_resource_remote(uri)
+        return await self._read_resource_direct(uri)
+
+    async def read_resource_contents(self, uri: str) -> List[ReadResourceContents]:
+        """Read a resource with the same result shape as `Context.read_resource`"""
+        try:
+            manager, key, _ = self.resolve_resource(uri)
+        except NotFoundError as e:
+            raise ResourceError(str(e)) from e
+
+        context = DirectContext(self, origin=uri)
+        resource = await manager.get_resource(key, context=context)
+        content = await resource.read(context=context)
+        return [ReadResourceContents(content=content, mime_type=resource.mime_type)]
+
+    # --- Direct mode ---
+
+    async def _call_tool_direct(self, name: str, arguments: Dict[str, Any]) -> Any:
+        try:
+            tool, _ = self.resolve_tool(name)
+        except NotFoundError as e:
+            raise ToolError(str(e)) from e
+
+        try:
+            kwargs = dict(arguments)
+            if tool.context_kwarg is not None:
+                kwargs[tool.context_kwarg] = DirectContext(self, origin=tool.name)
+
+            result = get_cached_typeadapter(tool.fn).validate_python(kwargs)
+            if inspect.isawaitable(result):
+                result = await result
+        except Exception as e:
+            raise ToolError(f"Error executing tool {tool.name}: {e}") from e
+
+        return to_jsonable_python(result, fallback=str)
+
+    async def _read_resource_direct(self, uri: str) -> Any:
+        try:
+            manager, key, _ = self.resolve_resource(uri)
+        except NotFoundError as e:
+            raise ResourceError(str(e)) from e
+
+        context = DirectContext(self, origin=uri)
+        result = None
+        try:
+            resource = manager.get_resources().get(key)
+            if resource is not None:
+                kwargs = {resource.context_kwarg: context} if resource.context_kwarg else {}
+                result = resource.fn(**kwargs)
+            else:
+                for template_key, template in manager.get_templates().items():
+                    params = match_uri_template(key, template_key)
+                    if params is not None:
+                        if template.context_kwarg:
+                            params[template.context_kwarg] = context
+                        result = template.fn(**params)
+                        break
+            if inspect.isawaitable(result):
+                result = await result
+        except Exception as e:
+            raise ResourceError(f"Error reading resource {uri}: {e}") from e
+
+        return to_jsonable_python(result, fallback=str)
+
+    # --- Client mode ---
+
+    async def _hold_client(self) -> None:
+        """Keep one client session open until the dispatcher is closed"""
+        try:
+            async with Client(self.server, sampling_handler=sampling_handler) as client:
+                self._client = client
+                self._client_ready.set()
+                await self._closing.wait()
+        finally:
+            self._client = None
+            self._client_ready.set()
+
+    async def get_client(self) -> Client:
+        """Return the worker's long-lived MCP client session, opening it on first use"""
+        if self._client_task is None:
+            await setup_mcp_server()
+            self._client_ready = asyncio.Event()
+            self._closing = asyncio.Event()
+            self._client_task = asyncio.create_task(self._hold_client())
+
+        await self._client_ready.wait()
+        if self._client is None:
+            # Surface the reason the session could not be opened
+            self._client_task, task = None, self._client_task
+            await task
+            raise ClientError("MCP client session is not available")
+        return self._client
+
+    async def _call_tool_client(self, name: str, arguments: Dict[str, Any]) -> Any:
+        try:
+            _, registered_name = self.resolve_tool(name)
+            client = await self.get_client()
+            return unwrap_mcp_contents(await client.call_tool(registered_name, arguments))
+        except (NotFoundError, ClientError, McpError) as e:
+            raise ToolError(str(e)) from e
+
+    async def _read_resource_client(self, uri: str) -> Any:
+        try:
+            _, _, registered_uri = self.resolve_resource(uri)
+            client = await self.get_client()
+            return unwrap_mcp_contents(await client.read_resource(registered_uri))
+        except (NotFoundError, ClientError, McpError) as e:
+            raise ResourceError(str(e)) from e
+
+    # --- Remote mode ---
+
+    async def _call_tool_remote(self, name: str, arguments: Dict[str, Any]) -> Any:
+        try:
+            _, registered_name = self.resolve_tool(name)
+            return unwrap_mcp_contents(await self.pool.call_tool(registered_name, arguments))
+        except (NotFoundError, ClientError, McpError, MCPPoolUnavailable, MCPCallTimeout) as e:
+            raise ToolError(str(e)) from e
+
+    async def _read_resource_remote(self, uri: str) -> Any:
+        try:
+            _, _, registered_uri = self.resolve_resource(uri)
+            return unwrap_mcp_contents(await self.pool.read_resource(registered_uri))
+        except (NotFoundError, ClientError, McpError, MCPPoolUnavailable, MCPCallTimeout) as e:
+            raise ResourceError(str(e)) from e
+
+    async def aclose(self) -> None:
+        """Close the long-lived client session or worker pool, if one was opened"""
+        if self._client_task is not None:
+            self._closing.set()
+            await self._client_task
+            self._client_task = None
+        if self.pool is not None:
+            await self.pool.aclose()
+
+def create_worker_pool() -> MCPClientPool:
+    """Client pool for the MCP worker processes listed in the settings"""
+    return MCPClientPool(
+        settings.MCP_WORKER_URLS,
+        sampling_handler=sampling_handler,
+        health_interval=settings.MCP_POOL_HEALTH_INTERVAL_SECONDS,
+        retries=settings.MCP_POOL_RETRIES,
+        call_timeout=settings.MCP_POOL_CALL_TIMEOUT_SECONDS,
+        connect_timeout=settings.MCP_POOL_CONNECT_TIMEOUT_SECONDS,
+    )
+
+# One dispatcher per worker process
+mcp_dispatcher = MCPDispatcher(mcp_server, sub_servers, mode=settings.MCP_DISPATCH_MODE,
+                               coalesce=settings.SINGLEFLIGHT_ENABLED,
+                               pool=create_worker_pool() if settings.MCP_DISPATCH_MODE == "remote" else None)
+if mcp_dispatcher.pool is not None:
+    metrics_registry.register("mcp_pool", mcp_dispatcher.pool.stats)
+if mcp_dispatcher.tool_flight is not None:
+    metrics_registry.register("tool_singleflight", mcp_dispatcher.tool_flight.stats)
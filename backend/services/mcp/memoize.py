@@ -0,0 +1,142 @@
+from typing import Any, Callable, Dict, Iterable, Optional, Set
+import copy
+import functools
+import hashlib
+import inspect
+import json
+import logging
+from cachetools import TTLCache
+from fastmcp import Context
+
+from core.config import settings
+from core.utils.metrics import metrics_registry
+
+logger = logging.getLogger(__name__)
+
+class MemoizedFunction:
+    """Result cache and counters of one memoized tool or resource function"""
+
+    def __init__(self, name: str, ttl: float, maxsize: int, tags: Set[str]):
+        self.name = name
+        self.tags = tags
+        self.cache = TTLCache(maxsize=maxsize, ttl=ttl)
+        self.counters = {"hits": 0, "misses": 0, "invalidations": 0}
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.counters["hits"] + self.counters["misses"]
+        return {
+            **self.counters,
+            "hit_rate": round(self.counters["hits"] / lookups, 3) if lookups else 0.0,
+            "size": len(self.cache),
+            "tags": sorted(self.tags),
+        }
+
+class MemoRegistry:
+    """
+    Memoization for deterministic MCP tools and resources.
+
+    Functions are marked with the `memoize` decorator, placed under the
+    FastMCP `tool`/`resource` decorator. The cached result is returned
+    before the function body runs, so a hit skips the handler's work and its
+    `ctx` logging. Keys are derived from the call's arguments, leaving out
+    the Context. Because the wrapper is what FastMCP registers, memoization
+    carries over to servers mounted with `import_server` and works in every
+    dispatch mode.
+
+    Caches are per process. Results are copied on the way in and out, so a
+    caller that changes a returned value doesn't change the cache.
+    """
+
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self.functions: Dict[str, MemoizedFunction] = {}
+
+    def memoize(self, ttl: float = 300.0, tags: Iterable[str] = (), maxsize: int = 1024,
+                name: Optional[str] = None) -> Callable[[Callable], Callable]:
+        """
+        Mark an async tool or resource function as cacheable.
+
+        Args:
+            ttl: Seconds a result stays cached
+            tags: Tags the cached results can be invalidated by (e.g. "catalog")
+            maxsize: Maximum number of cached argument combinations
+            name: Name shown in the stats, the function's name by default
+
+        Returns:
+            Decorator returning a wrapper with the same signature
+        """
+        def decorator(fn: Callable) -> Callable:
+            if not inspect.iscoroutinefunction(fn):
+                raise TypeError(f"Only async functions can be memoized: {fn.__name__}")
+            memo = MemoizedFunction(name or fn.__name__, ttl, maxsize, set(tags))
+            if memo.name in self.functions:
+                raise ValueError(f"A memoized function is already registered as {memo.name}")
+            self.functions[memo.name] = memo
+
+            signature = inspect.signature(fn)
+            # Arguments that don't change the result
+            skipped = {param.name for param in signature.parameters.values() if param.annotation is Context}
+
+            @functools.wraps(fn)
+            async def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return await fn(*args, **kwargs)
+                bound = signature.bind(*args, **kwargs)
+                bound.apply_defaults()
+                key = self.make_key({arg: value for arg, value in bound.arguments.items() if arg not in skipped})
+
+                result = memo.cache.get(key)
+                if result is not None:
+                    memo.counters["hits"] += 1
+                    return copy.deepcopy(result)
+
+                memo.counters["misses"] += 1
+                result = await fn(*args, **kwargs)
+                if result is not None:
+                    memo.cache[key] = copy.deepcopy(result)
+                return result
+
+            wrapper.memo = memo
+            return wrapper
+
+        return decorator
+
+    @staticmethod
+    def make_key(arguments: Dict[str, Any]) -> str:
+        encoded = json.dumps(arguments, sort_keys=True, separators=(",", ":"), default=str)
+        return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+    def invalidate(self, tag: str) -> int:
+        """
+        Drop every cached result of the functions with a tag.
+
+        Returns:
+            Number of results dropped
+        """
+        dropped = 0
+        for memo in self.functions.values():
+            if tag in memo.tags:
+                dropped += len(memo.cache)
+                memo.cache.clear()
+                memo.counters["invalidations"] += 1
+        logger.info(f"Invalidated {dropped} memoized results tagged {tag}")
+        return dropped
+
+    def clear(self) -> None:
+        for memo in self.functions.values():
+            memo.cache.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        hits = sum(memo.counters["hits"] for memo in self.functions.values())
+        misses = sum(memo.counters["misses"] for memo in self.functions.values())
+        return {
+            "enabled": self.enabled,
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": round(hits / (hits + misses), 3) if hits + misses else 0.0,
+            "functions": {name: memo.stats() for name, memo in self.functions.items()},
+        }
+
+memo_registry = MemoRegistry(enabled=settings.MCP_MEMO_ENABLED)
+memoize = memo_registry.memoize
+metrics_registry.register("mcp_memo", memo_registry.stats)
@@ -1,52 +1,71 @@
 from fastmcp import FastMCP, Context
 from typing import Dict, List, Any, Optional
-import json
+from pydantic import BaseModel
+
+from core.config import settings
+from services.llm import sample_structured
+from services.llm.prompt_context import serialize_context
+from services.mcp.pipeline import Pipeline, StepFailed
+from services.students import summarize_courses
 
 # This pattern will be imported into the main MCP server
 academic_progress = FastMCP("Academic Progress Analysis")
 
-@academic_progress.tool()
-async def analyze_academic_performance(
-    courses: List[Dict[str, Any]],
-    goals: Optional[Dict[str, Any]] = None,
-    ctx: Context = None
-) -> Dict[str, Any]:
-    """
-    Analyze a student's academic performance and provide insights and recommendations.
-    
-    Args:
-        courses: List of course objects with grades, credits, and other metadata
-        goals: Optional academic goals the student has set
-        
-    Returns:
-        Dictionary containing performance analysis, strengths, weaknesses, and recommendations
-    """
-    # Log progress
-    await ctx.info("Analyzing academic performance...")
-    
-    # Calculate GPA and other metrics
-    total_credits = sum(course.get("credits", 0) for course in courses)
-    total_grade_points = sum(
-        course.get("credits", 0) * course.get("grade_points", 0) 
-        for course in courses
-    )
-    
-    gpa = total_grade_points / total_credits if total_credits > 0 else 0
-    
+# Output schemas of the LLM steps
+class SubjectInsight(BaseModel):
+    subject: str
+    reason: str
+
+class PerformanceAnalysis(BaseModel):
+    strengths: List[SubjectInsight]
+    weaknesses: List[SubjectInsight]
+    recommendations: List[str]
+
+class DailyActions(BaseModel):
+    day: str
+    focus: str
+    activities: List[str]
+
+class StudyResource(BaseModel):
+    name: str
+    url: Optional[str] = None
+
+class ActionPlan(BaseModel):
+    weekly_actions: List[DailyActions]
+    resources: List[StudyResource]
+    progress_metrics: List[str]
+
+# Steps of analyze_academic_performance. The action plan addresses the
+# weaknesses the analysis found, so the two LLM steps run one after the other.
+academic_pipeline = Pipeline("analyze_academic_performance")
+
+@academic_pipeline.step()
+async def metrics(ctx: Context, data: Dict[str, Any]) -> Dict[str, Any]:
+    courses = data["courses"]
+    summary = summarize_courses(courses)
+    student_data = serialize_context({"courses": courses, "goals": data["goals"]}, "academic_progress")
+    return {"gpa": summary["gpa"], "total_credits": summary["total_credits"], "student_data": student_data}
+
+# Fallback analysis
+DEFAULT_ANALYSIS = {
+    "strengths": [{"subject": "General", "reason": "Please check individual course grades"}],
+    "weaknesses": [{"subject": "General", "reason": "Please check individual course grades"}],
+    "recommendations": ["Review course materials regularly",
+                        "Connect with professors during office hours",
+                        "Form study groups with classmates",
+                        "Practice time management",
+                        "Utilize campus resources like tutoring centers"]
+}
+
+@academic_pipeline.step(after=["metrics"], timeout=settings.PATTERN_LLM_STEP_TIMEOUT_SECONDS, fallback=DEFAULT_ANALYSIS)
+async def analysis(ctx: Context, data: Dict[str, Any]) -> Dict[str, Any]:
     # Use LLM to analyze strengths and weaknesses
-    courses_json = json.dumps(courses, indent=2)
-    goals_json = json.dumps(goals, indent=2) if goals else "{}"
-    
     prompt = f"""
     I need to analyze a student's academic performance based on their courses and goals.
     
-    Courses:
-    {courses_json}
-    
-    Goals:
-    {goals_json}
+    {data["metrics"]["student_data"]}
     
-    GPA: {gpa:.2f}
+    GPA: {data["metrics"]["gpa"]:.2f}
     
     Please identify:
     1. Top 3 strengths based on course performance
@@ -55,38 +74,36 @@ async def analyze_academic_performance(
     
     Format your response as JSON with keys: strengths, weaknesses, recommendations
     """
-    
-    # Sample from LLM
-    analysis_response = await ctx.sample(prompt)
-    analysis_text = analysis_response.text.strip()
-    
-    # Try to parse JSON response, fall back to structured analysis if it fails
-    try:
-        analysis = json.loads(analysis_text)
-    except json.JSONDecodeError:
-        await ctx.warning("Could not parse LLM response as JSON, falling back to structured analysis")
-        # Fallback analysis
-        analysis = {
-            "strengths": [{"subject": "General", "reason": "Please check individual course grades"}],
-            "weaknesses": [{"subject": "General", "reason": "Please check individual course grades"}],
-            "recommendations": ["Review course materials regularly", 
-                               "Connect with professors during office hours",
-                               "Form study groups with classmates",
-                               "Practice time management",
-                               "Utilize campus resources like tutoring centers"]
-        }
-    
-    # Report progress
-    await ctx.info("Generating action plan...")
-    
+    parsed = await sample_structured(ctx, prompt, PerformanceAnalysis, tool="analyze_academic_performance")
+    if parsed is None:
+        raise StepFailed("Could not parse LLM response as JSON")
+    return parsed.model_dump()
+
+# Default action plan
+DEFAULT_ACTION_PLAN = {
+    "weekly_actions": [
+        {"day": "Monday", "focus": "Review", "activities": ["Review notes", "Identify weak areas"]},
+        {"day": "Wednesday", "focus": "Practice", "activities": ["Complete practice problems", "Online tutorials"]},
+        {"day": "Friday", "focus": "Assessment", "activities": ["Self-quiz", "Summarize learning"]}
+    ],
+    "resources": [
+        {"name": "Khan Academy", "url": "https://www.khanacademy.org/"},
+        {"name": "University Tutoring Center", "url": "Contact academic advisor for details"}
+    ],
+    "progress_metrics": ["Weekly self-assessment", "Course grade improvement"]
+}
+
+@academic_pipeline.step(after=["metrics", "analysis"], timeout=settings.PATTERN_LLM_STEP_TIMEOUT_SECONDS,
+                        fallback=DEFAULT_ACTION_PLAN)
+async def action_plan(ctx: Context, data: Dict[str, Any]) -> Dict[str, Any]:
     # Now create an action plan based on the analysis
     action_plan_prompt = f"""
     Based on this academic analysis:
-    {json.dumps(analysis, indent=2)}
+    {serialize_context({"analysis": data["analysis"]}, "academic_analysis")}
     
     And student information:
-    - GPA: {gpa:.2f}
-    - Courses: {len(courses)} courses taken
+    - GPA: {data["metrics"]["gpa"]:.2f}
+    - Courses: {len(data["courses"])} courses taken
     
     Create a weekly action plan to help the student improve. Include:
     1. Specific daily activities for a week
@@ -95,37 +112,41 @@ async def analyze_academic_performance(
     
     Format as JSON with keys: weekly_actions, resources, progress_metrics
     """
+    parsed = await sample_structured(ctx, action_plan_prompt, ActionPlan, tool="analyze_academic_performance")
+    if parsed is None:
+        raise StepFailed("Could not parse action plan as JSON")
+    return parsed.model_dump()
+
+@academic_progress.tool()
+async def analyze_academic_performance(
+    courses: List[Dict[str, Any]],
+    goals: Optional[Dict[str, Any]] = None,
+    ctx: Context = None
+) -> Dict[str, Any]:
+    """
+    Analyze a student's academic performance and provide insights and recommendations.
     
-    action_plan_response = await ctx.sample(action_plan_prompt)
-    action_plan_text = action_plan_response.text.strip()
+    Args:
+        courses: List of course objects with grades, credits, and other metadata
+        goals: Optional academic goals the student has set
+        
+    Returns:
+        Dictionary containing performance analysis, strengths, weaknesses, and recommendations
+    """
+    # Log progress
+    await ctx.info("Analyzing academic performance and generating action plan...")
     
-    # Parse action plan
-    try:
-        action_plan = json.loads(action_plan_text)
-    except json.JSONDecodeError:
-        await ctx.warning("Could not parse action plan as JSON, using default")
-        # Default action plan
-        action_plan = {
-            "weekly_actions": [
-                {"day": "Monday", "focus": "Review", "activities": ["Review notes", "Identify weak areas"]},
-                {"day": "Wednesday", "focus": "Practice", "activities": ["Complete practice problems", "Online tutorials"]},
-                {"day": "Friday", "focus": "Assessment", "activities": ["Self-quiz", "Summarize learning"]}
-            ],
-            "resources": [
-                {"name": "Khan Academy", "url": "https://www.khanacademy.org/"},
-                {"name": "University Tutoring Center", "url": "Contact academic advisor for details"}
-            ],
-            "progress_metrics": ["Weekly self-assessment", "Course grade improvement"]
-        }
+    data = await academic_pipeline.run(ctx, courses=courses, goals=goals)
+    analysis = data["analysis"]
     
     # Combine analysis and action plan
     result = {
-        "gpa": round(gpa, 2),
-        "total_credits": total_credits,
+        "gpa": round(data["metrics"]["gpa"], 2),
+        "total_credits": data["metrics"]["total_credits"],
         "strengths": analysis.get("strengths", []),
         "weaknesses": analysis.get("weaknesses", []),
         "recommendations": analysis.get("recommendations", []),
-        "action_plan": action_plan
+        "action_plan": data["action_plan"]
     }
     
     await ctx.info("Academic analysis complete!")
@@ -1,48 +1,74 @@
 from fastmcp import FastMCP, Context
 from typing import Dict, List, Any, Optional
-import json
+from pydantic import BaseModel
+
+from core.config import settings
+from services.llm import sample_structured
+from services.llm.prompt_context import serialize_context
+from services.mcp.pipeline import Pipeline, StepFailed
 
 # This pattern will be imported into the main MCP server
 career_guidance = FastMCP("Career Guidance")
 
-@career_guidance.tool()
-async def analyze_career_path(
-    interests: List[str],
-    skills: List[str],
-    courses: Optional[List[Dict[str, Any]]] = None,
-    career_goals: Optional[List[str]] = None,
-    ctx: Context = None
-) -> Dict[str, Any]:
-    """
-    Analyze potential career paths based on interests, skills, courses, and goals.
-    
-    Args:
-        interests: List of student's interests
-        skills: List of student's skills
-        courses: Optional list of courses taken
-        career_goals: Optional list of career goals
-        
-    Returns:
-        Dictionary containing career path analysis and recommendations
-    """
-    # Log progress
-    await ctx.info("Analyzing career paths based on your profile...")
-    
+# Output schemas of the LLM steps
+class CareerPath(BaseModel):
+    path_name: str
+    description: str
+    existing_skills: List[str]
+    skills_to_develop: List[str]
+    recommended_courses: List[str]
+    job_titles: List[str]
+
+class CareerPathAnalysis(BaseModel):
+    career_paths: List[CareerPath]
+
+class Milestone(BaseModel):
+    month: int
+    focus: str
+
+class CareerActionPlan(BaseModel):
+    research_activities: List[str]
+    skill_development: List[str]
+    networking: List[str]
+    timeline: List[Milestone]
+
+# Steps of analyze_career_path. The action plan builds on the recommended
+# paths, so the two samples stay in sequence.
+career_pipeline = Pipeline("analyze_career_path")
+
+def default_career_paths(data: Dict[str, Any]) -> Dict[str, Any]:
+    # Fallback analysis
+    skills = data["skills"]
+    return {
+        "career_paths": [
+            {
+                "path_name": "Based on your interests",
+                "description": "Please provide more specific information about your interests and skills for better recommendations",
+                "existing_skills": skills[:2] if skills else ["Not enough information"],
+                "skills_to_develop": ["Research skills", "Communication skills"],
+                "recommended_courses": ["Courses related to your interests"],
+                "job_titles": ["Entry-level positions in your field of interest"]
+            }
+        ]
+    }
+
+@career_pipeline.step(timeout=settings.PATTERN_LLM_STEP_TIMEOUT_SECONDS, fallback=default_career_paths)
+async def career_paths(ctx: Context, data: Dict[str, Any]) -> Dict[str, Any]:
     # Prepare data for LLM
     profile_data = {
-        "interests": interests,
-        "skills": skills,
-        "courses": courses or [],
-        "career_goals": career_goals or []
+        "interests": data["interests"],
+        "skills": data["skills"],
+        "courses": data["courses"] or [],
+        "career_goals": data["career_goals"] or []
     }
     
-    profile_json = json.dumps(profile_data, indent=2)
+    profile_text = serialize_context(profile_data, "career_guidance")
     
     # Use LLM to analyze career paths
     prompt = f"""
     I need to analyze potential career paths for a student with the following profile:
     
-    {profile_json}
+    {profile_text}
     
     Please provide:
     1. Top 5 potential career paths that match their interests and skills
@@ -50,7 +76,7 @@ async def analyze_career_path(
     3. Recommended courses or certifications for each path
     4. Entry-level job titles to look for in each path
     
-    Format your response as JSON with an array of career paths, each containing:
+    Format your response as JSON with a career_paths array, each entry containing:
     - path_name: Name of career path
     - description: Brief description
     - existing_skills: Array of skills they already have
@@ -59,35 +85,43 @@ async def analyze_career_path(
     - job_titles: Array of entry-level job titles
     """
     
-    # Sample from LLM
-    analysis_response = await ctx.sample(prompt)
-    analysis_text = analysis_response.text.strip()
-    
-    # Try to parse JSON response
-    try:
-        career_paths = json.loads(analysis_text)
-    except json.JSONDecodeError:
-        await ctx.warning("Could not parse LLM response as JSON, falling back to structured analysis")
-        # Fallback analysis
-        career_paths = {
-            "career_paths": [
-                {
-                    "path_name": "Based on your interests",
-                    "description": "Please provide more specific information about your interests and skills for better recommendations",
-                    "existing_skills": skills[:2] if skills else ["Not enough information"],
-                    "skills_to_develop": ["Research skills", "Communication skills"],
-                    "recommended_courses": ["Courses related to your interests"],
-                    "job_titles": ["Entry-level positions in your field of interest"]
-                }
-            ]
-        }
-    
-    # Generate action steps
-    await ctx.info("Creating career development action plan...")
+    parsed = await sample_structured(ctx, prompt, CareerPathAnalysis, tool="analyze_career_path")
+    if parsed is None:
+        raise StepFailed("Could not parse LLM response as JSON")
+    return parsed.model_dump()
+
+# Default action plan
+DEFAULT_ACTION_PLAN = {
+    "research_activities": [
+        "Research job descriptions for positions of interest",
+        "Read industry publications and blogs",
+        "Watch informational videos about careers of interest"
+    ],
+    "skill_development": [
+        "Identify online courses related to desired skills",
+        "Practice projects to build portfolio",
+        "Join student organizations related to career interests"
+    ],
+    "networking": [
+        "Attend university career events",
+        "Connect with alumni in fields of interest",
+        "Join professional groups on LinkedIn"
+    ],
+    "timeline": [
+        {"month": 1, "focus": "Research and exploration"},
+        {"month": 2, "focus": "Skill building and initial networking"},
+        {"month": 3, "focus": "Applied projects and informational interviews"}
+    ]
+}
+
+@career_pipeline.step(after=["career_paths"], timeout=settings.PATTERN_LLM_STEP_TIMEOUT_SECONDS,
+                      fallback=DEFAULT_ACTION_PLAN)
+async def action_plan(ctx: Context, data: Dict[str, Any]) -> Dict[str, Any]:
+    paths_text = serialize_context({"career_paths": data["career_paths"]["career_paths"]}, "career_paths")
     
     action_plan_prompt = f"""
     Based on these career path recommendations:
-    {json.dumps(career_paths, indent=2)}
+    {paths_text}
     
     Create a 3-month action plan for this student to explore and prepare for these career paths.
     Include:
@@ -99,42 +133,41 @@ async def analyze_career_path(
     Format as JSON with keys: research_activities, skill_development, networking, timeline
     """
     
-    plan_response = await ctx.sample(action_plan_prompt)
-    plan_text = plan_response.text.strip()
-    
-    # Parse action plan
-    try:
-        action_plan = json.loads(plan_text)
-    except json.JSONDecodeError:
-        await ctx.warning("Could not parse action plan as JSON, using default")
-        # Default action plan
-        action_plan = {
-            "research_activities": [
-                "Research job descriptions for positions of interest",
-                "Read industry publications and blogs",
-                "Watch informational videos about careers of interest"
-            ],
-            "skill_development": [
-                "Identify online courses related to desired skills",
-                "Practice projects to build portfolio",
-                "Join student organizations related to career interests"
-            ],
-            "networking": [
-                "Attend university career events",
-                "Connect with alumni in fields of interest",
-                "Join professional groups on LinkedIn"
-            ],
-            "timeline": [
-                {"month": 1, "focus": "Research and exploration"},
-                {"month": 2, "focus": "Skill building and initial networking"},
-                {"month": 3, "focus": "Applied projects and informational interviews"}
-            ]
-        }
+    parsed = await sample_structured(ctx, action_plan_prompt, CareerActionPlan, tool="analyze_career_path")
+    if parsed is None:
+        raise StepFailed("Could not parse action plan as JSON")
+    return parsed.model_dump()
+
+@career_guidance.tool()
+async def analyze_career_path(
+    interests: List[str],
+    skills: List[str],
+    courses: Optional[List[Dict[str, Any]]] = None,
+    career_goals: Optional[List[str]] = None,
+    ctx: Context = None
+) -> Dict[str, Any]:
+    """
+    Analyze potential career paths based on interests, skills, courses, and goals.
+    
+    Args:
+        interests: List of student's interests
+        skills: List of student's skills
+        courses: Optional list of courses taken
+        career_goals: Optional list of career goals
+        
+    Returns:
+        Dictionary containing career path analysis and recommendations
+    """
+    # Log progress
+    await ctx.info("Analyzing career paths based on your profile...")
+    
+    data = await career_pipeline.run(ctx, interests=interests, skills=skills,
+                                     courses=courses, career_goals=career_goals)
     
     # Combine results
     result = {
-        "career_paths": career_paths.get("career_paths", []),
-        "action_plan": action_plan
+        "career_paths": data["career_paths"]["career_paths"],
+        "action_plan": data["action_plan"]
     }
     
     await ctx.info("Career path analysis complete!")
@@ -0,0 +1,229 @@
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional
+import asyncio
+import copy
+import inspect
+import json
+import time
+import logging
+
+from fastmcp.exceptions import NotFoundError
+
+from core.utils.metrics import metrics_registry
+from services.mcp.dispatch import mcp_dispatcher
+
+logger = logging.getLogger(__name__)
+
+StepFunction = Callable[[Any, Dict[str, Any]], Awaitable[Any]]
+
+# Marks a step without a fallback, since None is a valid fallback value
+NO_FALLBACK = object()
+
+class StepFailed(Exception):
+    """Raised by a step whose result is unusable, so its fallback is used"""
+
+class PipelineError(Exception):
+    """Raised when a step without a fallback fails"""
+
+async def read_resource_data(ctx: Any, uri: str) -> Any:
+    """
+    Read a resource through the tool's context and decode it.
+
+    Returns:
+        The decoded JSON value, the raw text when it isn't JSON, or None when
+        the resource returned no content
+    """
+    # Over an MCP session the main server only knows a component's resources by their prefixed URI
+    try:
+        _, _, uri = mcp_dispatcher.resolve_resource(uri)
+    except NotFoundError:
+        pass
+    contents = await ctx.read_resource(uri)
+    if not contents:
+        return None
+    content = contents[0].content
+    if isinstance(content, bytes):
+        content = content.decode("utf-8")
+    try:
+        return json.loads(content)
+    except (TypeError, json.JSONDecodeError):
+        return content
+
+class Step:
+    """One step of a pipeline"""
+
+    def __init__(self, name: str, fn: StepFunction, after: Iterable[str] = (),
+                 timeout: Optional[float] = None, fallback: Any = NO_FALLBACK):
+        self.name = name
+        self.fn = fn
+        self.after = list(after)
+        self.timeout = timeout
+        self.fallback = fallback
+
+    @property
+    def has_fallback(self) -> bool:
+        return self.fallback is not NO_FALLBACK
+
+    async def fallback_value(self, data: Dict[str, Any]) -> Any:
+        if not callable(self.fallback):
+            # Callers may change the result, so each run gets its own copy
+            return copy.deepcopy(self.fallback)
+        value = self.fallback(data)
+        return await value if inspect.isawaitable(value) else value
+
+class PipelineStats:
+    """Run counts and step timings per pipeline"""
+
+    def __init__(self):
+        self.pipelines: Dict[str, Dict[str, Any]] = {}
+
+    def record(self, pipeline: str, elapsed_ms: float, timings: Dict[str, Dict[str, Any]],
+               critical_path: List[str]) -> None:
+        entry = self.pipelines.setdefault(pipeline, {"runs": 0, "total_ms": 0.0, "steps": {}})
+        entry["runs"] += 1
+        entry["total_ms"] += elapsed_ms
+        entry["last_run"] = {"elapsed_ms": elapsed_ms, "critical_path": critical_path}
+        for name, timing in timings.items():
+            step = entry["steps"].setdefault(name, {"runs": 0, "total_ms": 0.0, "fallbacks": 0, "timeouts": 0})
+            step["runs"] += 1
+            step["total_ms"] += timing["ms"]
+            step["fallbacks"] += timing["status"] != "ok"
+            step["timeouts"] += timing["status"] == "timed_out"
+
+    def stats(self) -> Dict[str, Any]:
+        report = {}
+        for pipeline, entry in self.pipelines.items():
+            report[pipeline] = {
+                "runs": entry["runs"],
+                "avg_ms": round(entry["total_ms"] / entry["runs"], 1),
+                "last_run": entry["last_run"],
+                "steps": {
+                    name: {
+                        "avg_ms": round(step["total_ms"] / step["runs"], 1),
+                        "fallbacks": step["fallbacks"],
+                        "timeouts": step["timeouts"],
+                    }
+                    for name, step in entry["steps"].items()
+                },
+            }
+        return report
+
+pipeline_stats = PipelineStats()
+metrics_registry.register("pattern_pipelines", pipeline_stats.stats)
+
+class Pipeline:
+    """
+    Multi-step pattern whose steps run in dependency order.
+
+    Steps are declared with the `step` decorator and name the steps they
+    depend on. Each step starts as soon as its dependencies have finished,
+    so independent steps (resource reads, separate LLM analyses) run
+    concurrently and a run takes as long as its critical path.
+
+    A step function takes the tool's context and a dict holding the run's
+    inputs and the results of the steps finished so far, keyed by step
+    name. A step that raises or exceeds its timeout uses its fallback when
+    it has one, after a warning to the client; otherwise the run fails with
+    `PipelineError`. Step timings and the critical path of every run are
+    logged and reported on /metrics.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self.steps: Dict[str, Step] = {}
+
+    def step(self, after: Iterable[str] = (), timeout: Optional[float] = None,
+             fallback: Any = NO_FALLBACK, name: Optional[str] = None) -> Callable[[StepFunction], StepFunction]:
+        """
+        Declare a step.
+
+        Args:
+            after: Names of the steps whose results this step needs
+            timeout: Seconds the step may take
+            fallback: Value used when the step fails or times out, or a
+                callable computing it from the run's data
+            name: Step name, the function's name by default
+
+        Returns:
+            Decorator registering the step function
+        """
+        def decorator(fn: StepFunction) -> StepFunction:
+            step_name = name or fn.__name__
+            missing = [dependency for dependency in after if dependency not in self.steps]
+            if missing:
+                # Dependencies are declared first, which also rules out cycles
+                raise ValueError(f"Step {step_name} of {self.name} depends on undeclared steps: {', '.join(missing)}")
+            self.steps[step_name] = Step(step_name, fn, after, timeout, fallback)
+            return fn
+
+        return decorator
+
+    async def run(self, ctx: Any, **inputs: Any) -> Dict[str, Any]:
+        """
+        Run every step.
+
+        Args:
+            ctx: The FastMCP context of the calling tool
+            **inputs: Inputs available to every step
+
+        Returns:
+            The inputs and the result of every step, keyed by step name
+
+        Raises:
+            PipelineError: If a step without a fallback fails
+        """
+        started = time.perf_counter()
+        data: Dict[str, Any] = dict(inputs)
+        timings: Dict[str, Dict[str, Any]] = {}
+        tasks: Dict[str, asyncio.Task] = {}
+
+        async def run_step(step: Step) -> None:
+            await asyncio.gather(*(tasks[dependency] for dependency in step.after))
+            step_started = time.perf_counter()
+            status = "ok"
+            try:
+                result = await asyncio.wait_for(step.fn(ctx, data), timeout=step.timeout)
+            except Exception as e:
+                status = "timed_out" if isinstance(e, asyncio.TimeoutError) else "failed"
+                reason = f"timed out after {step.timeout}s" if status == "timed_out" else str(e) or type(e).__name__
+                if not step.has_fallback:
+                    raise PipelineError(f"Step {step.name} of {self.name} {status.replace('_', ' ')}: {reason}") from e
+                if ctx is not None:
+                    await ctx.warning(f"Step {step.name} {status.replace('_', ' ')} ({reason}), using fallback")
+                result = await step.fallback_value(data)
+            finished = time.perf_counter()
+            data[step.name] = result
+            timings[step.name] = {
+                "status": status,
+                "start_ms": round((step_started - started) * 1000, 1),
+                "ms": round((finished - step_started) * 1000, 1),
+                "end": finished,
+            }
+
+        # Steps are stored in declaration order, so dependencies get their tasks first
+        for step in self.steps.values():
+            tasks[step.name] = asyncio.create_task(run_step(step))
+        try:
+            await asyncio.gather(*tasks.values())
+        finally:
+            for task in tasks.values():
+                task.cancel()
+            await asyncio.gather(*tasks.values(), return_exceptions=True)
+
+        elapsed_ms = round((time.perf_counter() - started) * 1000, 1)
+        critical_path = self.critical_path(timings)
+        for timing in timings.values():
+            timing.pop("end")
+        pipeline_stats.record(self.name, elapsed_ms, timings, critical_path)
+        logger.info(f"Pipeline {self.name} finished in {elapsed_ms}ms, critical path "
+                    f"{' -> '.join(critical_path)}; steps: "
+                    + ", ".join(f"{name}={timing['ms']}ms" for name, timing in timings.items()))
+        return data
+
+    def critical_path(self, timings: Dict[str, Dict[str, Any]]) -> List[str]:
+        """Chain of steps that determined the run's duration, first to last"""
+        path: List[str] = []
+        current = max(timings, key=lambda name: timings[name]["end"], default=None)
+        while current is not None:
+            path.append(current)
+            current = max(self.steps[current].after, key=lambda name: timings[name]["end"], default=None)
+        return list(reversed(path))
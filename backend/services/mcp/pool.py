@@ -0,0 +1,240 @@
+from typing import Any, Callable, Dict, List, Optional, Set
+import asyncio
+import itertools
+import time
+import logging
+from fastmcp import Client
+from fastmcp.client.transports import SSETransport
+from fastmcp.exceptions import ClientError
+from mcp.shared.exceptions import McpError
+
+logger = logging.getLogger(__name__)
+
+class MCPPoolUnavailable(Exception):
+    """Raised when no MCP worker can take a call"""
+
+class MCPCallTimeout(Exception):
+    """Raised when a call to a reachable MCP worker does not finish in time"""
+
+class _Worker:
+    """One MCP worker process and the persistent client session held to it"""
+
+    def __init__(self, url: str):
+        self.url = url
+        self.client: Optional[Client] = None
+        self.healthy = False
+        self.in_flight = 0
+        self.connecting = False
+        self.last_error: Optional[str] = None
+        self.connected_at: Optional[float] = None
+        self.counters = {"calls": 0, "errors": 0, "timeouts": 0, "reconnects": 0}
+        self._task: Optional[asyncio.Task] = None
+        self._ready: Optional[asyncio.Event] = None
+        self._closing: Optional[asyncio.Event] = None
+
+    async def _hold(self, sampling_handler: Optional[Callable]) -> None:
+        """Keep the session open until closed; the session must be entered and left in one task"""
+        try:
+            # No session read timeout: calls are bounded by the pool's call timeout alone
+            client = Client(SSETransport(self.url), sampling_handler=sampling_handler)
+            async with client:
+                self.client = client
+                self.healthy = True
+                self.connected_at = time.monotonic()
+                self._ready.set()
+                await self._closing.wait()
+        except Exception as e:
+            self.last_error = str(e)
+            logger.warning(f"MCP worker {self.url} connection failed: {str(e)}")
+        finally:
+            self.client = None
+            self.healthy = False
+            self._ready.set()
+
+    async def connect(self, sampling_handler: Optional[Callable], timeout: float) -> bool:
+        """Open the session, replacing a broken one; returns whether it is usable"""
+        await self.close()
+        self._ready = asyncio.Event()
+        self._closing = asyncio.Event()
+        self._task = asyncio.create_task(self._hold(sampling_handler))
+        try:
+            await asyncio.wait_for(self._ready.wait(), timeout=timeout)
+        except asyncio.TimeoutError:
+            self.last_error = f"Connection timed out after {timeout}s"
+            await self.close()
+        return self.healthy
+
+    async def close(self) -> None:
+        if self._task is None:
+            return
+        self._closing.set()
+        try:
+            await asyncio.wait_for(self._task, timeout=5)
+        except asyncio.TimeoutError:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+        self.healthy = False
+
+    def describe(self) -> Dict[str, Any]:
+        return {
+            "healthy": self.healthy,
+            "in_flight": self.in_flight,
+            "last_error": self.last_error,
+            **self.counters,
+        }
+
+class MCPClientPool:
+    """
+    Persistent, load-balanced MCP client sessions to a pool of worker processes.
+
+    Each worker URL (the SSE endpoint of one `services.mcp.worker` process)
+    gets one long-lived session; MCP multiplexes concurrent requests over it.
+    Calls go to the healthy worker with the fewest calls in flight. A
+    background loop pings every worker and reconnects the ones that fail. A
+    call that fails because its worker is unreachable is retried on another
+    worker. Errors raised by the tool itself and calls that exceed
+    `call_timeout` are not retried, since the tool may have run or still be
+    running, and a slow call leaves its worker and session in place.
+    """
+
+    def __init__(self, urls: List[str], sampling_handler: Optional[Callable] = None,
+                 health_interval: float = 10.0, retries: int = 2, call_timeout: float = 60.0,
+                 connect_timeout: float = 5.0):
+        if not urls:
+            raise ValueError("MCP client pool needs at least one worker URL")
+        self.workers = [_Worker(url) for url in urls]
+        self.sampling_handler = sampling_handler
+        self.health_interval = health_interval
+        self.retries = retries
+        self.call_timeout = call_timeout
+        self.connect_timeout = connect_timeout
+        self._rotation = itertools.count()
+        self._health_task: Optional[asyncio.Task] = None
+        # Background reconnects started by failed calls, kept until they finish
+        self._reconnect_tasks: Set[asyncio.Task] = set()
+        self._start_lock = asyncio.Lock()
+        self.counters = {"calls": 0, "retries": 0, "unavailable": 0}
+
+    async def start(self) -> None:
+        """Connect to every worker and start the health checks"""
+        async with self._start_lock:
+            if self._health_task is not None:
+                return
+            await asyncio.gather(*(self._connect(worker) for worker in self.workers))
+            self._health_task = asyncio.create_task(self._health_loop())
+            healthy = sum(worker.healthy for worker in self.workers)
+            logger.info(f"MCP client pool connected to {healthy}/{len(self.workers)} workers")
+
+    async def _connect(self, worker: _Worker) -> bool:
+        # Calls failing together on a dead worker trigger one reconnect
+        if worker.connecting:
+            return worker.healthy
+        worker.connecting = True
+        try:
+            reconnecting = worker.connected_at is not None
+            connected = await worker.connect(self.sampling_handler, self.connect_timeout)
+        finally:
+            worker.connecting = False
+        if connected and reconnecting:
+            worker.counters["reconnects"] += 1
+        return connected
+
+    def _reconnect(self, worker: _Worker) -> None:
+        """Reconnect a worker in the background, without holding up the failed call"""
+        task = asyncio.create_task(self._connect(worker))
+        self._reconnect_tasks.add(task)
+        task.add_done_callback(self._reconnect_done)
+
+    def _reconnect_done(self, task: asyncio.Task) -> None:
+        self._reconnect_tasks.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            logger.error(f"MCP worker reconnect failed: {str(task.exception())}")
+
+    async def _check(self, worker: _Worker) -> None:
+        if worker.healthy and worker.client is not None:
+            try:
+                await asyncio.wait_for(worker.client.ping(), timeout=self.connect_timeout)
+                return
+            except Exception as e:
+                worker.last_error = f"Health check failed: {str(e) or type(e).__name__}"
+                logger.warning(f"MCP worker {worker.url} failed its health check")
+        await self._connect(worker)
+
+    async def _health_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.health_interval)
+            await asyncio.gather(*(self._check(worker) for worker in self.workers))
+
+    def _pick(self, exclude: List[_Worker]) -> Optional[_Worker]:
+        candidates = [worker for worker in self.workers if worker.healthy and worker not in exclude]
+        if not candidates:
+            return None
+        # Fewest calls in flight; rotate among equals so load spreads evenly
+        offset = next(self._rotation)
+        order = {id(worker): (index - offset) % len(self.workers) for index, worker in enumerate(self.workers)}
+        return min(candidates, key=lambda worker: (worker.in_flight, order[id(worker)]))
+
+    async def _call(self, operation: str, run: Callable[[Client], Any]) -> Any:
+        if self._health_task is None:
+            await self.start()
+        self.counters["calls"] += 1
+
+        tried: List[_Worker] = []
+        error: Optional[BaseException] = None
+        for attempt in range(self.retries + 1):
+            worker = self._pick(tried)
+            if worker is None:
+                break
+            if attempt:
+                self.counters["retries"] += 1
+            tried.append(worker)
+            worker.in_flight += 1
+            worker.counters["calls"] += 1
+            try:
+                return await asyncio.wait_for(run(worker.client), timeout=self.call_timeout)
+            except (ClientError, McpError):
+                # The worker answered; the tool or resource itself failed
+                raise
+            except asyncio.TimeoutError:
+                # A slow call, not a dead worker; the other calls on its session carry on
+                worker.counters["timeouts"] += 1
+                raise MCPCallTimeout(f"MCP {operation} on {worker.url} timed out after {self.call_timeout}s")
+            except Exception as e:
+                error = e
+                worker.counters["errors"] += 1
+                worker.healthy = False
+                worker.last_error = str(e) or type(e).__name__
+                logger.warning(f"MCP {operation} on {worker.url} failed, trying another worker: {worker.last_error}")
+                self._reconnect(worker)
+            finally:
+                worker.in_flight -= 1
+
+        self.counters["unavailable"] += 1
+        raise MCPPoolUnavailable(f"No MCP worker could serve {operation}: {error or 'no healthy workers'}")
+
+    async def call_tool(self, name: str, arguments: Dict[str, Any]) -> List[Any]:
+        """Call a tool on one of the workers and return the raw MCP contents"""
+        return await self._call(f"tool {name}", lambda client: client.call_tool(name, arguments))
+
+    async def read_resource(self, uri: str) -> List[Any]:
+        """Read a resource from one of the workers and return the raw MCP contents"""
+        return await self._call(f"resource {uri}", lambda client: client.read_resource(uri))
+
+    async def aclose(self) -> None:
+        if self._health_task is not None:
+            self._health_task.cancel()
+            await asyncio.gather(self._health_task, return_exceptions=True)
+            self._health_task = None
+        reconnects = list(self._reconnect_tasks)
+        for task in reconnects:
+            task.cancel()
+        await asyncio.gather(*reconnects, return_exceptions=True)
+        await asyncio.gather(*(worker.close() for worker in self.workers))
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            **self.counters,
+            "healthy_workers": sum(worker.healthy for worker in self.workers),
+            "workers": {worker.url: worker.describe() for worker in self.workers},
+        }
@@ -0,0 +1,251 @@
+from typing import Dict, Any, Callable, List, Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Renderers for known tool result shapes, keyed by tool name
+renderers: Dict[str, Callable[[Dict[str, Any]], Optional[str]]] = {}
+
+def renderer(*tool_names: str):
+    """Register a function that formats the result of the given tools"""
+    def decorator(fn: Callable[[Dict[str, Any]], Optional[str]]):
+        for tool_name in tool_names:
+            renderers[tool_name] = fn
+        return fn
+    return decorator
+
+def render_tool_result(tool_name: str, result: Any) -> Optional[str]:
+    """
+    Format a tool result as a chat reply without calling the LLM.
+
+    Args:
+        tool_name: Name of the tool that produced the result (prefix optional)
+        result: The decoded tool result
+
+    Returns:
+        The reply text, or None when the tool or the result shape is unknown
+        and the caller should fall back to an LLM rewrite
+    """
+    fn = renderers.get(tool_name) or renderers.get(tool_name.split("_", 1)[-1])
+    if fn is None or not isinstance(result, dict):
+        return None
+
+    try:
+        return fn(result)
+    except (AttributeError, KeyError, TypeError, ValueError) as e:
+        logger.warning(f"Could not render result of {tool_name}: {str(e)}")
+        return None
+
+def _label(item: Any, *keys: str) -> str:
+    """Text for a list item that the LLM may have returned as a string or a dict"""
+    if isinstance(item, dict):
+        for key in keys:
+            if item.get(key):
+                return str(item[key])
+        return ", ".join(str(value) for value in item.values() if value)
+    return str(item)
+
+def _join(items: Any, limit: Optional[int] = None) -> str:
+    items = items if isinstance(items, list) else [items] if items else []
+    return ", ".join(str(item) for item in items[:limit])
+
+def _bullets(items: Any, *keys: str) -> List[str]:
+    items = items if isinstance(items, list) else [items] if items else []
+    return [f"- {_label(item, *keys)}" for item in items]
+
+def _section(title: str, lines: List[str]) -> str:
+    return f"{title}\n" + "\n".join(lines) if lines else ""
+
+def _compose(*parts: str) -> str:
+    return "\n\n".join(part for part in parts if part)
+
+@renderer("analyze_academic_performance")
+def render_academic_performance(result: Dict[str, Any]) -> Optional[str]:
+    if "action_plan" not in result:
+        return None
+
+    strengths = result.get("strengths") or []
+    weaknesses = result.get("weaknesses") or []
+    action_plan = result.get("action_plan") or {}
+
+    intro = "Based on my analysis of your academic performance,"
+    if result.get("gpa") is not None:
+        intro += f" your GPA is {result['gpa']:.2f} across {result.get('total_credits', 0)} credits."
+    else:
+        intro += " here is where you stand."
+    if strengths:
+        intro += f" You're doing well in {', '.join(_label(s, 'subject', 'name') for s in strengths[:2])}."
+    if weaknesses:
+        intro += f" You might want to focus more on {', '.join(_label(w, 'subject', 'name') for w in weaknesses[:2])}."
+
+    weekly_actions = []
+    for action in action_plan.get("weekly_actions") or []:
+        if isinstance(action, dict):
+            line = f"- {action.get('day', 'This week')}: Focus on {action.get('focus', 'your coursework')}"
+            if action.get("activities"):
+                line += f" with activities like {_join(action['activities'])}"
+            weekly_actions.append(line)
+        else:
+            weekly_actions.append(f"- {action}")
+
+    resources = []
+    for resource in action_plan.get("resources") or []:
+        if isinstance(resource, dict) and resource.get("url"):
+            resources.append(f"- {resource.get('name', 'Resource')}: {resource['url']}")
+        else:
+            resources.append(f"- {_label(resource, 'name')}")
+
+    return _compose(
+        intro,
+        _section("My recommendations:", _bullets(result.get("recommendations"), "recommendation", "text")),
+        _section("Here's an action plan to help you improve:", weekly_actions),
+        _section("Recommended resources:", resources),
+        _section("Ways to measure your progress:", _bullets(action_plan.get("progress_metrics"), "metric", "name")),
+    )
+
+@renderer("analyze_career_path")
+def render_career_path(result: Dict[str, Any]) -> Optional[str]:
+    if "career_paths" not in result:
+        return None
+
+    paths = []
+    for index, path in enumerate(result.get("career_paths") or [], start=1):
+        if not isinstance(path, dict):
+            paths.append(f"{index}. {path}")
+            continue
+        lines = [f"{index}. {path.get('path_name', 'Career path')}"]
+        if path.get("description"):
+            lines.append(f"   {path['description']}")
+        if path.get("existing_skills"):
+            lines.append(f"   Skills you already have: {_join(path['existing_skills'])}")
+        if path.get("skills_to_develop"):
+            lines.append(f"   Skills to develop: {_join(path['skills_to_develop'])}")
+        if path.get("recommended_courses"):
+            lines.append(f"   Recommended courses: {_join(path['recommended_courses'])}")
+        if path.get("job_titles"):
+            lines.append(f"   Entry-level roles: {_join(path['job_titles'])}")
+        paths.append("\n".join(lines))
+
+    action_plan = result.get("action_plan") or {}
+    timeline = [
+        f"- Month {step.get('month')}: {step.get('focus')}" if isinstance(step, dict) else f"- {step}"
+        for step in action_plan.get("timeline") or []
+    ]
+
+    return _compose(
+        "Here are some career paths that fit your interests and goals:" if paths else
+        "I couldn't identify specific career paths yet. Tell me more about your interests and skills.",
+        "\n\n".join(paths),
+        _section("Research to start with:", _bullets(action_plan.get("research_activities"), "activity", "name")),
+        _section("Skills to build:", _bullets(action_plan.get("skill_development"), "activity", "skill")),
+        _section("Networking opportunities:", _bullets(action_plan.get("networking"), "activity", "name")),
+        _section("Your 3-month timeline:", timeline),
+    )
+
+@renderer("generate_study_plan")
+def render_study_plan(result: Dict[str, Any]) -> Optional[str]:
+    if "plan" not in result:
+        return None
+    if not result.get("success") or not result.get("plan"):
+        return f"I couldn't create a study plan for {result.get('course_id', 'that course')}: {result.get('message', 'course not found')}."
+
+    plan = result["plan"]
+    schedule = []
+    for session in plan.get("weekly_schedule") or []:
+        if isinstance(session, dict):
+            schedule.append(f"- {session.get('day', 'Session')} ({session.get('duration', 'flexible')}): {session.get('focus', 'study')}")
+        else:
+            schedule.append(f"- {session}")
+
+    return _compose(
+        f"Here's a weekly study plan for {result.get('course_name', result.get('course_id'))} "
+        f"using your {result.get('hours_available')} hours per week.",
+        _section("Weekly schedule:", schedule),
+        _section("Study strategies:", _bullets(plan.get("study_strategies"), "strategy", "name")),
+        _section("Resources:", _bullets(plan.get("resources"), "name", "title")),
+        _section("Tracking your progress:", _bullets(plan.get("progress_tracking"), "method", "name")),
+    )
+
+@renderer("create_semester_schedule")
+def render_semester_schedule(result: Dict[str, Any]) -> Optional[str]:
+    if "schedule" not in result:
+        return None
+    if not result.get("success") or not result.get("schedule"):
+        return f"I couldn't build a schedule: {result.get('message', 'no valid courses found')}."
+
+    schedule = result["schedule"]
+    meetings = []
+    for meeting in schedule.get("weekly_schedule") or []:
+        if isinstance(meeting, dict):
+            meetings.append(
+                f"- {meeting.get('day')} {meeting.get('time', '')}: "
+                f"{meeting.get('course_name') or meeting.get('course_id')}".replace("  ", " ")
+            )
+        else:
+            meetings.append(f"- {meeting}")
+
+    workload = schedule.get("workload_distribution") or {}
+    workload_lines = (
+        [f"- {day}: {load}" for day, load in workload.items()] if isinstance(workload, dict)
+        else _bullets(workload)
+    )
+
+    study_blocks = []
+    for block in schedule.get("study_blocks") or []:
+        if isinstance(block, dict):
+            study_blocks.append(
+                f"- {block.get('day')} {block.get('time', '')} for {block.get('duration', 'a block')}: "
+                f"{block.get('course_name') or block.get('course_id')}"
+            )
+        else:
+            study_blocks.append(f"- {block}")
+
+    return _compose(
+        f"Here's your semester schedule with {result.get('total_credits', 0)} credits. {result.get('credits_message', '')}".strip(),
+        _section("Class meetings:", meetings),
+        _section("Workload by day:", workload_lines),
+        _section("Suggested study blocks:", study_blocks),
+    )
+
+@renderer("plan_degree_path")
+def render_degree_path(result: Dict[str, Any]) -> Optional[str]:
+    if "path" not in result:
+        return None
+    if not result.get("success") or not result.get("path"):
+        return f"I couldn't plan a degree path: {result.get('message', 'the course catalog is unavailable')}."
+
+    path = result["path"]
+    semesters = path.get("semesters") if isinstance(path, dict) else path
+    lines = []
+    for semester in semesters or []:
+        if isinstance(semester, dict):
+            line = f"- Semester {semester.get('semester_number')}: {_join(semester.get('recommended_courses'))}"
+            if semester.get("credits"):
+                line += f" ({semester['credits']} credits)"
+            lines.append(line)
+        else:
+            lines.append(f"- {semester}")
+
+    return _compose(
+        f"Here's a path to graduation for your {result.get('major')} major, starting from semester {result.get('current_semester')}.",
+        _section("Courses by semester:", lines),
+    )
+
+@renderer("calculate_gpa")
+def render_gpa(result: Dict[str, Any]) -> Optional[str]:
+    if "gpa" not in result:
+        return None
+    return f"Your GPA is {result['gpa']:.2f} across {result.get('total_credits', 0)} credits."
+
+@renderer("search_courses")
+def render_course_search(result: Dict[str, Any]) -> Optional[str]:
+    if "results" not in result:
+        return None
+    if not result["results"]:
+        return f"I couldn't find any courses matching \"{result.get('query')}\"."
+
+    lines = [
+        f"- {course.get('id')}: {course.get('name')} ({course.get('department')}, {course.get('credits')} credits)"
+        for course in result["results"]
+    ]
+    return _section(f"Courses matching \"{result.get('query')}\":", lines)
@@ -1,127 +1,141 @@
 from fastmcp import FastMCP, Context
 from typing import Dict, Any, List, Optional
+from urllib.parse import parse_qsl
+
+from core.config import settings
+from services.courses import course_catalog, course_search
+from services.mcp.memoize import memo_registry, memoize
+
+# Course data only changes when the catalog is reloaded, which drops the cached results
+CATALOG_TTL_SECONDS = 3600
+course_catalog.subscribe(lambda previous, catalog: memo_registry.invalidate("catalog") if previous else None)
+
+# Query parameters of courses://catalog?...
+CATALOG_FILTERS = ("department", "semester", "prerequisite")
 
 # This module will be imported into the main MCP server
 courses_data = FastMCP("Course Information")
 courses_data.settings.sse_path = "/mcp/courses"
 
+async def catalog_page(cursor: Optional[str] = None, limit: Optional[int] = None,
+                       **filters: Optional[str]) -> Dict[str, Any]:
+    """One page of the catalog, as returned by the courses://catalog resources"""
+    catalog = await course_catalog.get()
+    limit = max(1, min(limit or settings.COURSE_CATALOG_PAGE_SIZE, settings.COURSE_CATALOG_MAX_PAGE_SIZE))
+    courses, next_cursor, total = catalog.page(limit, cursor, **filters)
+    return {
+        "courses": courses,
+        "next_cursor": next_cursor,
+        "total": total,
+        "catalog_version": catalog.version,
+    }
+
 @courses_data.resource("courses://catalog")
-async def get_course_catalog(ctx: Context = None) -> List[Dict[str, Any]]:
+@memoize(ttl=CATALOG_TTL_SECONDS, tags={"catalog"})
+async def get_course_catalog(ctx: Context = None) -> Dict[str, Any]:
     """
-    Get the full course catalog.
+    Get the first page of the course catalog.
     
     Returns:
-        List of all available courses
+        Dict with the page's course summaries, the cursor of the next page
+        (None on the last page), the total number of courses and the
+        catalog version. Further pages and filters are available through
+        courses://catalog?cursor=...&limit=...&department=...&semester=...&prerequisite=...
     """
-    # In a real implementation, this would query a database
     await ctx.info("Retrieving course catalog")
     
-    # Mock course catalog
-    return [
-        {
-            "id": "CS101",
-            "name": "Introduction to Programming",
-            "department": "Computer Science",
-            "credits": 3,
-            "description": "Fundamentals of programming using Python, covering basic syntax, data structures, and algorithms."
-        },
-        {
-            "id": "CS201",
-            "name": "Data Structures",
-            "department": "Computer Science", 
-            "credits": 4,
-            "description": "Advanced data structures and algorithms, including trees, graphs, and complexity analysis."
-        },
-        {
-            "id": "MATH240",
-            "name": "Linear Algebra",
-            "department": "Mathematics",
-            "credits": 3,
-            "description": "Vector spaces, linear transformations, matrices, determinants, eigenvalues, and applications."
-        },
-        {
-            "id": "BIO101",
-            "name": "Introduction to Biology",
-            "department": "Biology",
-            "credits": 4,
-            "description": "Foundational concepts in biology, including cell structure, genetics, and evolution."
-        },
-        {
-            "id": "CHEM101",
-            "name": "General Chemistry",
-            "department": "Chemistry",
-            "credits": 4,
-            "description": "Basic principles of chemistry, atomic structure, periodic table, chemical bonding, and reactions."
-        }
-    ]
+    return await catalog_page()
+
+# Declared ahead of courses://{course_id}, which would match the query URI too
+@courses_data.resource("courses://catalog?{query}")
+@memoize(ttl=CATALOG_TTL_SECONDS, tags={"catalog"}, maxsize=4096)
+async def get_course_catalog_page(query: str, ctx: Context = None) -> Dict[str, Any]:
+    """
+    Get one page of the course catalog, optionally filtered.
+    
+    Args:
+        query: Query string with any of `cursor` (from the previous page),
+            `limit`, `department`, `semester` (e.g. Fall) and `prerequisite`
+            (a course id, to list the courses requiring it)
+    
+    Returns:
+        Dict with the page's course summaries, the cursor of the next page
+        (None on the last page), the number of matching courses and the
+        catalog version
+    """
+    await ctx.info(f"Retrieving course catalog page ({query})")
+    
+    params = dict(parse_qsl(query, keep_blank_values=True))
+    unknown = set(params) - {"cursor", "limit", *CATALOG_FILTERS}
+    if unknown:
+        raise ValueError(f"Unknown catalog parameters: {', '.join(sorted(unknown))}")
+    try:
+        limit = int(params["limit"]) if params.get("limit") else None
+    except ValueError:
+        raise ValueError(f"Invalid limit: {params['limit']}")
+    
+    return await catalog_page(
+        cursor=params.get("cursor") or None,
+        limit=limit,
+        **{name: params[name] for name in CATALOG_FILTERS if params.get(name)}
+    )
+
+# Declared ahead of courses://{course_id} as well
+@courses_data.resource("courses://search?{query}")
+async def search_courses(query: str, ctx: Context = None) -> Dict[str, Any]:
+    """
+    Search the course catalog by name, topics and description.
+    
+    Args:
+        query: Query string with `q` (free text), and optionally `limit` and
+            `department`
+        
+    Returns:
+        Dict with the query, the best matching course summaries with their
+        relevance `score` (best first) and the catalog version
+    """
+    params = dict(parse_qsl(query, keep_blank_values=True))
+    unknown = set(params) - {"q", "limit", "department"}
+    if unknown:
+        raise ValueError(f"Unknown search parameters: {', '.join(sorted(unknown))}")
+    try:
+        limit = int(params["limit"]) if params.get("limit") else None
+    except ValueError:
+        raise ValueError(f"Invalid limit: {params['limit']}")
+    
+    await ctx.info(f"Searching courses for '{params.get('q', '')}'")
+    
+    return await course_search.search(params.get("q", ""), limit=limit, department=params.get("department") or None)
+
+# Without it, a bare courses://search would be read as the course with id "search"
+@courses_data.resource("courses://search")
+async def search_courses_without_query(ctx: Context = None) -> Dict[str, Any]:
+    """
+    Reject a course search without a query.
+
+    Raises:
+        ValueError: Always; searches need courses://search?q=...
+    """
+    raise ValueError("Missing search query, use courses://search?q=...")
 
 @courses_data.resource("courses://{course_id}")
+@memoize(ttl=CATALOG_TTL_SECONDS, tags={"catalog"})
 async def get_course_details(course_id: str, ctx: Context = None) -> Dict[str, Any]:
     """
     Get detailed information about a specific course.
     
     Args:
         course_id: The ID of the course
-        
+    
     Returns:
         Detailed course information
     """
-    # In a real implementation, this would query a database
     await ctx.info(f"Retrieving details for course {course_id}")
     
-    # Mock course details
-    course_details = {
-        "CS101": {
-            "id": "CS101",
-            "name": "Introduction to Programming",
-            "department": "Computer Science",
-            "credits": 3,
-            "description": "Fundamentals of programming using Python, covering basic syntax, data structures, and algorithms.",
-            "prerequisites": [],
-            "offered_semesters": ["Fall", "Spring"],
-            "syllabus_url": "https://university.edu/cs101/syllabus",
-            "topics": [
-                "Programming fundamentals",
-                "Variables and data types",
-                "Control structures",
-                "Functions",
-                "Basic data structures",
-                "File I/O",
-                "Introduction to algorithms"
-            ],
-            "textbooks": [
-                {"title": "Python Programming: An Introduction to Computer Science", "author": "John Zelle"}
-            ]
-        },
-        "CS201": {
-            "id": "CS201",
-            "name": "Data Structures",
-            "department": "Computer Science",
-            "credits": 4,
-            "description": "Advanced data structures and algorithms, including trees, graphs, and complexity analysis.",
-            "prerequisites": ["CS101"],
-            "offered_semesters": ["Spring"],
-            "syllabus_url": "https://university.edu/cs201/syllabus",
-            "topics": [
-                "Algorithm analysis",
-                "Linked lists",
-                "Stacks and queues",
-                "Trees and binary search trees",
-                "Heaps",
-                "Hash tables",
-                "Graphs",
-                "Sorting algorithms"
-            ],
-            "textbooks": [
-                {"title": "Data Structures and Algorithms in Python", "author": "Michael T. Goodrich"}
-            ]
-        }
-    }
-    
-    # Add more courses as needed
+    catalog = await course_catalog.get()
     
     # Return course details or a default if not found
-    return course_details.get(course_id, {
+    return catalog.get(course_id) or {
         "id": course_id,
         "name": "Unknown Course",
         "department": "Unknown",
@@ -130,29 +144,21 @@ async def get_course_details(course_id: str, ctx: Context = None) -> Dict[str, A
         "prerequisites": [],
         "offered_semesters": [],
         "topics": []
-    })
+    }
 
 @courses_data.resource("courses://departments/{department_name}")
+@memoize(ttl=CATALOG_TTL_SECONDS, tags={"catalog"})
 async def get_department_courses(department_name: str, ctx: Context = None) -> List[Dict[str, Any]]:
     """
     Get courses offered by a specific department.
     
     Args:
-        department_name: The name of the department
-        
+        department_name: The name of the department, case-insensitive
+    
     Returns:
-        List of courses in the department
+        Summaries of the courses in the department
     """
-    # In a real implementation, this would query a database
     await ctx.info(f"Retrieving courses for department {department_name}")
     
-    # Get all courses
-    all_courses = await get_course_catalog(ctx)
-    
-    # Filter by department
-    department_courses = [
-        course for course in all_courses 
-        if course.get("department", "").lower() == department_name.lower()
-    ]
-    
-    return department_courses
\ No newline at end of file
+    catalog = await course_catalog.get()
+    return catalog.department(department_name)
@@ -1,9 +1,23 @@
 from fastmcp import FastMCP, Context
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List
+
+from services.students import build_student_context, get_student_repository
 
 # This module will be imported into the main MCP server
 student_data = FastMCP("Student Data Resources")
 
+def default_profile(student_id: str) -> Dict[str, Any]:
+    """Profile returned for a student who isn't on record"""
+    return {
+        "id": student_id,
+        "name": "Unknown Student",
+        "major": "Undeclared",
+        "year": 1,
+        "gpa": 0.0,
+        "interests": [],
+        "career_goals": []
+    }
+
 @student_data.resource("student://{student_id}/profile")
 async def get_student_profile(student_id: str, ctx: Context = None) -> Dict[str, Any]:
     """
@@ -15,43 +29,13 @@ async def get_student_profile(student_id: str, ctx: Context = None) -> Dict[str,
     Returns:
         Student profile data
     """
-    # In a real implementation, this would query a database
-    # For now, we'll return mock data
     await ctx.info(f"Retrieving profile for student {student_id}")
     
-    # Mock student profiles
-    profiles = {
-        "1": {
-            "id": "1",
-            "name": "Alex Johnson",
-            "major": "Computer Science",
-            "year": 3,
-            "gpa": 3.7,
-            "interests": ["Artificial Intelligence", "Web Development", "Game Design"],
-            "career_goals": ["Software Engineer", "AI Researcher"]
-        },
-        "2": {
-            "id": "2",
-            "name": "Sam Rivera",
-            "major": "Biology",
-            "year": 2,
-            "gpa": 3.2,
-            "interests": ["Genetics", "Environmental Science", "Research"],
-            "career_goals": ["Medical Researcher", "Biotechnology"]
-        },
-        # Add more mock profiles as needed
-    }
+    # Batched with the other profile reads of the request (see services.students)
+    profile = await get_student_repository().get_profile(student_id)
     
     # Return the profile or a default if not found
-    return profiles.get(student_id, {
-        "id": student_id,
-        "name": "Unknown Student",
-        "major": "Undeclared",
-        "year": 1,
-        "gpa": 0.0,
-        "interests": [],
-        "career_goals": []
-    })
+    return profile or default_profile(student_id)
 
 @student_data.resource("student://{student_id}/courses")
 async def get_student_courses(student_id: str, ctx: Context = None) -> List[Dict[str, Any]]:
@@ -62,74 +46,27 @@ async def get_student_courses(student_id: str, ctx: Context = None) -> List[Dict
         student_id: The ID of the student
         
     Returns:
-        List of course data
+        List of course data, empty for an unknown student
     """
-    # In a real implementation, this would query a database
     await ctx.info(f"Retrieving courses for student {student_id}")
     
-    # Mock course data by student
-    courses = {
-        "1": [
-            {
-                "id": "CS101",
-                "name": "Introduction to Programming",
-                "credits": 3,
-                "grade": "A",
-                "grade_points": 4.0,
-                "semester": "Fall 2024"
-            },
-            {
-                "id": "CS201",
-                "name": "Data Structures",
-                "credits": 4,
-                "grade": "B+",
-                "grade_points": 3.3,
-                "semester": "Spring 2025"
-            },
-            {
-                "id": "MATH240",
-                "name": "Linear Algebra",
-                "credits": 3,
-                "grade": "B",
-                "grade_points": 3.0,
-                "semester": "Fall 2024"
-            },
-            {
-                "id": "ENG101",
-                "name": "College Writing",
-                "credits": 3,
-                "grade": "A-",
-                "grade_points": 3.7,
-                "semester": "Fall 2024"
-            }
-        ],
-        "2": [
-            {
-                "id": "BIO101",
-                "name": "Introduction to Biology",
-                "credits": 4,
-                "grade": "A-",
-                "grade_points": 3.7,
-                "semester": "Fall 2024"
-            },
-            {
-                "id": "CHEM101",
-                "name": "General Chemistry",
-                "credits": 4,
-                "grade": "B",
-                "grade_points": 3.0,
-                "semester": "Fall 2024"
-            },
-            {
-                "id": "MATH101",
-                "name": "Calculus I",
-                "credits": 4,
-                "grade": "C+",
-                "grade_points": 2.3,
-                "semester": "Spring 2025"
-            }
-        ]
-    }
+    return await get_student_repository().get_courses(student_id)
+
+@student_data.resource("student://{student_id}/context")
+async def get_student_context(student_id: str, ctx: Context = None) -> Dict[str, Any]:
+    """
+    Get everything the chat and planning tools need about a student in one read.
+    
+    Args:
+        student_id: The ID of the student
+        
+    Returns:
+        Dict with the student's profile, courses, academic_summary (GPA and
+        credit totals computed from the courses) and a version stamp that
+        changes whenever the profile or courses do
+    """
+    await ctx.info(f"Retrieving context for student {student_id}")
     
-    # Return courses or empty list if not found
-    return courses.get(student_id, [])
\ No newline at end of file
+    # One query for the profile, courses and grades
+    context = await get_student_repository().get_context(student_id)
+    return context or build_student_context(student_id, default_profile(student_id), [])
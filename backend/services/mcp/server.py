@@ -1,21 +1,52 @@
+from typing import Dict, Iterator, Mapping, Tuple
 from fastmcp import FastMCP
 # from core.config import settings
 import importlib
 import asyncio
+import logging
 
-# Import our MCP components
-from services.mcp.patterns.academic_progress import academic_progress
-from services.mcp.patterns.career_guidance import career_guidance
-from services.mcp.resources.student_data import student_data
-from services.mcp.resources.courses import courses_data
-from services.mcp.tools.academic_tools import academic_tools
-from services.mcp.tools.planning_tools import planning_tools
-# from services.mcp.resources import courses_data
+logger = logging.getLogger(__name__)
 
+class SubServers(Mapping[str, FastMCP]):
+    """
+    Component servers keyed by import prefix, imported on first access.
+
+    Looking up one prefix imports only that component's module, so
+    processes that never touch MCP, or only one component, don't pay for
+    importing every pattern, resource and tool module.
+    """
+
+    def __init__(self, modules: Dict[str, Tuple[str, str]]):
+        self.modules = modules
+        self.loaded: Dict[str, FastMCP] = {}
+
+    def __getitem__(self, prefix: str) -> FastMCP:
+        server = self.loaded.get(prefix)
+        if server is None:
+            module_name, attribute = self.modules[prefix]
+            server = self.loaded[prefix] = getattr(importlib.import_module(module_name), attribute)
+            logger.debug(f"Loaded MCP component {prefix} from {module_name}")
+        return server
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.modules)
+
+    def __len__(self) -> int:
+        return len(self.modules)
 
 # Create the main MCP server
 mcp_server = FastMCP("AI Student Mentor")
 
+# Component servers imported into the main server, keyed by prefix
+sub_servers = SubServers({
+    "ap": ("services.mcp.patterns.academic_progress", "academic_progress"),
+    "cg": ("services.mcp.patterns.career_guidance", "career_guidance"),
+    "sd": ("services.mcp.resources.student_data", "student_data"),
+    "cd": ("services.mcp.resources.courses", "courses_data"),
+    "at": ("services.mcp.tools.academic_tools", "academic_tools"),
+    "pt": ("services.mcp.tools.planning_tools", "planning_tools"),
+})
+
 # Flag to track if setup is complete
 setup_complete = False
 
@@ -26,12 +57,8 @@ async def setup_mcp_server():
         return
     
     # Mount all our components
-    await mcp_server.import_server(prefix="ap", server=academic_progress)
-    await mcp_server.import_server(prefix="cg", server=career_guidance)
-    await mcp_server.import_server(prefix="sd", server=student_data)
-    await mcp_server.import_server(prefix="cd", server=courses_data)
-    await mcp_server.import_server(prefix="at", server=academic_tools)
-    await mcp_server.import_server(prefix="pt", server=planning_tools)
+    for prefix, server in sub_servers.items():
+        await mcp_server.import_server(prefix=prefix, server=server)
     
     setup_complete = True
 
@@ -42,18 +69,14 @@ async def ensure_server_ready():
 
 # Define a convenience function to run the server
 def run_mcp_server(transport="stdio", host="127.0.0.1", port=8080):
-    """Run the MCP server with the specified transport"""
+    """Run the MCP server with the specified transport ("stdio" or "sse")"""
     async def setup_and_run():
         await setup_mcp_server()
-        # Since FastMCP's run method is synchronous, we need to run it in a separate thread
-        import threading
-        run_thread = threading.Thread(target=lambda: mcp_server.run(transport=transport))
-        run_thread.daemon = True
-        run_thread.start()
-        # Keep the event loop alive
-        while True:
-            await asyncio.sleep(3600)  # Sleep for an hour
-    
+        if transport == "sse":
+            await mcp_server.run_sse_async(host=host, port=port)
+        else:
+            await mcp_server.run_stdio_async()
+
     asyncio.run(setup_and_run())
 
 if __name__ == "__main__":
@@ -1,11 +1,35 @@
 from fastmcp import FastMCP, Context
 from typing import Dict, Any, List, Optional
-import json
+from pydantic import BaseModel
+
+from services.llm import sample_structured
+from services.llm.prompt_context import serialize_context
+from services.mcp.memoize import memoize
+from services.mcp.pipeline import read_resource_data
+from services.courses import course_search
+from services.students import summarize_courses
 
 # This module will be imported into the main MCP server
 academic_tools = FastMCP("Academic Tools")
 
+# Output schemas of the LLM steps
+class StudySession(BaseModel):
+    day: str
+    duration: str
+    focus: str
+
+class StudyResource(BaseModel):
+    name: str
+    type: str
+
+class StudyPlan(BaseModel):
+    weekly_schedule: List[StudySession]
+    study_strategies: List[str]
+    resources: List[StudyResource]
+    progress_tracking: List[str]
+
 @academic_tools.tool()
+@memoize(ttl=3600)
 async def calculate_gpa(
     courses: List[Dict[str, Any]],
     ctx: Context = None
@@ -29,21 +53,37 @@ async def calculate_gpa(
             "message": "No courses provided"
         }
     
-    total_credits = sum(course.get("credits", 0) for course in courses)
-    total_grade_points = sum(
-        course.get("credits", 0) * course.get("grade_points", 0) 
-        for course in courses
-    )
-    
-    gpa = total_grade_points / total_credits if total_credits > 0 else 0
+    summary = summarize_courses(courses)
     
     return {
-        "gpa": round(gpa, 2),
-        "total_credits": total_credits,
-        "total_grade_points": round(total_grade_points, 2),
+        "gpa": summary["gpa"],
+        "total_credits": summary["total_credits"],
+        "total_grade_points": summary["total_grade_points"],
         "message": f"Calculated GPA from {len(courses)} courses"
     }
 
+@academic_tools.tool()
+async def search_courses(
+    query: str,
+    limit: Optional[int] = None,
+    department: Optional[str] = None,
+    ctx: Context = None
+) -> Dict[str, Any]:
+    """
+    Find courses about a subject, e.g. "graphs" or "machine learning".
+    
+    Args:
+        query: Free-text description of what the course should cover
+        limit: Maximum number of courses to return
+        department: Optional department to search in
+        
+    Returns:
+        The best matching courses, best first, each with a relevance score
+    """
+    await ctx.info(f"Searching courses for '{query}'...")
+    
+    return await course_search.search(query, limit=limit, department=department)
+
 @academic_tools.tool()
 async def generate_study_plan(
     course_id: str,
@@ -65,9 +105,9 @@ async def generate_study_plan(
     await ctx.info(f"Generating study plan for course {course_id}...")
     
     # Get course details
-    course = await ctx.read_resource(f"courses://{course_id}")
+    course_data = await read_resource_data(ctx, f"courses://{course_id}")
     
-    if not course or not course.content:
+    if not isinstance(course_data, dict):
         await ctx.warning(f"Course {course_id} not found")
         return {
             "course_id": course_id,
@@ -76,8 +116,6 @@ async def generate_study_plan(
             "plan": None
         }
     
-    course_data = course.content
-    
     # Generate study plan using LLM
     goals_text = ", ".join(goals) if goals else "general mastery of the subject"
     
@@ -85,7 +123,7 @@ async def generate_study_plan(
     I need to create a weekly study plan for a student taking {course_data.get('name', course_id)}.
     
     Course details:
-    {json.dumps(course_data, indent=2)}
+    {serialize_context({"course": course_data}, "study_plan")}
     
     The student has {hours_available} hours available per week to study for this course.
     Their learning goals are: {goals_text}
@@ -99,13 +137,11 @@ async def generate_study_plan(
     Format the response as JSON with keys: weekly_schedule, study_strategies, resources, progress_tracking
     """
     
-    plan_response = await ctx.sample(prompt)
-    plan_text = plan_response.text.strip()
-    
-    # Try to parse JSON response
-    try:
-        study_plan = json.loads(plan_text)
-    except json.JSONDecodeError:
+    # Fall back to a basic plan if the reply doesn't match the schema
+    parsed_plan = await sample_structured(ctx, prompt, StudyPlan, tool="generate_study_plan")
+    if parsed_plan is not None:
+        study_plan = parsed_plan.model_dump()
+    else:
         await ctx.warning("Could not parse LLM response as JSON, using structured extraction")
         # Fallback to a basic plan
         study_plan = {
@@ -1,11 +1,148 @@
 from fastmcp import FastMCP, Context
 from typing import Dict, Any, List, Optional
-import json
 from datetime import datetime, timedelta
+from pydantic import BaseModel
+import asyncio
+
+from core.config import settings
+from services.llm import sample_structured
+from services.llm.prompt_context import serialize_context
+from services.mcp.pipeline import Pipeline, StepFailed, read_resource_data
 
 # This module will be imported into the main MCP server
 planning_tools = FastMCP("Planning Tools")
 
+# Output schemas of the LLM steps
+class ClassMeeting(BaseModel):
+    day: str
+    time: str
+    course_id: str
+    course_name: Optional[str] = None
+
+class StudyBlock(BaseModel):
+    day: str
+    time: str
+    duration: str
+    course_id: str
+    course_name: Optional[str] = None
+
+class SemesterSchedule(BaseModel):
+    weekly_schedule: List[ClassMeeting]
+    workload_distribution: Dict[str, str]
+    study_blocks: List[StudyBlock] = []
+
+class SemesterPlan(BaseModel):
+    semester_number: int
+    recommended_courses: List[str]
+    credits: int
+    focus_areas: List[str]
+
+class DegreePath(BaseModel):
+    semesters: List[SemesterPlan]
+
+# Steps of create_semester_schedule
+schedule_pipeline = Pipeline("create_semester_schedule")
+
+@schedule_pipeline.step(timeout=settings.PATTERN_RESOURCE_STEP_TIMEOUT_SECONDS)
+async def course_details(ctx: Context, data: Dict[str, Any]) -> List[Dict[str, Any]]:
+    # Get details for each course, all at once
+    details = await asyncio.gather(*(read_resource_data(ctx, f"courses://{course_id}") for course_id in data["courses"]))
+    return [course for course in details if isinstance(course, dict)]
+
+def basic_schedule(data: Dict[str, Any]) -> Dict[str, Any]:
+    # Fallback to a basic schedule
+    course_details = data["course_details"]
+    include_study_time = data["include_study_time"]
+    days = ["Monday", "Wednesday", "Friday"]
+    times = ["9:00 AM", "11:00 AM", "1:00 PM", "3:00 PM"]
+    
+    # Create a simple alternating schedule
+    weekly_schedule = []
+    day_index = 0
+    time_index = 0
+    
+    for course in course_details:
+        course_id = course.get("id")
+        weekly_schedule.append({
+            "day": days[day_index % len(days)],
+            "time": times[time_index % len(times)],
+            "course_id": course_id,
+            "course_name": course.get("name")
+        })
+        
+        # For this simplified version, add a second day for 4-credit courses
+        if course.get("credits", 0) >= 4:
+            day_index = (day_index + 1) % len(days)
+            weekly_schedule.append({
+                "day": days[day_index % len(days)],
+                "time": times[time_index % len(times)],
+                "course_id": course_id,
+                "course_name": course.get("name")
+            })
+        
+        day_index = (day_index + 1) % len(days)
+        time_index = (time_index + 1) % len(times)
+    
+    # Create basic study blocks if requested
+    study_blocks = []
+    if include_study_time:
+        study_days = ["Tuesday", "Thursday", "Saturday"]
+        for i, course in enumerate(course_details):
+            study_blocks.append({
+                "day": study_days[i % len(study_days)],
+                "time": "2:00 PM",
+                "duration": "2 hours",
+                "course_id": course.get("id"),
+                "course_name": course.get("name")
+            })
+    
+    return {
+        "weekly_schedule": weekly_schedule,
+        "workload_distribution": {
+            "Monday": "Moderate",
+            "Tuesday": "Light" if include_study_time else "None",
+            "Wednesday": "Moderate",
+            "Thursday": "Light" if include_study_time else "None",
+            "Friday": "Moderate",
+            "Saturday": "Light" if include_study_time else "None",
+            "Sunday": "None"
+        },
+        "study_blocks": study_blocks if include_study_time else []
+    }
+
+@schedule_pipeline.step(after=["course_details"], timeout=settings.PATTERN_LLM_STEP_TIMEOUT_SECONDS,
+                        fallback=basic_schedule)
+async def schedule(ctx: Context, data: Dict[str, Any]) -> Dict[str, Any]:
+    course_details = data["course_details"]
+    if not course_details:
+        raise StepFailed("No valid courses found")
+    total_credits = sum(course.get("credits", 0) for course in course_details)
+    
+    # Use LLM to generate an optimized schedule
+    courses_text = serialize_context({"courses": course_details}, "semester_schedule")
+    
+    prompt = f"""
+    I need to create an optimized semester schedule for a student taking these courses:
+    {courses_text}
+    
+    Total credits: {total_credits} (target: {data["credits_target"]})
+    
+    Please create:
+    1. A weekly class schedule (which days and times would be optimal for each course)
+    2. A distribution of workload throughout the week to balance difficulty
+    3. {"Include study time blocks in the schedule" if data["include_study_time"] else "No study time blocks needed"}
+    
+    Format the response as JSON with keys:
+    - weekly_schedule: Array of class meetings with day, time, course_id
+    - workload_distribution: Assessment of workload by day
+    - study_blocks: Recommended study blocks (if requested)
+    """
+    
+    parsed = await sample_structured(ctx, prompt, SemesterSchedule, tool="create_semester_schedule")
+    if parsed is None:
+        raise StepFailed("Could not parse LLM response as JSON")
+    return parsed.model_dump()
+
 @planning_tools.tool()
 async def create_semester_schedule(
     courses: List[str],
@@ -26,15 +163,9 @@ async def create_semester_schedule(
     """
     await ctx.info("Creating semester schedule...")
     
-    course_details = []
-    total_credits = 0
-    
-    # Get details for each course
-    for course_id in courses:
-        course = await ctx.read_resource(f"courses://{course_id}")
-        if course and course.content:
-            course_details.append(course.content)
-            total_credits += course.content.get("credits", 0)
+    data = await schedule_pipeline.run(ctx, courses=courses, credits_target=credits_target,
+                                       include_study_time=include_study_time)
+    course_details = data["course_details"]
     
     if not course_details:
         return {
@@ -44,6 +175,7 @@ async def create_semester_schedule(
         }
     
     # Check if the total credits match the target
+    total_credits = sum(course.get("credits", 0) for course in course_details)
     credits_message = ""
     if total_credits < credits_target:
         credits_message = f"Warning: Schedule has {total_credits} credits, below target of {credits_target}"
@@ -52,160 +184,118 @@ async def create_semester_schedule(
     else:
         credits_message = f"Schedule has {total_credits} credits, meeting the target"
     
-    # Use LLM to generate an optimized schedule
-    courses_json = json.dumps(course_details, indent=2)
-    
-    prompt = f"""
-    I need to create an optimized semester schedule for a student taking these courses:
-    {courses_json}
-    
-    Total credits: {total_credits} (target: {credits_target})
-    
-    Please create:
-    1. A weekly class schedule (which days and times would be optimal for each course)
-    2. A distribution of workload throughout the week to balance difficulty
-    3. {"Include study time blocks in the schedule" if include_study_time else "No study time blocks needed"}
-    
-    Format the response as JSON with keys:
-    - weekly_schedule: Array of class meetings with day, time, course_id
-    - workload_distribution: Assessment of workload by day
-    - study_blocks: Recommended study blocks (if requested)
-    """
-    
-    schedule_response = await ctx.sample(prompt)
-    schedule_text = schedule_response.text.strip()
-    
-    # Try to parse JSON response
-    try:
-        schedule = json.loads(schedule_text)
-    except json.JSONDecodeError:
-        await ctx.warning("Could not parse LLM response as JSON, using basic schedule format")
-        # Fallback to a basic schedule
-        days = ["Monday", "Wednesday", "Friday"]
-        times = ["9:00 AM", "11:00 AM", "1:00 PM", "3:00 PM"]
-        
-        # Create a simple alternating schedule
-        weekly_schedule = []
-        day_index = 0
-        time_index = 0
-        
-        for course in course_details:
-            course_id = course.get("id")
-            weekly_schedule.append({
-                "day": days[day_index % len(days)],
-                "time": times[time_index % len(times)],
-                "course_id": course_id,
-                "course_name": course.get("name")
-            })
-            
-            # For this simplified version, add a second day for 4-credit courses
-            if course.get("credits", 0) >= 4:
-                day_index = (day_index + 1) % len(days)
-                weekly_schedule.append({
-                    "day": days[day_index % len(days)],
-                    "time": times[time_index % len(times)],
-                    "course_id": course_id,
-                    "course_name": course.get("name")
-                })
-            
-            day_index = (day_index + 1) % len(days)
-            time_index = (time_index + 1) % len(times)
-        
-        # Create basic study blocks if requested
-        study_blocks = []
-        if include_study_time:
-            study_days = ["Tuesday", "Thursday", "Saturday"]
-            for i, course in enumerate(course_details):
-                study_blocks.append({
-                    "day": study_days[i % len(study_days)],
-                    "time": "2:00 PM",
-                    "duration": "2 hours",
-                    "course_id": course.get("id"),
-                    "course_name": course.get("name")
-                })
-        
-        schedule = {
-            "weekly_schedule": weekly_schedule,
-            "workload_distribution": {
-                "Monday": "Moderate",
-                "Tuesday": "Light" if include_study_time else "None",
-                "Wednesday": "Moderate",
-                "Thursday": "Light" if include_study_time else "None",
-                "Friday": "Moderate",
-                "Saturday": "Light" if include_study_time else "None",
-                "Sunday": "None"
-            },
-            "study_blocks": study_blocks if include_study_time else []
-        }
-    
     return {
         "courses": course_details,
         "total_credits": total_credits,
         "credits_message": credits_message,
         "success": True,
-        "schedule": schedule
+        "schedule": data["schedule"]
     }
 
-@planning_tools.tool()
-async def plan_degree_path(
-    major: str,
-    current_semester: int = 1,
-    completed_courses: Optional[List[str]] = None,
-    ctx: Context = None
-) -> Dict[str, Any]:
-    """
-    Plan a degree path to graduation.
+# Steps of plan_degree_path. The catalog and the department's courses are read concurrently.
+degree_pipeline = Pipeline("plan_degree_path")
+
+@degree_pipeline.step(timeout=settings.PATTERN_RESOURCE_STEP_TIMEOUT_SECONDS, fallback=None)
+async def catalog(ctx: Context, data: Dict[str, Any]) -> Optional[List[Dict[str, Any]]]:
+    # First page of the catalog; the department's courses come from major_courses
+    page = await read_resource_data(ctx, "courses://catalog")
+    if not page or not page.get("courses"):
+        return None
+    return page["courses"]
+
+@degree_pipeline.step(timeout=settings.PATTERN_RESOURCE_STEP_TIMEOUT_SECONDS, fallback=[])
+async def major_courses(ctx: Context, data: Dict[str, Any]) -> List[Dict[str, Any]]:
+    # Get department courses if possible
+    dept_courses = await read_resource_data(ctx, f"courses://departments/{data['major']}")
+    if not dept_courses:
+        return []
+    return dept_courses if isinstance(dept_courses, list) else [dept_courses]
+
+def courses_to_consider(data: Dict[str, Any]) -> List[Dict[str, Any]]:
+    # Combine courses, with major courses if available; the serializer drops the repeats
+    course_catalog = data["catalog"] or []
+    return course_catalog if not data["major_courses"] else data["major_courses"] + course_catalog
+
+def basic_degree_path(data: Dict[str, Any]) -> Dict[str, Any]:
+    # Fallback to a basic path
+    major = data["major"]
+    current_semester = data["current_semester"]
+    completed = data["completed_courses"] or []
+    remaining_semesters = 9 - current_semester
+    degree_path = {"semesters": []}
     
-    Args:
-        major: The student's major
-        current_semester: Current semester (1-8, where 1 is first semester of freshman year)
-        completed_courses: List of already completed course IDs
-        
-    Returns:
-        Degree path with course recommendations by semester
-    """
-    await ctx.info(f"Planning degree path for {major} major...")
+    # Create simple degree path with available courses
+    courses_by_dept = {}
+    for course in courses_to_consider(data):
+        dept = course.get("department", "Other")
+        if dept not in courses_by_dept:
+            courses_by_dept[dept] = []
+        courses_by_dept[dept].append(course)
     
-    # Get all available courses
-    all_courses = await ctx.read_resource("courses://catalog")
-    if not all_courses or not all_courses.content:
-        return {
-            "success": False,
-            "message": "Could not retrieve course catalog",
-            "path": None
-        }
+    # Distribute courses across remaining semesters
+    major_dept_courses = courses_by_dept.get(major, [])
+    general_courses = []
+    for dept, dept_courses in courses_by_dept.items():
+        if dept != major:
+            general_courses.extend(dept_courses)
     
-    # Convert to list if not already
-    course_catalog = all_courses.content if isinstance(all_courses.content, list) else [all_courses.content]
+    # Sort by course number to approximate level
+    major_dept_courses.sort(key=lambda c: c.get("id", ""))
+    general_courses.sort(key=lambda c: c.get("id", ""))
     
-    # Get department courses if possible
-    try:
-        dept_courses = await ctx.read_resource(f"courses://departments/{major}")
-        if dept_courses and dept_courses.content:
-            major_courses = dept_courses.content if isinstance(dept_courses.content, list) else [dept_courses.content]
-        else:
-            major_courses = []
-    except Exception:
-        major_courses = []
+    # Create semesters
+    all_recommended = set(completed)  # Track what we've recommended already
+    for i in range(remaining_semesters):
+        semester_number = current_semester + i
+        semester_courses = []
+        credits = 0
+        
+        # Add major courses first
+        for course in major_dept_courses:
+            course_id = course.get("id")
+            if course_id not in all_recommended and credits < 12:
+                semester_courses.append(course_id)
+                all_recommended.add(course_id)
+                credits += course.get("credits", 3)
+        
+        # Fill with general courses
+        for course in general_courses:
+            course_id = course.get("id")
+            if course_id not in all_recommended and credits < 15:
+                semester_courses.append(course_id)
+                all_recommended.add(course_id)
+                credits += course.get("credits", 3)
+        
+        semester = {
+            "semester_number": semester_number,
+            "recommended_courses": semester_courses,
+            "credits": credits,
+            "focus_areas": [f"{major} fundamentals", "General education"]
+        }
+        
+        degree_path["semesters"].append(semester)
     
-    # Combine courses, with major courses if available
-    courses_to_consider = course_catalog if not major_courses else major_courses + course_catalog
-    courses_json = json.dumps(courses_to_consider, indent=2)
+    return degree_path
+
+@degree_pipeline.step(after=["catalog", "major_courses"], timeout=settings.PATTERN_LLM_STEP_TIMEOUT_SECONDS,
+                      fallback=basic_degree_path)
+async def degree_path(ctx: Context, data: Dict[str, Any]) -> Dict[str, Any]:
+    if not data["catalog"]:
+        raise StepFailed("Could not retrieve course catalog")
+    major = data["major"]
     
     # Handle completed courses
-    completed = completed_courses or []
-    completed_json = json.dumps(completed, indent=2)
+    courses_text = serialize_context(
+        {"courses": courses_to_consider(data), "completed_courses": data["completed_courses"] or []}, "degree_path"
+    )
     
     # Generate degree path using LLM
     prompt = f"""
     I need to create a degree path for a student majoring in {major}.
-    The student is currently in semester {current_semester} (out of 8 semesters).
-    
-    Available courses:
-    {courses_json}
+    The student is currently in semester {data["current_semester"]} (out of 8 semesters).
     
-    Completed courses:
-    {completed_json}
+    Available and completed courses:
+    {courses_text}
     
     Please create a semester-by-semester plan from the current semester to graduation.
     For each remaining semester, recommend courses that:
@@ -213,80 +303,72 @@ async def plan_degree_path(
     2. Distribute workload evenly
     3. Complete major requirements efficiently
     
-    Format as JSON with an array of semesters, each containing:
+    Format as JSON with a semesters array, each entry containing:
     - semester_number: Number (current_semester to 8)
     - recommended_courses: Array of course IDs
     - credits: Total credits
     - focus_areas: Key areas of study for this semester
     """
     
-    path_response = await ctx.sample(prompt)
-    path_text = path_response.text.strip()
+    parsed = await sample_structured(ctx, prompt, DegreePath, tool="plan_degree_path")
+    if parsed is None:
+        raise StepFailed("Could not parse LLM response as JSON")
+    return parsed.model_dump()
+
+@planning_tools.tool()
+async def plan_degree_path(
+    major: Optional[str] = None,
+    current_semester: Optional[int] = None,
+    completed_courses: Optional[List[str]] = None,
+    student_id: Optional[str] = None,
+    ctx: Context = None
+) -> Dict[str, Any]:
+    """
+    Plan a degree path to graduation.
     
-    # Try to parse JSON response
-    try:
-        degree_path = json.loads(path_text)
-    except json.JSONDecodeError:
-        await ctx.warning("Could not parse LLM response as JSON, using basic path")
-        # Fallback to a basic path
-        remaining_semesters = 9 - current_semester
-        degree_path = {"semesters": []}
-        
-        # Create simple degree path with available courses
-        courses_by_dept = {}
-        for course in courses_to_consider:
-            dept = course.get("department", "Other")
-            if dept not in courses_by_dept:
-                courses_by_dept[dept] = []
-            courses_by_dept[dept].append(course)
-        
-        # Distribute courses across remaining semesters
-        major_dept_courses = courses_by_dept.get(major, [])
-        general_courses = []
-        for dept, dept_courses in courses_by_dept.items():
-            if dept != major:
-                general_courses.extend(dept_courses)
-        
-        # Sort by course number to approximate level
-        major_dept_courses.sort(key=lambda c: c.get("id", ""))
-        general_courses.sort(key=lambda c: c.get("id", ""))
+    Args:
+        major: The student's major
+        current_semester: Current semester (1-8, where 1 is first semester of freshman year)
+        completed_courses: List of already completed course IDs
+        student_id: Optional student whose major, semester and completed courses
+            are used for the arguments not given, read in one request
         
-        # Create semesters
-        all_recommended = set(completed)  # Track what we've recommended already
-        for i in range(remaining_semesters):
-            semester_number = current_semester + i
-            semester_courses = []
-            credits = 0
-            
-            # Add major courses first
-            for course in major_dept_courses:
-                course_id = course.get("id")
-                if course_id not in all_recommended and credits < 12:
-                    semester_courses.append(course_id)
-                    all_recommended.add(course_id)
-                    credits += course.get("credits", 3)
-            
-            # Fill with general courses
-            for course in general_courses:
-                course_id = course.get("id")
-                if course_id not in all_recommended and credits < 15:
-                    semester_courses.append(course_id)
-                    all_recommended.add(course_id)
-                    credits += course.get("credits", 3)
-            
-            semester = {
-                "semester_number": semester_number,
-                "recommended_courses": semester_courses,
-                "credits": credits,
-                "focus_areas": [f"{major} fundamentals", "General education"]
-            }
-            
-            degree_path["semesters"].append(semester)
+    Returns:
+        Degree path with course recommendations by semester
+    """
+    if student_id:
+        student = await read_resource_data(ctx, f"student://{student_id}/context") or {}
+        profile = student.get("profile") or {}
+        major = major or profile.get("major")
+        if current_semester is None and profile.get("year"):
+            # First semester of the student's current year
+            current_semester = min(2 * profile["year"] - 1, 8)
+        if completed_courses is None:
+            completed_courses = [course["id"] for course in student.get("courses") or [] if course.get("grade")]
+    if current_semester is None:
+        current_semester = 1
+    if not major:
+        return {
+            "success": False,
+            "message": "No major given",
+            "path": None
+        }
+    
+    await ctx.info(f"Planning degree path for {major} major...")
+    
+    data = await degree_pipeline.run(ctx, major=major, current_semester=current_semester,
+                                     completed_courses=completed_courses)
+    if not data["catalog"]:
+        return {
+            "success": False,
+            "message": "Could not retrieve course catalog",
+            "path": None
+        }
     
     return {
         "major": major,
         "current_semester": current_semester,
-        "completed_courses": completed,
+        "completed_courses": completed_courses or [],
         "success": True,
-        "path": degree_path
-    }
\ No newline at end of file
+        "path": data["degree_path"]
+    }
@@ -0,0 +1,85 @@
+"""
+Run the MCP tool servers as a pool of worker processes.
+
+Each worker is a separate process serving the full MCP server over SSE on
+its own port, starting at `--port`. An SSE session is bound to the process
+that opened it, so workers are addressed individually rather than through a
+round-robin load balancer. The API connects to them with
+`MCP_DISPATCH_MODE=remote` and `MCP_WORKER_URLS`, holds one session per
+worker and balances calls across them (see `services.mcp.pool`), so MCP
+capacity can be scaled by adding workers or hosts without touching the API.
+
+Usage (from the backend directory):
+    python -m services.mcp.worker --workers 4 --port 8100
+
+and on the API:
+    MCP_DISPATCH_MODE=remote
+    MCP_WORKER_URLS='["http://mcp-host:8100/sse", "http://mcp-host:8101/sse", ...]'
+"""
+from typing import Dict
+import argparse
+import logging
+import multiprocessing
+import signal
+import sys
+
+from core.config import settings
+from services.mcp.server import run_mcp_server
+
+logger = logging.getLogger(__name__)
+
+def serve(host: str, port: int) -> None:
+    """Entry point of one worker process"""
+    logging.basicConfig(level=logging.INFO, format=f"%(asctime)s - mcp-worker:{port} - %(levelname)s - %(message)s")
+    run_mcp_server(transport="sse", host=host, port=port)
+
+def start_worker(host: str, port: int) -> multiprocessing.Process:
+    process = multiprocessing.Process(target=serve, args=(host, port), name=f"mcp-worker-{port}")
+    process.start()
+    logger.info(f"Started MCP worker on {host}:{port} (pid {process.pid})")
+    return process
+
+def run_workers(count: int, host: str, port: int) -> int:
+    """
+    Start `count` workers on consecutive ports and supervise them until stopped.
+
+    A worker that dies is started again on the same port; the API's client
+    pool sends calls to the other workers meanwhile and reconnects once it
+    passes a health check.
+
+    Returns:
+        Exit status
+    """
+    workers: Dict[int, multiprocessing.Process] = {port + index: start_worker(host, port + index)
+                                                   for index in range(count)}
+    stopping = False
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+        for process in workers.values():
+            if process.is_alive():
+                process.terminate()
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+
+    while not stopping:
+        for worker_port, process in list(workers.items()):
+            process.join(timeout=1)
+            if not process.is_alive() and not stopping:
+                logger.error(f"MCP worker on port {worker_port} exited with status {process.exitcode}, restarting")
+                workers[worker_port] = start_worker(host, worker_port)
+
+    for process in workers.values():
+        process.join()
+    return 0
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+    parser = argparse.ArgumentParser(description="Run the MCP tool servers as a pool of SSE worker processes")
+    parser.add_argument("--workers", type=int, default=settings.MCP_WORKER_COUNT)
+    parser.add_argument("--host", default=settings.MCP_WORKER_HOST)
+    parser.add_argument("--port", type=int, default=settings.MCP_SERVER_PORT, help="Port of the first worker")
+    args = parser.parse_args()
+    sys.exit(run_workers(args.workers, args.host, args.port))
@@ -0,0 +1,9 @@
+from services.students.loader import BatchLoader, LoaderStats
+from services.students.summary import summarize_courses, data_version, build_student_context, student_context_fields
+from services.students.repository import StudentRepository, student_repository_scope, get_student_repository
+
+__all__ = [
+    "BatchLoader", "LoaderStats",
+    "summarize_courses", "data_version", "build_student_context", "student_context_fields",
+    "StudentRepository", "student_repository_scope", "get_student_repository",
+]
@@ -0,0 +1,139 @@
+from typing import Any, Awaitable, Callable, Dict, Hashable, Iterable, List, Optional
+import asyncio
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+BatchFunction = Callable[[List[Hashable]], Awaitable[Dict[Hashable, Any]]]
+
+class LoaderStats:
+    """Counters of the batch loaders sharing a name"""
+
+    def __init__(self):
+        self.counters = {"loads": 0, "cache_hits": 0, "coalesced": 0, "batches": 0, "keys": 0, "errors": 0}
+        self.total_ms = 0.0
+        self.largest_batch = 0
+
+    def stats(self) -> Dict[str, Any]:
+        batches = self.counters["batches"]
+        return {
+            **self.counters,
+            "avg_batch_size": round(self.counters["keys"] / batches, 1) if batches else 0.0,
+            "largest_batch": self.largest_batch,
+            "avg_batch_ms": round(self.total_ms / batches, 1) if batches else 0.0,
+        }
+
+class BatchLoader:
+    """
+    Coalesces loads by key into batched calls.
+
+    Keys requested while a batch is being collected (during the same event
+    loop iteration, or within `window` seconds of the first one) are fetched
+    with a single call to `batch_fn`, in chunks of at most `max_batch_size`
+    keys. A key requested twice in the same batch is fetched once.
+
+    With `cache` on, every key's result is kept for the loader's lifetime,
+    so the loader doubles as an identity map: loading a key again returns
+    the same result without a fetch. Failed fetches are not cached.
+    """
+
+    def __init__(self, batch_fn: BatchFunction, max_batch_size: int = 500, cache: bool = True,
+                 window: float = 0.0, stats: Optional[LoaderStats] = None):
+        self.batch_fn = batch_fn
+        self.max_batch_size = max(1, max_batch_size)
+        self.cache_enabled = cache
+        self.window = window
+        self.stats = stats or LoaderStats()
+        self.cache: Dict[Hashable, asyncio.Future] = {}
+        self.pending: Dict[Hashable, asyncio.Future] = {}
+        self.tasks: set = set()
+
+    async def load(self, key: Hashable) -> Any:
+        """
+        Load one key, batched with the other keys requested meanwhile.
+
+        Returns:
+            The result `batch_fn` returned for the key, or None when it
+            returned none
+        """
+        self.stats.counters["loads"] += 1
+        future = self.cache.get(key)
+        if future is not None:
+            self.stats.counters["cache_hits"] += 1
+        else:
+            future = self.pending.get(key)
+            if future is not None:
+                self.stats.counters["coalesced"] += 1
+            else:
+                future = self.enqueue(key)
+        # A cancelled caller must not cancel the fetch other callers wait for
+        return await asyncio.shield(future)
+
+    async def load_many(self, keys: Iterable[Hashable]) -> List[Any]:
+        """Load several keys, in one batch when none of them is cached"""
+        return list(await asyncio.gather(*(self.load(key) for key in keys)))
+
+    def prime(self, key: Hashable, value: Any) -> None:
+        """Cache a result loaded some other way"""
+        if not self.cache_enabled or key in self.cache:
+            return
+        future = asyncio.get_running_loop().create_future()
+        future.set_result(value)
+        self.cache[key] = future
+
+    def clear(self, key: Optional[Hashable] = None) -> None:
+        """Forget one cached key, or all of them"""
+        if key is None:
+            self.cache.clear()
+        else:
+            self.cache.pop(key, None)
+
+    def enqueue(self, key: Hashable) -> asyncio.Future:
+        loop = asyncio.get_running_loop()
+        if not self.pending:
+            # The first key of a batch schedules its dispatch
+            if self.window > 0:
+                loop.call_later(self.window, self.dispatch)
+            else:
+                loop.call_soon(self.dispatch)
+        future = loop.create_future()
+        self.pending[key] = future
+        if self.cache_enabled:
+            self.cache[key] = future
+        return future
+
+    def dispatch(self) -> None:
+        batch, self.pending = self.pending, {}
+        keys = list(batch)
+        for start in range(0, len(keys), self.max_batch_size):
+            chunk = {key: batch[key] for key in keys[start:start + self.max_batch_size]}
+            task = asyncio.create_task(self.fetch(chunk))
+            # Held until done, so the task isn't garbage collected mid-fetch
+            self.tasks.add(task)
+            task.add_done_callback(self.tasks.discard)
+
+    async def fetch(self, batch: Dict[Hashable, asyncio.Future]) -> None:
+        started = time.perf_counter()
+        try:
+            results = await self.batch_fn(list(batch))
+        except BaseException as e:
+            self.stats.counters["errors"] += 1
+            logger.error(f"Batch load of {len(batch)} keys failed: {str(e) or type(e).__name__}")
+            for key, future in batch.items():
+                if self.cache.get(key) is future:
+                    del self.cache[key]
+                if not future.done():
+                    future.set_exception(e if isinstance(e, Exception) else RuntimeError("Batch load cancelled"))
+            if not isinstance(e, Exception):
+                raise
+            return
+        finally:
+            self.stats.counters["batches"] += 1
+            self.stats.counters["keys"] += len(batch)
+            self.stats.largest_batch = max(self.stats.largest_batch, len(batch))
+            self.stats.total_ms += (time.perf_counter() - started) * 1000
+
+        for key, future in batch.items():
+            if not future.done():
+                future.set_result(results.get(key))
@@ -0,0 +1,207 @@
+from typing import TYPE_CHECKING, Any, Dict, Iterable, Iterator, List, Optional
+from contextlib import contextmanager
+from contextvars import ContextVar
+import copy
+import logging
+
+from core.config import settings
+from core.utils.metrics import metrics_registry
+from services.students.loader import BatchLoader, LoaderStats
+from services.students.summary import build_student_context
+
+if TYPE_CHECKING:
+    from sqlalchemy.orm import sessionmaker
+
+logger = logging.getLogger(__name__)
+
+# Seconds a batch collects student ids before its query is sent
+BATCH_WINDOW_SECONDS = 0.002
+
+profile_loader_stats = LoaderStats()
+course_loader_stats = LoaderStats()
+context_loader_stats = LoaderStats()
+metrics_registry.register("student_repository", lambda: {
+    "profiles": profile_loader_stats.stats(),
+    "courses": course_loader_stats.stats(),
+    "contexts": context_loader_stats.stats(),
+})
+
+class StudentRepository:
+    """
+    Async access to student profiles and course records.
+
+    Loads go through batch loaders, so the profiles (or courses) of every
+    student requested at about the same time are read with one `IN` query,
+    chunked at `settings.STUDENT_LOAD_BATCH_SIZE` ids. Courses are read with
+    their grades in the same query, and a student's combined context
+    (profile, courses and totals) with a single query that also fills in
+    the profile and course caches.
+
+    A repository is meant to live for one request (see
+    `student_repository_scope`) and keeps what it loaded, so a student read
+    twice during the request is queried once and the same data is returned
+    both times. Results are copied on the way out, so callers can change them.
+    Each batch uses its own short session, so concurrent batches don't share
+    a connection. SQLAlchemy and the models are imported by the first query
+    rather than with this module, which the API imports at startup.
+    """
+
+    def __init__(self, session_factory: Optional["sessionmaker"] = None, cache: bool = True,
+                 batch_size: Optional[int] = None, window: float = BATCH_WINDOW_SECONDS):
+        self.session_factory = session_factory
+        batch_size = batch_size or settings.STUDENT_LOAD_BATCH_SIZE
+        self.profiles = BatchLoader(self.fetch_profiles, batch_size, cache=cache, window=window,
+                                    stats=profile_loader_stats)
+        self.courses = BatchLoader(self.fetch_courses, batch_size, cache=cache, window=window,
+                                   stats=course_loader_stats)
+        self.contexts = BatchLoader(self.fetch_contexts, batch_size, cache=cache, window=window,
+                                    stats=context_loader_stats)
+
+    def session(self):
+        # The engine is created on first use, not when the repository is
+        from core.models.database import get_async_session
+
+        factory = self.session_factory or get_async_session()
+        return factory()
+
+    async def get_profile(self, student_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Get a student's profile.
+
+        Returns:
+            Profile dict, or None for an unknown student
+        """
+        return copy.deepcopy(await self.profiles.load(student_id))
+
+    async def get_profiles(self, student_ids: Iterable[str]) -> Dict[str, Optional[Dict[str, Any]]]:
+        """Get several students' profiles, keyed by student id (None for unknown students)"""
+        student_ids = list(dict.fromkeys(student_ids))
+        profiles = await self.profiles.load_many(student_ids)
+        return {student_id: copy.deepcopy(profile) for student_id, profile in zip(student_ids, profiles)}
+
+    async def get_courses(self, student_id: str) -> List[Dict[str, Any]]:
+        """
+        Get a student's courses with their grades.
+
+        Returns:
+            Course dicts in enrollment order; empty for an unknown student
+        """
+        return copy.deepcopy(await self.courses.load(student_id) or [])
+
+    async def get_courses_many(self, student_ids: Iterable[str]) -> Dict[str, List[Dict[str, Any]]]:
+        """Get several students' courses, keyed by student id"""
+        student_ids = list(dict.fromkeys(student_ids))
+        courses = await self.courses.load_many(student_ids)
+        return {student_id: copy.deepcopy(entries or []) for student_id, entries in zip(student_ids, courses)}
+
+    async def get_context(self, student_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Get a student's profile, courses, credit and GPA totals and version stamp.
+
+        Returns:
+            The student://{id}/context representation, or None for an
+            unknown student
+        """
+        return copy.deepcopy(await self.contexts.load(student_id))
+
+    async def preload(self, student_ids: Iterable[str]) -> None:
+        """
+        Load several students' contexts ahead of their reads.
+
+        The context query also fills in the profile and course caches, so
+        later profile, course and context reads of these students are all
+        answered from the preloaded rows.
+        """
+        await self.contexts.load_many(list(dict.fromkeys(student_ids)))
+
+    async def fetch_profiles(self, student_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Batch function of the profile loader"""
+        from sqlalchemy import select
+        from core.models.student import Student
+
+        async with self.session() as session:
+            students = await session.scalars(select(Student).where(Student.id.in_(student_ids)))
+            return {student.id: student.to_profile() for student in students}
+
+    async def fetch_courses(self, student_ids: List[str]) -> Dict[str, List[Dict[str, Any]]]:
+        """Batch function of the course loader"""
+        from sqlalchemy import select
+        from sqlalchemy.orm import joinedload
+        from core.models.student import Enrollment
+
+        statement = (
+            select(Enrollment)
+            .options(joinedload(Enrollment.grade))
+            .where(Enrollment.student_id.in_(student_ids))
+            .order_by(Enrollment.student_id, Enrollment.id)
+        )
+        courses: Dict[str, List[Dict[str, Any]]] = {}
+        async with self.session() as session:
+            for enrollment in await session.scalars(statement):
+                courses.setdefault(enrollment.student_id, []).append(enrollment.to_course())
+        return courses
+
+    async def fetch_contexts(self, student_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Batch function of the context loader"""
+        from sqlalchemy import select
+        from sqlalchemy.orm import joinedload
+        from core.models.student import Enrollment, Student
+
+        statement = (
+            select(Student)
+            .options(joinedload(Student.enrollments).joinedload(Enrollment.grade))
+            .where(Student.id.in_(student_ids))
+        )
+        contexts: Dict[str, Dict[str, Any]] = {}
+        async with self.session() as session:
+            for student in (await session.scalars(statement)).unique():
+                profile = student.to_profile()
+                courses = [enrollment.to_course() for enrollment in student.enrollments]
+                # Later profile or course reads of the request are answered from the same row
+                self.profiles.prime(student.id, profile)
+                self.courses.prime(student.id, courses)
+                contexts[student.id] = build_student_context(student.id, profile, courses)
+        return contexts
+
+_current_repository: ContextVar[Optional[StudentRepository]] = ContextVar("student_repository", default=None)
+_shared_repository: Optional[StudentRepository] = None
+
+@contextmanager
+def student_repository_scope(repository: Optional[StudentRepository] = None) -> Iterator[StudentRepository]:
+    """
+    Use one repository for the student reads made inside the block.
+
+    Reads made in the block (and in tasks it starts) share the repository's
+    batches and loaded data. A block nested in another scope reuses the
+    outer repository unless one is passed.
+
+    Args:
+        repository: Repository to use, e.g. one shared by the workers of a
+            batch run; a new one by default
+    """
+    current = _current_repository.get()
+    if repository is None and current is not None:
+        yield current
+        return
+    repository = repository or StudentRepository()
+    token = _current_repository.set(repository)
+    try:
+        yield repository
+    finally:
+        _current_repository.reset(token)
+
+def get_student_repository() -> StudentRepository:
+    """
+    The repository of the current scope.
+
+    Outside a scope (e.g. resources read over an MCP session) a process-wide
+    repository is used that batches concurrent reads but keeps nothing, so
+    every read sees current data.
+    """
+    global _shared_repository
+    repository = _current_repository.get()
+    if repository is not None:
+        return repository
+    if _shared_repository is None:
+        _shared_repository = StudentRepository(cache=False)
+    return _shared_repository
@@ -0,0 +1,49 @@
+from typing import Any, Dict, List
+import hashlib
+import json
+
+def summarize_courses(courses: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Credit and GPA totals of a list of courses.
+
+    Args:
+        courses: Course dicts with 'credits' and 'grade_points' fields
+
+    Returns:
+        Dict with gpa, total_credits, total_grade_points and course_count
+    """
+    total_credits = sum(course.get("credits") or 0 for course in courses)
+    total_grade_points = sum(
+        (course.get("credits") or 0) * (course.get("grade_points") or 0)
+        for course in courses
+    )
+    gpa = total_grade_points / total_credits if total_credits > 0 else 0
+    return {
+        "gpa": round(gpa, 2),
+        "total_credits": total_credits,
+        "total_grade_points": round(total_grade_points, 2),
+        "course_count": len(courses),
+    }
+
+def data_version(data: Any) -> str:
+    """Stable fingerprint of JSON-like data, used to detect stale copies"""
+    encoded = json.dumps(data, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha1(encoded.encode("utf-8")).hexdigest()[:12]
+
+def build_student_context(student_id: str, profile: Dict[str, Any], courses: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """The student://{id}/context representation of a student's data"""
+    return {
+        "student_id": student_id,
+        "profile": profile,
+        "courses": courses,
+        "academic_summary": summarize_courses(courses),
+        "version": data_version({"profile": profile, "courses": courses}),
+    }
+
+def student_context_fields(student_context: Dict[str, Any]) -> Dict[str, Any]:
+    """Map a student://{id}/context value to the fields of a chat context dict"""
+    return {
+        "student_profile": student_context.get("profile"),
+        "student_courses": student_context.get("courses"),
+        "academic_summary": student_context.get("academic_summary"),
+    }
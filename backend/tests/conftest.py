@@ -0,0 +1,23 @@
+import os
+
+# Settings without a default, filled in when the environment doesn't set them.
+# The tests connect to none of these services.
+REQUIRED_SETTINGS = {
+    "SECRET_KEY": "test",
+    "POSTGRES_USER": "mentor",
+    "POSTGRES_PASSWORD": "mentor",
+    "POSTGRES_DB": "mentor_db",
+    "POSTGRES_HOST": "localhost",
+    "NEO4J_URI": "bolt://localhost:7687",
+    "NEO4J_USER": "neo4j",
+    "NEO4J_PASSWORD": "mentor",
+    "REDIS_HOST": "localhost",
+    "LLM_PROVIDER": "google",
+    "LLM_MODEL": "gemini-2.0-flash",
+    "GOOGLE_API_KEY": "test",
+    "MCP_SERVER_NAME": "mentor",
+    "MCP_SERVER_PORT": "8001",
+}
+
+for name, value in REQUIRED_SETTINGS.items():
+    os.environ.setdefault(name, value)
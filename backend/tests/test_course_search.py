@@ -0,0 +1,49 @@
+import asyncio
+
+from services.courses.catalog import CourseCatalog
+from services.courses.search import CourseSearch, CourseSearchIndex
+from services.courses.store import course_catalog
+
+COURSES = [
+    {"id": "CS201", "name": "Graph Theory", "topics": ["graphs"], "description": "Paths and trees."},
+    {"id": "CS301", "name": "Databases", "topics": ["sql"], "description": "Relational data."},
+]
+
+def test_save_and_load(tmp_path):
+    index = CourseSearchIndex()
+    index.update({course["id"]: course for course in COURSES}, "v1")
+    path = tmp_path / "index.json"
+
+    index.save(str(path))
+    loaded = CourseSearchIndex.load(str(path))
+
+    assert loaded.to_dict() == index.to_dict()
+    assert loaded.search("graphs")[0][0] == "CS201"
+    # The temporary file was renamed into place
+    assert [entry.name for entry in tmp_path.iterdir()] == ["index.json"]
+
+def test_reload_publishes_an_updated_copy(tmp_path, monkeypatch):
+    first = CourseCatalog(COURSES, "v1")
+    second = CourseCatalog([*COURSES, {"id": "CS401", "name": "Graph Algorithms", "topics": ["graphs"]}], "v2")
+
+    async def get_catalog():
+        return course_catalog.catalog
+
+    monkeypatch.setattr(course_catalog, "catalog", first)
+    monkeypatch.setattr(course_catalog, "get", get_catalog)
+    monkeypatch.setattr(course_catalog, "listeners", list(course_catalog.listeners))
+    search = CourseSearch(index_path=str(tmp_path / "index.json"))
+
+    async def run():
+        published, _ = await search.get()
+        course_catalog.catalog = second
+        await search.on_reload(first, second)
+        return published
+
+    published = asyncio.run(run())
+
+    # Searches that started before the reload keep an unchanged index
+    assert published.catalog_version == "v1" and len(published) == 2
+    assert search.index is not published
+    assert search.index.catalog_version == "v2" and len(search.index) == 3
+    assert CourseSearchIndex.load(search.index_path).catalog_version == "v2"
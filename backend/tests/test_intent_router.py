@@ -0,0 +1,37 @@
+import pytest
+
+from services.intent.router import INTENT_TABLE, IntentRouter
+
+router = IntentRouter(INTENT_TABLE)
+
+@pytest.mark.parametrize("message", [
+    "is there a course on graphs?",
+    "what classes are offered in spring?",
+    "thanks! see you in class",
+    "I need to study for my exam",
+    "What class should I take for fun?",
+])
+def test_coordinator_words_do_not_pick_a_pattern(message):
+    match = router.route(message)
+
+    assert match.pattern == "general"
+    assert match.agent == "AcademicAdvisor"
+
+@pytest.mark.parametrize("message, pattern", [
+    ("What's my GPA this term?", "academic_progress"),
+    ("Can you help me with a study plan for my classes?", "academic_progress"),
+    ("What jobs could I get in the games industry?", "career_guidance"),
+    ("Can you help me schedule next semester?", "planning"),
+    ("Thanks for listening.", "general"),
+])
+def test_pattern_for(message, pattern):
+    assert router.pattern_for(message) == pattern
+
+def test_agent_for_counts_agent_keywords():
+    assert router.agent_for("I feel stressed about my exams") == "EmotionalSupport"
+    assert router.agent_for("which course covers graphs") == "AcademicAdvisor"
+    assert router.agent_for("my thesis project") == "ProjectMentor"
+
+def test_phrase_claims_its_words():
+    assert router.match_keywords("Make me a study plan") == ["study plan"]
+    assert router.match_keywords("I plan to study") == ["plan", "study"]
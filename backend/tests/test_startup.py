@@ -0,0 +1,41 @@
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+from scripts.check_startup_budget import FIRST_REQUEST_BUDGET_MS, IMPORT_BUDGET_MS, measure
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+# Loaded on first use, never by importing the app
+LAZY_PACKAGES = ["sqlalchemy", "core.models.database", "neo4j", "langchain_google_genai"]
+
+@pytest.fixture
+def app_env(monkeypatch):
+    """Run the measurements from the backend directory, without the warm-up"""
+    monkeypatch.setenv("WARMUP_ENABLED", "false")
+    monkeypatch.chdir(BACKEND_DIR)
+
+def test_import_loads_no_lazy_packages(app_env):
+    script = (
+        "import json, sys\n"
+        "import services.api.main\n"
+        f"print(json.dumps([name for name in {LAZY_PACKAGES!r} if name in sys.modules]))\n"
+    )
+    completed = subprocess.run(
+        [sys.executable, "-c", script],
+        capture_output=True, text=True, cwd=BACKEND_DIR,
+        env={**os.environ, "PYTHONPATH": str(BACKEND_DIR)},
+    )
+    assert completed.returncode == 0, completed.stderr
+    assert json.loads(completed.stdout.strip().splitlines()[-1]) == []
+
+def test_startup_within_budget(app_env):
+    results = measure(runs=3)
+
+    assert results["status"] < 400
+    assert results["import_ms"] <= IMPORT_BUDGET_MS, results
+    assert results["first_request_ms"] <= FIRST_REQUEST_BUDGET_MS, results